@@ -0,0 +1,215 @@
+"""
+Load test of every agenda endpoint, in-process (httpx ASGI transport, measures the service's own
+overhead) and/or against a uvicorn process (adds HTTP parsing and the socket round trip):
+
+    python -m benchmarks.api --mode both --group-sizes 10 1000 100000 --output before.json
+    git checkout <other commit>
+    python -m benchmarks.api --mode both --group-sizes 10 1000 100000 --output after.json
+    python -m benchmarks.compare before.json after.json
+
+Each group size gets its own group, seeded with synthetic items (benchmarks/data.py) through the
+batch endpoint, on in-memory storage with an optional simulated round trip (--storage-latency-ms).
+Reads run first, then the writes, each scenario with --concurrency clients sending --requests requests.
+The JSON report holds latency percentiles and RPS per (mode, group size, scenario) and the peak RSS.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import time
+import uuid
+from collections import Counter
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+from typing import AsyncIterator, Callable, List, Tuple
+
+import httpx
+
+from benchmarks.common import git_revision, peak_rss_mb, summarize, unsigned_token
+from benchmarks.data import batches, group_payloads, item_payload, window
+
+COOKIE_NAME = os.getenv("ACCESS_TOKEN_COOKIE_NAME", "access_token")
+BATCH_SIZE = 100
+
+# A scenario builds (method, path, json body) for the n-th request
+Request = Tuple[str, str, object]
+
+
+class Group:
+    def __init__(self, size: int, seed: int):
+        self.size = size
+        self.group_id = str(uuid.uuid4())
+        self.headers = {"Cookie": f"{COOKIE_NAME}={unsigned_token(self.group_id)}"}
+        self.item_ids: List[str] = []
+        self.rng = random.Random(seed)
+
+
+def scenarios(group: Group) -> List[Tuple[str, Callable[[int], Request]]]:
+    ids = group.item_ids
+    rng = group.rng
+
+    def window_query(_):
+        start, end = window(rng)
+        return "GET", f"/agenda/items?startDate={start.isoformat()}&endDate={end.isoformat()}".replace("+", "%2B"), None
+
+    # Updates and deletes use distinct items per request, so concurrent clients do not conflict
+    update_ids = ids[: len(ids) // 2]
+    delete_ids = ids[len(ids) // 2:]
+    return [
+        ("list_all", lambda n: ("GET", "/agenda/items", None)),
+        ("list_window", window_query),
+        ("list_page", lambda n: ("GET", "/agenda/items?limit=100", None)),
+        ("list_stream", lambda n: ("GET", "/agenda/items?stream=true", None)),
+        ("get_item", lambda n: ("GET", f"/agenda/items/{ids[n % len(ids)]}", None)),
+        ("create_item", lambda n: ("POST", "/agenda/items", item_payload(rng))),
+        ("update_item", lambda n: ("PUT", f"/agenda/items/{update_ids[n % len(update_ids)]}", item_payload(rng))),
+        ("batch_create", lambda n: ("POST", "/agenda/items:batch", {"items": [item_payload(rng) for _ in range(BATCH_SIZE)]})),
+        ("delete_item", lambda n: ("DELETE", f"/agenda/items/{delete_ids[n % len(delete_ids)]}", None)),
+    ]
+
+
+async def seed(client: httpx.AsyncClient, group: Group, seed_value: int):
+    for items in batches(group_payloads(group.size, seed_value)):
+        response = await client.post("/agenda/items:batch", json={"items": items}, headers=group.headers)
+        response.raise_for_status()
+        group.item_ids += [result["id"] for result in response.json()["results"] if result["status"] == 201]
+
+
+async def run_scenario(client: httpx.AsyncClient, group: Group, build: Callable[[int], Request], requests: int, concurrency: int) -> dict:
+    latencies: List[float] = []
+    statuses: Counter = Counter()
+    counter = iter(range(requests))
+
+    async def worker():
+        for n in counter:
+            method, path, body = build(n)
+            started = time.perf_counter()
+            response = await client.request(method, path, json=body, headers=group.headers)
+            await response.aread()
+            latencies.append((time.perf_counter() - started) * 1000)
+            statuses[response.status_code] += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    result = summarize(latencies, elapsed)
+    result["errors"] = sum(count for status, count in statuses.items() if status >= 400)
+    result["statuses"] = {str(status): count for status, count in sorted(statuses.items())}
+    return result
+
+
+async def run_mode(mode: str, client_factory, args) -> List[dict]:
+    results = []
+    async with client_factory() as (client, pid):
+        for index, size in enumerate(args.group_sizes):
+            group = Group(size, args.seed + index)
+            seeding_started = time.perf_counter()
+            await seed(client, group, args.seed + index)
+            print(f"[{mode}] seeded {size} items in {time.perf_counter() - seeding_started:.1f}s", file=sys.stderr)
+
+            for name, build in scenarios(group):
+                if args.scenarios and name not in args.scenarios:
+                    continue
+                # Deletes are limited to the items reserved for them
+                requests = min(args.requests, max(1, size - size // 2)) if name == "delete_item" else args.requests
+                result = await run_scenario(client, group, build, requests, args.concurrency)
+                result.update(mode=mode, group_size=size, scenario=name)
+                results.append(result)
+                print(f"[{mode}] {size:>7} {name:<13} p50={result['p50_ms']}ms p99={result['p99_ms']}ms rps={result['rps']}", file=sys.stderr)
+
+        rss = peak_rss_mb(pid)
+    for result in results:
+        result["peak_rss_mb"] = rss
+    return results
+
+
+@asynccontextmanager
+async def in_process_client(args) -> AsyncIterator[tuple]:
+    from benchmarks import fake_storage
+    from src.main import app
+
+    fake_storage.install(args.storage_latency_ms)
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+            yield client, None
+
+
+@asynccontextmanager
+async def uvicorn_client(args) -> AsyncIterator[tuple]:
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+    server = subprocess.Popen(
+        [sys.executable, "-m", "benchmarks.serve", "--port", str(port), "--storage-latency-ms", str(args.storage_latency_ms)],
+        env=os.environ.copy(),
+    )
+    try:
+        limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", limits=limits, timeout=None) as client:
+            for _ in range(100):
+                try:
+                    if (await client.get("/manage/health")).status_code == 200:
+                        break
+                except httpx.TransportError:
+                    pass
+                await asyncio.sleep(0.1)
+            else:
+                raise RuntimeError("uvicorn did not start")
+            yield client, server.pid
+    finally:
+        server.terminate()
+        server.wait()
+
+
+async def main(args):
+    # Read by src.settings on import, here and in the uvicorn process
+    os.environ.setdefault("STORAGE_BACKEND", "memory")
+    os.environ.setdefault("JWT_VALIDATION_ENABLED", "false")
+    os.environ.setdefault("LOG_LEVEL", args.log_level)
+    # Every scenario drives a single group as fast as it can; the per-group limits would refuse most of it
+    os.environ.setdefault("ADMISSION_GROUP_MAX_IN_FLIGHT", "0")
+    os.environ.setdefault("ADMISSION_GROUP_RATE", "0")
+
+    results = []
+    if args.mode in ("inprocess", "both"):
+        results += await run_mode("inprocess", lambda: in_process_client(args), args)
+    if args.mode in ("uvicorn", "both"):
+        results += await run_mode("uvicorn", lambda: uvicorn_client(args), args)
+
+    report = {
+        "meta": {
+            "revision": git_revision(),
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "arguments": {key: value for key, value in vars(args).items() if key != "output"},
+        },
+        "results": results,
+    }
+    rendered = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as output:
+            output.write(rendered)
+    else:
+        print(rendered)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mode", choices=["inprocess", "uvicorn", "both"], default="inprocess")
+    parser.add_argument("--group-sizes", type=int, nargs="+", default=[10, 1000, 10000])
+    parser.add_argument("--requests", type=int, default=300, help="requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--storage-latency-ms", type=float, default=0.0, help="simulated storage round trip")
+    parser.add_argument("--scenarios", nargs="*", help="only run these scenarios")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--log-level", default="warning")
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,107 @@
+"""
+Per-request overhead of the authentication middleware, before (BaseHTTPMiddleware) and after
+(pure ASGI), measured in-process through httpx's ASGI transport:
+
+    python -m benchmarks.auth_middleware --requests 5000
+
+Both variants wrap the same trivial Starlette app and share the same TokenUserExtractor (with JWT
+validation off, so only the middleware itself is measured); "none" is the app without middleware.
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+
+import httpx
+from fastapi import Request
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.responses import JSONResponse, PlainTextResponse
+from starlette.routing import Route
+
+from benchmarks.common import unsigned_token
+from src.auth.context import clear_user_context, get_user_context, set_user_context
+from src.auth.jwt_validator import TokenUserExtractor
+from src.auth.middleware import AuthenticationMiddleware
+from src.exceptions.api_exception import APIException
+from src.settings import settings
+
+
+class BaseHTTPAuthenticationMiddleware(BaseHTTPMiddleware):
+    """The previous implementation, kept here as the baseline."""
+
+    def __init__(self, app):
+        super().__init__(app)
+        self.token_extractor = TokenUserExtractor(
+            keycloak_public_key=settings.KEYCLOAK_PUBLIC_KEY,
+            jwt_validation_enabled=False,
+            cache_size=settings.JWT_CACHE_SIZE,
+            cache_max_ttl_seconds=settings.JWT_CACHE_MAX_TTL_SECONDS
+        )
+
+    async def dispatch(self, request: Request, call_next):
+        try:
+            token = request.cookies.get(settings.ACCESS_TOKEN_COOKIE_NAME)
+            if token:
+                try:
+                    set_user_context(self.token_extractor.extract_user_context(token))
+                except APIException as e:
+                    return JSONResponse(status_code=e.status_code, content=e.detail)
+            return await call_next(request)
+        finally:
+            clear_user_context()
+
+
+async def endpoint(request):
+    return PlainTextResponse(str(get_user_context().group_id) if get_user_context() else "anonymous")
+
+
+def build_app(middleware):
+    return Starlette(routes=[Route("/items", endpoint)], middleware=[Middleware(middleware)] if middleware else [])
+
+
+async def measure(name: str, app, requests: int, token: str) -> dict:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", cookies={settings.ACCESS_TOKEN_COOKIE_NAME: token}) as client:
+        for _ in range(min(200, requests)):
+            await client.get("/items")
+
+        latencies = []
+        started = time.perf_counter()
+        for _ in range(requests):
+            request_started = time.perf_counter()
+            response = await client.get("/items")
+            latencies.append((time.perf_counter() - request_started) * 1_000_000)
+            assert response.status_code == 200
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "middleware": name,
+        "requests": requests,
+        "rps": round(requests / elapsed),
+        "p50_us": round(statistics.median(latencies), 1),
+        "p99_us": round(latencies[int(len(latencies) * 0.99) - 1], 1),
+    }
+
+
+async def main(args):
+    settings.JWT_VALIDATION_ENABLED = False
+    token = unsigned_token()
+    results = [
+        await measure("none", build_app(None), args.requests, token),
+        await measure("BaseHTTPMiddleware (before)", build_app(BaseHTTPAuthenticationMiddleware), args.requests, token),
+        await measure("pure ASGI (after)", build_app(AuthenticationMiddleware), args.requests, token),
+    ]
+    baseline = results[0]["p50_us"]
+    for result in results:
+        result["overhead_p50_us"] = round(result["p50_us"] - baseline, 1)
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=3000)
+    asyncio.run(main(parser.parse_args()))
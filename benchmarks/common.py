@@ -0,0 +1,65 @@
+"""Helpers shared by the benchmarks: unsigned access tokens, latency summaries and memory readings."""
+import base64
+import json
+import resource
+import statistics
+import subprocess
+import sys
+import time
+import uuid
+from typing import Dict, List, Optional
+
+
+def unsigned_token(group_id: Optional[str] = None, role: str = "PATIENT") -> str:
+    """An access token the service accepts with JWT_VALIDATION_ENABLED=false."""
+    def encode(part: dict) -> str:
+        return base64.urlsafe_b64encode(json.dumps(part).encode()).decode().rstrip("=")
+    claims = {
+        "user_id": str(uuid.uuid4()),
+        "group_id": group_id or str(uuid.uuid4()),
+        "role": role,
+        "exp": int(time.time()) + 24 * 3600,
+    }
+    return f"{encode({'alg': 'none'})}.{encode(claims)}.signature"
+
+
+def summarize(latencies_ms: List[float], elapsed_seconds: float) -> Dict[str, float]:
+    ordered = sorted(latencies_ms)
+
+    def percentile(fraction: float) -> float:
+        return round(ordered[min(len(ordered) - 1, int(len(ordered) * fraction))], 3)
+
+    return {
+        "requests": len(ordered),
+        "rps": round(len(ordered) / elapsed_seconds, 1) if elapsed_seconds else 0.0,
+        "mean_ms": round(statistics.fmean(ordered), 3),
+        "p50_ms": percentile(0.50),
+        "p90_ms": percentile(0.90),
+        "p99_ms": percentile(0.99),
+        "max_ms": round(ordered[-1], 3),
+    }
+
+
+def peak_rss_mb(pid: Optional[int] = None) -> Optional[float]:
+    """Peak resident set size of this process, or of `pid` (Linux only), in MiB."""
+    if pid is None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # kilobytes on Linux, bytes on macOS
+        return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+    try:
+        with open(f"/proc/{pid}/status") as status:
+            for line in status:
+                if line.startswith("VmHWM:"):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    return None
+
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
@@ -0,0 +1,49 @@
+"""
+Compares two reports of benchmarks.api and flags regressions:
+
+    python -m benchmarks.compare before.json after.json --threshold 10
+
+Exits with status 1 when the p50 or p99 latency of a scenario grew, or its RPS dropped, by more than
+--threshold percent, so it can gate a CI job.
+"""
+import argparse
+import json
+import sys
+
+
+def load(path: str) -> dict:
+    with open(path) as report:
+        return {(result["mode"], result["group_size"], result["scenario"]): result for result in json.load(report)["results"]}
+
+
+def change(before: float, after: float) -> float:
+    return (after - before) / before * 100 if before else 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("before")
+    parser.add_argument("after")
+    parser.add_argument("--threshold", type=float, default=10.0, help="allowed regression in percent")
+    args = parser.parse_args()
+
+    before, after = load(args.before), load(args.after)
+    regressions = 0
+    print(f"{'mode':<10} {'size':>7} {'scenario':<13} {'p50 ms':>17} {'p99 ms':>17} {'rps':>17}")
+    for key in sorted(before.keys() & after.keys(), key=lambda key: (key[0], key[1], key[2])):
+        old, new = before[key], after[key]
+        p50, p99, rps = change(old["p50_ms"], new["p50_ms"]), change(old["p99_ms"], new["p99_ms"]), change(old["rps"], new["rps"])
+        regressed = p50 > args.threshold or p99 > args.threshold or -rps > args.threshold
+        regressions += regressed
+        print(
+            f"{key[0]:<10} {key[1]:>7} {key[2]:<13} "
+            f"{new['p50_ms']:>8.2f} ({p50:+5.0f}%) {new['p99_ms']:>8.2f} ({p99:+5.0f}%) {new['rps']:>8.0f} ({rps:+5.0f}%)"
+            f"{'  REGRESSION' if regressed else ''}"
+        )
+    for key in sorted(before.keys() ^ after.keys()):
+        print(f"{key[0]:<10} {key[1]:>7} {key[2]:<13} only in {'before' if key in before else 'after'}")
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
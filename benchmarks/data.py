@@ -0,0 +1,58 @@
+"""
+Synthetic agenda data: request payloads for groups of any size, reproducible for a given seed.
+
+Items are spread over a year starting at DATA_START, mostly short events with some all-day and
+multi-day items, and a mix of Event and Log types.
+"""
+import random
+from datetime import datetime, timedelta, timezone
+from typing import Iterator, List
+
+DATA_START = datetime(2024, 1, 1, tzinfo=timezone.utc)
+DATA_SPAN = timedelta(days=365)
+
+_SUMMARIES = ["Physiotherapy", "Medication", "Doctor visit", "Walk", "Blood pressure", "Family visit", "Meal"]
+_LOCATIONS = [None, "Home", "Clinic", "Hospital", "Pharmacy"]
+# (weight, duration)
+_DURATIONS = [(60, timedelta(minutes=30)), (25, timedelta(hours=1)), (10, timedelta(days=1)), (5, timedelta(days=3))]
+
+
+def item_payload(rng: random.Random) -> dict:
+    """Body of a POST /agenda/items request."""
+    start = DATA_START + timedelta(minutes=rng.randrange(int(DATA_SPAN.total_seconds() // 60)))
+    duration = rng.choices([duration for _, duration in _DURATIONS], weights=[weight for weight, _ in _DURATIONS])[0]
+    is_log = rng.random() < 0.3
+    return {
+        "summary": rng.choice(_SUMMARIES),
+        "description": None if rng.random() < 0.5 else "Generated by the benchmark suite",
+        "location": rng.choice(_LOCATIONS),
+        "itemType": "Log" if is_log else "Event",
+        "timeSlot": {
+            "startTime": start.isoformat(),
+            "endTime": (start if is_log else start + duration).isoformat(),
+        },
+    }
+
+
+def group_payloads(size: int, seed: int = 0) -> Iterator[dict]:
+    rng = random.Random(seed)
+    for _ in range(size):
+        yield item_payload(rng)
+
+
+def batches(payloads: Iterator[dict], batch_size: int = 1000) -> Iterator[List[dict]]:
+    """Chunks payloads into POST /agenda/items:batch bodies' item lists."""
+    batch = []
+    for payload in payloads:
+        batch.append(payload)
+        if len(batch) == batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def window(rng: random.Random, days: int = 7) -> tuple:
+    """A random [start, end] window inside the generated data range."""
+    start = DATA_START + timedelta(days=rng.randrange(DATA_SPAN.days - days))
+    return start, start + timedelta(days=days)
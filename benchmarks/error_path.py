@@ -0,0 +1,74 @@
+"""
+Throughput of the error responses clients hit most often, measured in-process through httpx's ASGI
+transport against the real application (no storage is touched; every request fails before that):
+
+    python -m benchmarks.error_path --requests 3000 2>/dev/null
+
+    missing_token     401 raised by the @authentication decorator
+    invalid_token     401 returned by the authentication middleware
+    forbidden         403 for a role the route does not allow
+    validation_error  400 from query parameter validation
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import time
+
+os.environ.setdefault("AZURE_STORAGE_CONNECTION_STRING", "UseDevelopmentStorage=true")
+os.environ.setdefault("JWT_VALIDATION_ENABLED", "false")
+
+import httpx  # noqa: E402
+
+from benchmarks.common import unsigned_token  # noqa: E402
+from src.main import app  # noqa: E402
+from src.settings import settings  # noqa: E402
+
+CASES = {
+    "missing_token": ("/agenda/items", None, 401),
+    "invalid_token": ("/agenda/items", "not-a-jwt", 401),
+    "forbidden": ("/agenda/items", unsigned_token(role="HCP"), 403),
+    "validation_error": ("/agenda/items?limit=0", unsigned_token(role="PATIENT"), 400),
+}
+
+
+async def measure(client: httpx.AsyncClient, name: str, requests: int) -> dict:
+    path, token, expected_status = CASES[name]
+    cookies = {settings.ACCESS_TOKEN_COOKIE_NAME: token} if token else None
+    for _ in range(min(200, requests)):
+        await client.get(path, cookies=cookies)
+
+    latencies = []
+    started = time.perf_counter()
+    for _ in range(requests):
+        request_started = time.perf_counter()
+        response = await client.get(path, cookies=cookies)
+        latencies.append((time.perf_counter() - request_started) * 1_000_000)
+        assert response.status_code == expected_status, (name, response.status_code, response.text)
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "case": name,
+        "status": expected_status,
+        "requests": requests,
+        "rps": round(requests / elapsed),
+        "p50_us": round(statistics.median(latencies), 1),
+        "p99_us": round(latencies[int(len(latencies) * 0.99) - 1], 1),
+    }
+
+
+async def main(args):
+    # Routes resolve the facade before failing, but never call it
+    app.state.agenda_facade = None
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        results = [await measure(client, name, args.requests) for name in args.cases]
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=3000)
+    parser.add_argument("--cases", nargs="+", choices=sorted(CASES), default=list(CASES))
+    asyncio.run(main(parser.parse_args()))
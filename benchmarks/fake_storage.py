@@ -0,0 +1,86 @@
+"""
+Storage used by the API benchmarks: the in-memory engine, optionally behind a fixed per-call delay
+that stands in for the Table Storage round trip, so results do not depend on a storage account.
+`FaultyRepository` also injects slow calls, errors and outages (benchmarks/resilience.py).
+"""
+import asyncio
+import functools
+import inspect
+import random
+from typing import Optional
+
+from azure.core.exceptions import HttpResponseError
+
+
+class LatencyRepository:
+    """Delegates to `inner`, sleeping `latency_ms` before every storage call."""
+
+    def __init__(self, inner, latency_ms: float):
+        self.inner = inner
+        self.delay = latency_ms / 1000
+
+    def __getattr__(self, name):
+        attribute = getattr(self.inner, name)
+        if not self.delay or not inspect.iscoroutinefunction(attribute):
+            return attribute
+
+        @functools.wraps(attribute)
+        async def delayed(*args, **kwargs):
+            await asyncio.sleep(self.delay)
+            return await attribute(*args, **kwargs)
+        return delayed
+
+
+class StorageFault(HttpResponseError):
+    """Stands in for a 503 from Table Storage."""
+
+    def __init__(self, message: str):
+        super().__init__(message=message)
+        self.status_code = 503
+
+
+class FaultyRepository:
+    """
+    Delegates to `inner`, injecting faults into every storage call: each call takes `latency_ms`, a
+    `slow_rate` share of them `slow_ms` more, and an `error_rate` share fails with `StorageFault`.
+    Setting `outage` to "hang" makes every call hang until cancelled, "error" makes every call fail.
+    `calls` counts the calls that reached the storage.
+    """
+
+    def __init__(self, inner, latency_ms: float = 0, slow_rate: float = 0, slow_ms: float = 0, error_rate: float = 0, seed: int = 0):
+        self.inner = inner
+        self.delay = latency_ms / 1000
+        self.slow_rate = slow_rate
+        self.slow_delay = slow_ms / 1000
+        self.error_rate = error_rate
+        self.outage: Optional[str] = None
+        self.calls = 0
+        self.rng = random.Random(seed)
+
+    def __getattr__(self, name):
+        attribute = getattr(self.inner, name)
+        if not inspect.iscoroutinefunction(attribute):
+            return attribute
+
+        @functools.wraps(attribute)
+        async def faulty(*args, **kwargs):
+            self.calls += 1
+            if self.outage == "hang":
+                await asyncio.Event().wait()
+            if self.outage == "error":
+                raise StorageFault("Storage is down")
+            delay = self.delay + (self.slow_delay if self.rng.random() < self.slow_rate else 0)
+            if delay:
+                await asyncio.sleep(delay)
+            if self.rng.random() < self.error_rate:
+                raise StorageFault("Injected storage error")
+            return await attribute(*args, **kwargs)
+        return faulty
+
+
+def install(latency_ms: float):
+    """Makes the application lifespan build the benchmark storage; call after importing src.main."""
+    import src.main
+    from src.repositories.memory_repository import MemoryAgendaRepository
+
+    src.main.create_repository = lambda: LatencyRepository(MemoryAgendaRepository(), latency_ms)
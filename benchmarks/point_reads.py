@@ -0,0 +1,138 @@
+"""
+Compares storage round trips and latency of GET/PUT on a single agenda item, before and after
+switching to point reads and ETag-conditional replaces.
+
+Runs against a local Azurite table endpoint (or any account given in AZURE_STORAGE_CONNECTION_STRING):
+
+    azurite-table --inMemoryPersistence &
+    python -m benchmarks.point_reads --items 2000 --iterations 300
+
+"before" replays the previous service flow: an OData `PartitionKey eq ... and RowKey eq ...` query for
+GET, and the same query followed by an unconditional replace for PUT.
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import time
+import uuid
+from datetime import datetime
+
+from azure.core import MatchConditions
+from azure.core.pipeline.transport import AioHttpTransport
+from azure.data.tables import UpdateMode
+from azure.data.tables.aio import TableClient
+
+AZURITE_CONNECTION_STRING = (
+    "DefaultEndpointsProtocol=http;AccountName=devstoreaccount1;"
+    "AccountKey=Eby8vdM02xNOcqFlqUwJPLlmEtlCDXJ1OUzFT50uSRZ6IFsuFq2UVErCz4I6tq/K1SZFPTOtr/KBHBeksoGMGw==;"
+    "TableEndpoint=http://127.0.0.1:10002/devstoreaccount1;"
+)
+
+
+class CountingTransport(AioHttpTransport):
+    """Counts HTTP round trips made by the table client."""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.requests = 0
+
+    async def send(self, request, **kwargs):
+        self.requests += 1
+        return await super().send(request, **kwargs)
+
+
+def _entity(group_id: str, row_key: str) -> dict:
+    now = datetime.utcnow().isoformat()
+    return {
+        "PartitionKey": group_id,
+        "RowKey": row_key,
+        "summary": "benchmark",
+        "description": None,
+        "location": None,
+        "itemType": "Event",
+        "created": now,
+        "updated": now,
+        "timeSlotStart": now,
+        "timeSlotEnd": now,
+    }
+
+
+async def get_before(client: TableClient, group_id: str, item_id: str):
+    entities = client.query_entities(f"PartitionKey eq '{group_id}' and RowKey eq '{item_id}'")
+    return await anext(entities, None)
+
+
+async def get_after(client: TableClient, group_id: str, item_id: str):
+    return await client.get_entity(partition_key=group_id, row_key=item_id)
+
+
+async def put_before(client: TableClient, group_id: str, item_id: str):
+    await get_before(client, group_id, item_id)
+    await client.update_entity(mode=UpdateMode.REPLACE, entity=_entity(group_id, item_id))
+
+
+async def put_after(client: TableClient, group_id: str, item_id: str):
+    existing = await get_after(client, group_id, item_id)
+    await client.update_entity(
+        mode=UpdateMode.REPLACE,
+        entity=_entity(group_id, item_id),
+        etag=existing.metadata["etag"],
+        match_condition=MatchConditions.IfNotModified
+    )
+
+
+async def measure(name, operation, client, transport, group_id, item_ids, iterations) -> dict:
+    latencies = []
+    transport.requests = 0
+    for i in range(iterations):
+        item_id = item_ids[i % len(item_ids)]
+        started = time.perf_counter()
+        await operation(client, group_id, item_id)
+        latencies.append((time.perf_counter() - started) * 1000)
+
+    latencies.sort()
+    return {
+        "operation": name,
+        "iterations": iterations,
+        "round_trips_per_call": transport.requests / iterations,
+        "p50_ms": round(statistics.median(latencies), 3),
+        "p95_ms": round(latencies[int(len(latencies) * 0.95) - 1], 3),
+        "mean_ms": round(statistics.fmean(latencies), 3),
+    }
+
+
+async def main(args):
+    transport = CountingTransport()
+    table_name = f"bench{uuid.uuid4().hex[:12]}"
+    async with TableClient.from_connection_string(args.connection_string, table_name, transport=transport) as client:
+        await client.create_table()
+        try:
+            group_id = str(uuid.uuid4())
+            item_ids = [str(uuid.uuid4()) for _ in range(args.items)]
+            for item_id in item_ids:
+                await client.create_entity(_entity(group_id, item_id))
+            # Other groups in the same table make the filtered query do realistic work
+            for _ in range(args.items):
+                await client.create_entity(_entity(str(uuid.uuid4()), str(uuid.uuid4())))
+
+            sample = item_ids[:: max(1, len(item_ids) // 50)]
+            results = [
+                await measure("GET before (filtered query)", get_before, client, transport, group_id, sample, args.iterations),
+                await measure("GET after (point read)", get_after, client, transport, group_id, sample, args.iterations),
+                await measure("PUT before (query + replace)", put_before, client, transport, group_id, sample, args.iterations),
+                await measure("PUT after (point read + conditional replace)", put_after, client, transport, group_id, sample, args.iterations),
+            ]
+        finally:
+            await client.delete_table()
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--connection-string", default=os.getenv("AZURE_STORAGE_CONNECTION_STRING") or AZURITE_CONNECTION_STRING)
+    parser.add_argument("--items", type=int, default=1000, help="items seeded in the benchmarked group")
+    parser.add_argument("--iterations", type=int, default=200)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,94 @@
+"""
+Cost of a routine care schedule stored as one recurring item versus one item per occurrence: a
+reminder at 08:00 every day of a year, next to `--items` unrelated one-off items, on in-memory
+storage, read by the service (no cache) over windows of a week, a month and the whole year:
+
+    python -m benchmarks.recurrence --reads 500 2>/dev/null
+
+Reports the entities each layout stores and, per window, the entities the storage returns and the
+latency of `list_agenda_items`. Both layouts return the same items.
+"""
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+import uuid
+from datetime import timedelta
+
+from benchmarks.common import git_revision, summarize
+from benchmarks.data import DATA_START, group_payloads
+from src.repositories.memory_repository import MemoryAgendaRepository
+from src.responses.agenda_response import ItemType, Recurrence, TimeSlot
+from src.services.agenda_service import AgendaService
+
+WINDOWS = {"week": timedelta(days=7), "month": timedelta(days=30), "year": timedelta(days=365)}
+REMINDER = dict(summary="Medication", description=None, location="Home", item_type=ItemType.EVENT)
+
+
+def reminder_slot(day: int) -> TimeSlot:
+    start = DATA_START + timedelta(days=day, hours=8)
+    return TimeSlot(start=start, end=start + timedelta(minutes=15))
+
+
+async def seeded_service(items: int, recurring: bool) -> AgendaService:
+    storage = MemoryAgendaRepository()
+    service = AgendaService(storage)
+    group_id = str(uuid.UUID(int=0))
+    await service.create_agenda_items(group_id, [
+        {
+            "summary": payload["summary"],
+            "description": payload["description"],
+            "location": payload["location"],
+            "item_type": ItemType(payload["itemType"]),
+            "time_slot": TimeSlot(start=payload["timeSlot"]["startTime"], end=payload["timeSlot"]["endTime"]),
+        }
+        for payload in group_payloads(items)
+    ])
+    if recurring:
+        await service.create_agenda_item(group_id, **REMINDER, time_slot=reminder_slot(0), recurrence=Recurrence(frequency="Daily", count=365))
+    else:
+        await service.create_agenda_items(group_id, [dict(REMINDER, time_slot=reminder_slot(day)) for day in range(365)])
+    return service
+
+
+async def measure(service: AgendaService, span: timedelta, reads: int) -> dict:
+    rng = random.Random(0)
+    group_id = str(uuid.UUID(int=0))
+    latencies, returned, scanned = [], 0, 0
+    started = time.perf_counter()
+    for _ in range(reads):
+        start = DATA_START + timedelta(days=rng.randrange(max(1, 365 - span.days)))
+        entities = await service.repository.query_range(group_id, start, start + span)
+        scanned += len(entities)
+        call_started = time.perf_counter()
+        items = await service.list_agenda_items(group_id, start, start + span)
+        latencies.append((time.perf_counter() - call_started) * 1000)
+        returned += len(items)
+    elapsed = time.perf_counter() - started
+    return {
+        "entities_read": round(scanned / reads, 1),
+        "items_returned": round(returned / reads, 1),
+        "latency": summarize(latencies, elapsed),
+    }
+
+
+async def main(args):
+    report = {
+        "meta": {"revision": git_revision(), "python": sys.version.split()[0], "items": args.items, "reads": args.reads},
+    }
+    for layout, recurring in (("one_per_occurrence", False), ("recurring", True)):
+        service = await seeded_service(args.items, recurring)
+        stored = len([entity async for entity in await service.repository.query_items(str(uuid.UUID(int=0)))])
+        report[layout] = {"entities_stored": stored}
+        for name, span in WINDOWS.items():
+            report[layout][name] = await measure(service, span, args.reads)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--items", type=int, default=1000, help="one-off items stored next to the reminder")
+    parser.add_argument("--reads", type=int, default=500)
+    asyncio.run(main(parser.parse_args()))
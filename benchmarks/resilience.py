@@ -0,0 +1,155 @@
+"""
+Behaviour of the storage resilience layer (src/repositories/resilient_repository.py) under injected
+faults, on in-memory storage behind `FaultyRepository` (benchmarks/fake_storage.py):
+
+    python -m benchmarks.resilience --reads 2000 --concurrency 20
+
+- tail: a share of point reads is slow; latency without the layer, with it, and with hedged reads.
+- flaky: a share of reads fails; how many reach the caller without the layer and with its retries.
+- outage: every call hangs; how long failing reads take and how many calls still reach the storage
+  once the circuit opens, then how reads fare after the storage recovers.
+"""
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from benchmarks.common import git_revision, summarize
+from benchmarks.fake_storage import FaultyRepository
+from src.repositories.memory_repository import MemoryAgendaRepository
+from src.repositories.resilient_repository import ResilientAgendaRepository
+from src.settings import settings
+
+GROUP_ID = str(uuid.uuid4())
+
+
+async def seeded_storage(items: int) -> MemoryAgendaRepository:
+    storage = MemoryAgendaRepository()
+    await storage.open()
+    start = datetime(2024, 1, 1)
+    for index in range(items):
+        slot_start = start + timedelta(hours=index)
+        await storage.create_entity({
+            "PartitionKey": GROUP_ID,
+            "RowKey": str(uuid.uuid4()),
+            "summary": "Benchmark item",
+            "itemType": "Event",
+            "created": start.isoformat(),
+            "updated": start.isoformat(),
+            "timeSlotStart": slot_start.isoformat(),
+            "timeSlotEnd": (slot_start + timedelta(minutes=30)).isoformat(),
+        })
+    return storage
+
+
+async def point_reads(repository, item_ids: list, reads: int, concurrency: int, client_timeout: float) -> dict:
+    """Random point reads; a read failing or exceeding `client_timeout` counts as failed."""
+    rng = random.Random(0)
+    semaphore = asyncio.Semaphore(concurrency)
+    succeeded, failed = [], []
+
+    async def read():
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                async with asyncio.timeout(client_timeout):
+                    await repository.get_entity(GROUP_ID, rng.choice(item_ids))
+                succeeded.append((time.perf_counter() - started) * 1000)
+            except Exception:
+                failed.append((time.perf_counter() - started) * 1000)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(read() for _ in range(reads)))
+    elapsed = time.perf_counter() - started
+    return {
+        "failed": len(failed),
+        "succeeded": summarize(succeeded, elapsed) if succeeded else None,
+        "failures": summarize(failed, elapsed) if failed else None,
+    }
+
+
+def configure(**overrides):
+    for name, value in overrides.items():
+        setattr(settings, name, value)
+
+
+async def tail_scenario(storage, item_ids, args) -> dict:
+    def faulty():
+        return FaultyRepository(storage, latency_ms=args.latency_ms, slow_rate=0.05, slow_ms=args.slow_ms, seed=1)
+
+    report = {"raw": await point_reads(faulty(), item_ids, args.reads, args.concurrency, args.client_timeout)}
+    for hedged in (False, True):
+        configure(STORAGE_HEDGED_READS_ENABLED=hedged)
+        repository = ResilientAgendaRepository(faulty())
+        report["hedged" if hedged else "resilient"] = await point_reads(
+            repository, item_ids, args.reads, args.concurrency, args.client_timeout
+        )
+    configure(STORAGE_HEDGED_READS_ENABLED=False)
+    return report
+
+
+async def flaky_scenario(storage, item_ids, args) -> dict:
+    def faulty():
+        return FaultyRepository(storage, latency_ms=args.latency_ms, error_rate=0.1, seed=2)
+
+    return {
+        "raw": await point_reads(faulty(), item_ids, args.reads, args.concurrency, args.client_timeout),
+        "resilient": await point_reads(ResilientAgendaRepository(faulty()), item_ids, args.reads, args.concurrency, args.client_timeout),
+    }
+
+
+async def outage_scenario(storage, item_ids, args) -> dict:
+    faulty = FaultyRepository(storage, latency_ms=args.latency_ms)
+    repository = ResilientAgendaRepository(faulty)
+    faulty.outage = "hang"
+    during = await point_reads(repository, item_ids, args.reads // 4, args.concurrency, args.client_timeout)
+    during["storage_calls"] = faulty.calls
+    during["circuit_state"] = repository.breaker.state
+
+    faulty.outage = None
+    await asyncio.sleep(settings.STORAGE_CIRCUIT_OPEN_SECONDS)
+    after = await point_reads(repository, item_ids, args.reads // 4, args.concurrency, args.client_timeout)
+    after["circuit_state"] = repository.breaker.state
+    return {"during": during, "after_recovery": after}
+
+
+async def main(args):
+    configure(
+        STORAGE_READ_TIMEOUT_SECONDS=args.read_timeout,
+        STORAGE_CIRCUIT_OPEN_SECONDS=args.open_seconds,
+        STORAGE_HEDGED_READS_ENABLED=False,
+    )
+    storage = await seeded_storage(args.items)
+    item_ids = [entity["RowKey"] async for entity in await storage.query_items(GROUP_ID)]
+    scenarios = {"tail": tail_scenario, "flaky": flaky_scenario, "outage": outage_scenario}
+    report = {
+        "meta": {
+            "revision": git_revision(),
+            "python": sys.version.split()[0],
+            "reads": args.reads,
+            "concurrency": args.concurrency,
+            "latency_ms": args.latency_ms,
+            "read_timeout_seconds": args.read_timeout,
+        },
+    }
+    for name in args.scenarios:
+        report[name] = await scenarios[name](storage, item_ids, args)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--items", type=int, default=1000)
+    parser.add_argument("--reads", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--latency-ms", type=float, default=5, help="simulated storage round trip")
+    parser.add_argument("--slow-ms", type=float, default=100, help="extra latency of the slow 5%% in the tail scenario")
+    parser.add_argument("--read-timeout", type=float, default=0.5, help="STORAGE_READ_TIMEOUT_SECONDS")
+    parser.add_argument("--open-seconds", type=float, default=1, help="STORAGE_CIRCUIT_OPEN_SECONDS")
+    parser.add_argument("--client-timeout", type=float, default=5, help="reads taking longer count as failed")
+    parser.add_argument("--scenarios", nargs="+", choices=["tail", "flaky", "outage"], default=["tail", "flaky", "outage"])
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,35 @@
+"""
+Runs the service in a uvicorn process on benchmark storage (see benchmarks/fake_storage.py);
+started by `benchmarks.api --mode uvicorn`, or by hand for external load generators:
+
+    python -m benchmarks.serve --port 8090 --storage-latency-ms 5
+"""
+import argparse
+import os
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8090)
+    parser.add_argument("--storage-latency-ms", type=float, default=0.0)
+    args = parser.parse_args()
+
+    # Settings are read on import
+    os.environ.setdefault("STORAGE_BACKEND", "memory")
+    os.environ.setdefault("JWT_VALIDATION_ENABLED", "false")
+    os.environ.setdefault("LOG_LEVEL", "warning")
+    # Every scenario drives a single group as fast as it can; the per-group limits would refuse most of it
+    os.environ.setdefault("ADMISSION_GROUP_MAX_IN_FLIGHT", "0")
+    os.environ.setdefault("ADMISSION_GROUP_RATE", "0")
+
+    import uvicorn
+    from benchmarks import fake_storage
+    from src.main import app
+
+    fake_storage.install(args.storage_latency_ms)
+    uvicorn.run(app, host=args.host, port=args.port, log_config=None, access_log=False)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Cold start of the service: how long importing the application takes, and how long a fresh
+`python -m src.server` process needs until /manage/ready answers (import, lifespan, bind):
+
+    python -m benchmarks.startup --runs 10
+    python -m benchmarks.startup --runs 10 --storage-backend azure   # Azure SDK imports only
+
+Every run is a new interpreter, so nothing is cached in memory; bytecode caches are warmed first.
+`--import-profile` adds the slowest modules of one `python -X importtime` run.
+"""
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+
+import httpx
+
+from benchmarks.common import git_revision
+
+
+def environment(storage_backend: str) -> dict:
+    env = os.environ.copy()
+    env.setdefault("JWT_VALIDATION_ENABLED", "false")
+    env.setdefault("LOG_LEVEL", "warning")
+    env["STORAGE_BACKEND"] = storage_backend
+    # Only parsed at startup; no request reaches the storage account
+    env.setdefault("AZURE_STORAGE_CONNECTION_STRING", "UseDevelopmentStorage=true")
+    return env
+
+
+def import_seconds(env: dict) -> float:
+    started = time.perf_counter()
+    subprocess.run([sys.executable, "-c", "import src.main"], env=env, check=True)
+    return time.perf_counter() - started
+
+
+def ready_seconds(env: dict) -> float:
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "src.server"],
+        env={**env, "HOST": "127.0.0.1", "PORT": str(port), "WEB_WORKERS": "1"},
+    )
+    try:
+        with httpx.Client(base_url=f"http://127.0.0.1:{port}") as client:
+            while time.perf_counter() - started < 30:
+                try:
+                    if client.get("/manage/ready").status_code == 200:
+                        return time.perf_counter() - started
+                except httpx.TransportError:
+                    time.sleep(0.01)
+        raise RuntimeError("server did not become ready within 30s")
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def import_profile(env: dict, top: int) -> list:
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import src.main"], env=env, capture_output=True, text=True, check=True
+    )
+    modules = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        modules.append((int(cumulative), name.strip()))
+    # Cumulative times nest; the top entries are the expensive subtrees
+    return [{"module": name, "cumulative_ms": round(us / 1000, 1)} for us, name in sorted(modules, reverse=True)[:top]]
+
+
+def summary(samples: list) -> dict:
+    samples = sorted(samples)
+    return {
+        "runs": len(samples),
+        "min_ms": round(samples[0] * 1000, 1),
+        "median_ms": round(statistics.median(samples) * 1000, 1),
+        "max_ms": round(samples[-1] * 1000, 1),
+    }
+
+
+def main(args):
+    env = environment(args.storage_backend)
+    import_seconds(env)
+    report = {
+        "meta": {"revision": git_revision(), "python": sys.version.split()[0], "storage_backend": args.storage_backend},
+        "import": summary([import_seconds(env) for _ in range(args.runs)]),
+        "ready": summary([ready_seconds(env) for _ in range(args.runs)]) if args.storage_backend != "azure" else None,
+    }
+    if args.import_profile:
+        report["import_profile"] = import_profile(env, args.import_profile)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--storage-backend", choices=["memory", "sqlite", "azure"], default="memory")
+    parser.add_argument("--import-profile", type=int, default=0, metavar="N", help="also list the N slowest imports")
+    main(parser.parse_args())
@@ -0,0 +1,128 @@
+"""
+Admission limits behind `AdmissionControlMiddleware`: a process-wide cap on requests in flight with a
+short bounded queue, and per-group concurrency and rate limits, so one group cannot take the worker.
+All state is per process and only touched from the event loop.
+"""
+import asyncio
+import time
+from collections import deque
+from typing import Dict, Optional, Tuple
+
+from src.metrics import ADMISSION_IN_FLIGHT, ADMISSION_QUEUE_DEPTH
+
+
+class ConcurrencyLimiter:
+    """
+    At most `limit` requests hold a slot; up to `max_queue` more wait in line, each at most `timeout`
+    seconds. `acquire` returns None once a slot is held, otherwise why it was refused ("queue_full",
+    "queue_timeout"). A slot is handed straight to the next waiter on `release`, so nothing overtakes it.
+    """
+
+    def __init__(self, limit: int, max_queue: int, timeout: float):
+        self.limit = limit
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self.in_flight = 0
+        self._waiters: deque = deque()
+
+    async def acquire(self) -> Optional[str]:
+        if self.in_flight < self.limit and not self._waiters:
+            self.in_flight += 1
+            ADMISSION_IN_FLIGHT.inc()
+            return None
+        if len(self._waiters) >= self.max_queue:
+            return "queue_full"
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        ADMISSION_QUEUE_DEPTH.inc()
+        try:
+            async with asyncio.timeout(self.timeout):
+                await waiter
+            return None
+        except BaseException as e:
+            if waiter.done() and not waiter.cancelled():
+                # The slot was handed over just as the wait ended; pass it on
+                self.release()
+            if isinstance(e, TimeoutError):
+                return "queue_timeout"
+            raise
+        finally:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+            ADMISSION_QUEUE_DEPTH.dec()
+
+    def release(self):
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.in_flight -= 1
+        ADMISSION_IN_FLIGHT.dec()
+
+
+class _GroupState:
+    __slots__ = ("in_flight", "tokens", "updated")
+
+    def __init__(self, tokens: float, now: float):
+        self.in_flight = 0
+        self.tokens = tokens
+        self.updated = now
+
+
+class GroupLimits:
+    """
+    Per group: at most `max_in_flight` concurrent requests, and a token bucket refilled at `rate`
+    requests per second holding up to `burst`. 0 disables a limit. Idle groups are forgotten, since a
+    new group starts in exactly the same state (no requests, full bucket).
+    """
+
+    def __init__(self, max_in_flight: int, rate: float, burst: int):
+        self.max_in_flight = max_in_flight
+        self.rate = rate
+        self.burst = max(burst, 1)
+        self._groups: Dict[str, _GroupState] = {}
+        self._sweep_at = 1024
+
+    def admit(self, group_id: str, concurrent: bool = True) -> Tuple[Optional[str], float]:
+        """
+        Counts a request against the group; returns (None, 0) when admitted, otherwise why it was
+        refused ("group_rate", "group_concurrency") and the seconds after which a retry can succeed.
+        A request admitted with `concurrent` must be released.
+        """
+        now = time.monotonic()
+        state = self._groups.get(group_id)
+        if state is None:
+            if len(self._groups) >= self._sweep_at:
+                self._sweep(now)
+            state = self._groups[group_id] = _GroupState(self.burst, now)
+
+        if self.rate:
+            state.tokens = min(self.burst, state.tokens + (now - state.updated) * self.rate)
+            state.updated = now
+            if state.tokens < 1:
+                return "group_rate", (1 - state.tokens) / self.rate
+        if concurrent and self.max_in_flight and state.in_flight >= self.max_in_flight:
+            return "group_concurrency", 1
+
+        if self.rate:
+            state.tokens -= 1
+        if concurrent:
+            state.in_flight += 1
+        return None, 0
+
+    def release(self, group_id: str):
+        state = self._groups.get(group_id)
+        if state is not None:
+            state.in_flight -= 1
+
+    def _sweep(self, now: float):
+        idle = [
+            group_id for group_id, state in self._groups.items()
+            if state.in_flight == 0 and (not self.rate or state.tokens + (now - state.updated) * self.rate >= self.burst)
+        ]
+        for group_id in idle:
+            del self._groups[group_id]
+        # Sweeping again only after the map doubled keeps the cost per new group constant
+        self._sweep_at = max(1024, 2 * len(self._groups))
@@ -0,0 +1,77 @@
+import math
+
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from src.admission.limits import ConcurrencyLimiter, GroupLimits
+from src.auth.context import get_user_context
+from src.auth.middleware import is_unauthenticated_path
+from src.exceptions.api_exception import APIException
+from src.exceptions.error_codes import ErrorCode
+from src.exceptions.exception_handler import api_exception_response
+from src.metrics import ADMISSION_REJECTED
+from src.settings import settings
+
+# Stay open for minutes: they count against the group's request rate, but hold no slot
+STREAMING_PATHS = frozenset({"/agenda/events"})
+
+
+class AdmissionControlMiddleware:
+    """
+    Pure ASGI middleware that admits or refuses requests before they reach the application. It runs
+    inside `AuthenticationMiddleware`, so the group of the caller is known.
+
+    A group over its limits gets 429, a saturated process 503, both with Retry-After. Nothing waits
+    longer than ADMISSION_QUEUE_TIMEOUT_SECONDS, so overload shows up as fast refusals that clients
+    and the load balancer can act on, rather than as timeouts. Probes and /metrics are never refused.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        self.limiter = ConcurrencyLimiter(
+            settings.ADMISSION_MAX_IN_FLIGHT,
+            settings.ADMISSION_MAX_QUEUE,
+            settings.ADMISSION_QUEUE_TIMEOUT_SECONDS
+        ) if settings.ADMISSION_MAX_IN_FLIGHT else None
+        self.groups = GroupLimits(
+            settings.ADMISSION_GROUP_MAX_IN_FLIGHT,
+            settings.ADMISSION_GROUP_RATE,
+            settings.ADMISSION_GROUP_BURST
+        )
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or is_unauthenticated_path(scope["path"]):
+            await self.app(scope, receive, send)
+            return
+
+        streaming = scope["path"] in STREAMING_PATHS
+        user_context = get_user_context()
+        group_id = str(user_context.group_id) if user_context and user_context.group_id else None
+        if group_id:
+            reason, retry_after = self.groups.admit(group_id, concurrent=not streaming)
+            if reason:
+                await _refuse(reason, ErrorCode.TOO_MANY_REQUESTS, "Too many requests for this group, retry later", retry_after)(
+                    scope, receive, send
+                )
+                return
+        try:
+            if streaming or self.limiter is None:
+                await self.app(scope, receive, send)
+                return
+            reason = await self.limiter.acquire()
+            if reason:
+                await _refuse(reason, ErrorCode.SERVICE_OVERLOADED, "The service is overloaded, retry later", 1)(
+                    scope, receive, send
+                )
+                return
+            try:
+                await self.app(scope, receive, send)
+            finally:
+                self.limiter.release()
+        finally:
+            if group_id and not streaming:
+                self.groups.release(group_id)
+
+
+def _refuse(reason: str, error_code: ErrorCode, message: str, retry_after: float):
+    ADMISSION_REJECTED.labels(reason=reason).inc()
+    return api_exception_response(APIException(message, error_code, headers={"Retry-After": str(max(1, math.ceil(retry_after)))}))
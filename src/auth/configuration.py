@@ -1,25 +1,25 @@
-from fastapi import FastAPI, Security
-from fastapi.openapi.models import SecurityScheme, SecuritySchemeType, APIKeyIn
-from typing import Dict, Any
+from fastapi import FastAPI
+from typing import Any, Dict
 
 
 def configure_security_scheme(app: FastAPI, cookie_name: str = "access_token") -> None:
+    """
+    Documents the cookie authentication in the OpenAPI schema. The schema is built on the first
+    request for it (/docs, /openapi.json) and cached by FastAPI, not while the application starts.
+    """
     security_scheme: Dict[str, Any] = {
         "type": "apiKey",
         "in": "cookie",
         "name": cookie_name,
         "description": "JWT token in cookie for authentication"
     }
+    build_schema = app.openapi
 
-    # Add security scheme to the OpenAPI specification
-    app.openapi_schema = None  # Clear existing schema
+    def openapi() -> Dict[str, Any]:
+        if app.openapi_schema is None:
+            schema = build_schema()
+            schema.setdefault("components", {}).setdefault("securitySchemes", {})["CookieAuth"] = security_scheme
+            schema["security"] = [{"CookieAuth": []}]
+        return app.openapi_schema
 
-    # Update all routes to use this security scheme
-    if app.openapi() is not None:
-        if "components" not in app.openapi():
-            app.openapi()["components"] = {}
-        if "securitySchemes" not in app.openapi()["components"]:
-            app.openapi()["components"]["securitySchemes"] = {}
-
-        app.openapi()["components"]["securitySchemes"]["CookieAuth"] = security_scheme
-        app.openapi()["security"] = [{"CookieAuth": []}]
\ No newline at end of file
+    app.openapi = openapi
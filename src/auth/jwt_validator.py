@@ -2,20 +2,33 @@ import logging
 import jwt
 from uuid import UUID
 
+from cryptography.hazmat.primitives.serialization import load_pem_public_key
+
 from src.auth.context import UserContext
 from src.auth.decorators import Role
+from src.auth.token_cache import VerifiedTokenCache
 import json
 import base64
 
 from src.exceptions.api_exception import APIException
 from src.exceptions.error_codes import ErrorCode
+from src.metrics import AUTH_TOKEN_CACHE_HITS, AUTH_TOKEN_CACHE_MISSES
 
 
 class TokenUserExtractor:
-    def __init__(self, keycloak_public_key: str, jwt_validation_enabled: bool = True):
+    def __init__(
+            self,
+            keycloak_public_key: str,
+            jwt_validation_enabled: bool = True,
+            cache_size: int = 0,
+            cache_max_ttl_seconds: float = 300
+    ):
         self.keycloak_public_key = keycloak_public_key
         self.jwt_validation_enabled = jwt_validation_enabled
         self.logger = logging.getLogger(__name__)
+        self.token_cache = VerifiedTokenCache(cache_size, cache_max_ttl_seconds)
+        # Parsed once here instead of on every jwt.decode call
+        self.verification_key = None
 
         if keycloak_public_key:
             try:
@@ -26,8 +39,9 @@ class TokenUserExtractor:
                     "-----END PUBLIC KEY-----"
                 )
                 self.keycloak_public_key = formatted_key
+                self.verification_key = load_pem_public_key(formatted_key.encode())
             except Exception as e:
-                self.logger.error(f"Failed to format public key: {str(e)}")
+                self.logger.error("Failed to format public key: %s", e)
                 self.keycloak_public_key = None
 
     def extract_user_context(self, token: str) -> UserContext:
@@ -35,12 +49,22 @@ class TokenUserExtractor:
             if self.jwt_validation_enabled:
                 self._validate_configuration()
 
+            cache_key = self.token_cache.key(token) if token else None
+            if cache_key:
+                user_context = self.token_cache.get(cache_key)
+                if user_context is not None:
+                    AUTH_TOKEN_CACHE_HITS.inc()
+                    return user_context
+                AUTH_TOKEN_CACHE_MISSES.inc()
+
             jwt_payload = self._parse_jwt(token)
-            return self._create_user_context(jwt_payload)
+            user_context = self._create_user_context(jwt_payload)
+            self.token_cache.put(cache_key, user_context, jwt_payload.get("exp"))
+            return user_context
         except APIException:
             raise
         except Exception as e:
-            self.logger.error(f"Failed to verify token: {str(e)}")
+            self.logger.error("Failed to verify token: %s", e)
             raise APIException(
                 message="Authentication failed",
                 error_code=ErrorCode.INVALID_TOKEN
@@ -64,12 +88,12 @@ class TokenUserExtractor:
             try:
                 return jwt.decode(
                     token,
-                    self.keycloak_public_key,
+                    self.verification_key or self.keycloak_public_key,
                     algorithms=["RS256"],
                     options={"verify_aud": False}
                 )
             except jwt.InvalidTokenError as e:
-                self.logger.error(f"Failed to decode JWT: {str(e)}")
+                self.logger.error("Failed to decode JWT: %s", e)
                 raise APIException(
                     message="Authentication failed",
                     error_code=ErrorCode.INVALID_TOKEN
@@ -90,7 +114,7 @@ class TokenUserExtractor:
             payload = base64.urlsafe_b64decode(parts[1] + "=" * (-len(parts[1]) % 4))
             return json.loads(payload)
         except Exception as e:
-            self.logger.error(f"Failed to parse unvalidated JWT: {str(e)}")
+            self.logger.error("Failed to parse unvalidated JWT: %s", e)
             raise APIException(
                 message="Invalid token format",
                 error_code=ErrorCode.INVALID_TOKEN
@@ -111,7 +135,7 @@ class TokenUserExtractor:
         except APIException:
             raise
         except Exception as e:
-            self.logger.error(f"Failed to create user context: {str(e)}")
+            self.logger.error("Failed to create user context: %s", e)
             raise APIException(
                 message="Invalid token payload",
                 error_code=ErrorCode.INVALID_TOKEN
@@ -131,7 +155,7 @@ class TokenUserExtractor:
             return {role}
 
         except ValueError as e:
-            self.logger.error(f"Invalid role value: {role_str}, error: {str(e)}")
+            self.logger.error("Invalid role value: %s, error: %s", role_str, e)
             raise APIException(
                 message="Invalid role",
                 error_code=ErrorCode.INSUFFICIENT_PERMISSIONS
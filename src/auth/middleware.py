@@ -1,49 +1,86 @@
 import logging
+from typing import Optional
 
-from fastapi import Request
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.responses import JSONResponse
+from starlette.requests import cookie_parser
+from starlette.types import ASGIApp, Receive, Scope, Send
 
 from src.auth.jwt_validator import TokenUserExtractor
 from src.auth.context import set_user_context, clear_user_context
 from src.exceptions.api_exception import APIException
 from src.exceptions.error_codes import ErrorCode
+from src.exceptions.exception_handler import api_exception_response
 from src.settings import settings
+from src.utils.instrumentation import stage
 
+# Scraped and probed constantly, and never need a user
+UNAUTHENTICATED_PATHS = frozenset({"/metrics"})
+UNAUTHENTICATED_PREFIXES = ("/manage/",)
 
-class AuthenticationMiddleware(BaseHTTPMiddleware):
-    def __init__(self, app):
-        super().__init__(app)
+
+class AuthenticationMiddleware:
+    """
+    Pure ASGI middleware that resolves the user from the access token cookie into `user_context_var`.
+
+    Unlike `BaseHTTPMiddleware` it does not wrap the request in extra tasks or memory streams:
+    `receive` and `send` are passed to the application untouched, so streaming responses work and
+    the user context stays visible to the application for the whole request.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
         self.token_extractor = TokenUserExtractor(
             keycloak_public_key=settings.KEYCLOAK_PUBLIC_KEY,
-            jwt_validation_enabled=settings.JWT_VALIDATION_ENABLED
+            jwt_validation_enabled=settings.JWT_VALIDATION_ENABLED,
+            cache_size=settings.JWT_CACHE_SIZE,
+            cache_max_ttl_seconds=settings.JWT_CACHE_MAX_TTL_SECONDS
         )
+        self.cookie_name = settings.ACCESS_TOKEN_COOKIE_NAME
         self.logger = logging.getLogger(__name__)
 
-    async def dispatch(self, request: Request, call_next):
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or is_unauthenticated_path(scope["path"]):
+            await self.app(scope, receive, send)
+            return
+
         try:
-            token = request.cookies.get(settings.ACCESS_TOKEN_COOKIE_NAME)
+            token = _read_cookie(scope, self.cookie_name)
             if token:
                 try:
-                    user_context = self.token_extractor.extract_user_context(token)
-                    self.logger.info(f"Authenticated user {user_context.user_id} with roles: {user_context.roles}")
-                    if user_context.group_id:
-                        self.logger.info(f"User belongs to group: {user_context.group_id}")
+                    with stage("auth", "access_token"):
+                        user_context = self.token_extractor.extract_user_context(token)
+                    # One line per request; sample it with LOG_SAMPLE_RATES under load
+                    self.logger.info(
+                        "Authenticated user %s with roles: %s, group: %s",
+                        user_context.user_id, user_context.roles, user_context.group_id
+                    )
                     set_user_context(user_context)
                 except APIException as e:
-                    self.logger.error(f"Authentication error: {str(e)}")
-                    return JSONResponse(
-                        status_code=e.status_code,
-                        content=e.detail
-                    )
+                    self.logger.error("Authentication error: %s", e)
+                    await api_exception_response(e)(scope, receive, send)
+                    return
                 except Exception as e:
-                    self.logger.error(f"Unexpected authentication error: {str(e)}")
+                    self.logger.error("Unexpected authentication error: %s", e)
                     raise APIException(
                         message="Authentication failed",
                         error_code=ErrorCode.INTERNAL_SERVER_ERROR
                     )
 
-            response = await call_next(request)
-            return response
+            await self.app(scope, receive, send)
         finally:
             clear_user_context()
+
+
+def is_unauthenticated_path(path: str) -> bool:
+    return path in UNAUTHENTICATED_PATHS or path.startswith(UNAUTHENTICATED_PREFIXES)
+
+
+def _read_cookie(scope: Scope, cookie_name: str) -> Optional[str]:
+    # Read straight from the raw headers, without building a Request
+    for name, value in scope["headers"]:
+        if name == b"cookie":
+            cookie_header = value.decode("latin-1")
+            if cookie_name in cookie_header:
+                token = cookie_parser(cookie_header).get(cookie_name)
+                if token:
+                    return token
+    return None
@@ -0,0 +1,48 @@
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+from src.auth.context import UserContext
+
+
+class VerifiedTokenCache:
+    """
+    Bounded LRU of user contexts for tokens that already passed verification.
+
+    Keys are SHA-256 digests, so raw tokens are not kept in memory. An entry never outlives the
+    token's `exp` claim, nor `max_ttl_seconds`, after which the token is verified again.
+    """
+
+    def __init__(self, max_size: int, max_ttl_seconds: float):
+        self.max_size = max_size
+        self.max_ttl_seconds = max_ttl_seconds
+        self._entries: "OrderedDict[bytes, Tuple[UserContext, float]]" = OrderedDict()
+
+    @staticmethod
+    def key(token: str) -> bytes:
+        return hashlib.sha256(token.encode()).digest()
+
+    def get(self, key: bytes) -> Optional[UserContext]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        user_context, expires_at = entry
+        if expires_at <= time.time():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return user_context
+
+    def put(self, key: bytes, user_context: UserContext, exp: Optional[float]) -> None:
+        if self.max_size <= 0:
+            return
+        expires_at = time.time() + self.max_ttl_seconds
+        if exp is not None:
+            expires_at = min(expires_at, float(exp))
+        if expires_at <= time.time():
+            return
+        self._entries[key] = (user_context, expires_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
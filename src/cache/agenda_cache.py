@@ -0,0 +1,255 @@
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from src.metrics import AGENDA_CACHE_EVICTIONS, AGENDA_CACHE_GROUPS, AGENDA_CACHE_ITEMS
+from src.responses.agenda_response import AgendaResponse
+from src.utils.interval_index import IntervalIndex
+from src.utils.recurrence_util import item_span
+from src.utils.time_window_util import as_utc, item_overlaps_window
+
+WindowKey = Tuple[Optional[datetime], Optional[datetime]]
+
+
+@dataclass
+class _View:
+    items: Dict[str, AgendaResponse]
+    expires_at: float
+    # Time slots of a complete group's items, built on the first window read and kept up to date by writes
+    index: Optional[IntervalIndex] = None
+
+
+@dataclass
+class _GroupEntry:
+    # The complete group, if it has been loaded
+    full: Optional[_View] = None
+    # Results of date-window queries, least recently used first
+    windows: "OrderedDict[WindowKey, _View]" = field(default_factory=OrderedDict)
+
+    def size(self) -> int:
+        return (len(self.full.items) if self.full else 0) + sum(len(view.items) for view in self.windows.values())
+
+
+@dataclass
+class _LoadTicket:
+    group_id: str
+    generation: int
+
+
+def window_key(start_date: Optional[datetime], end_date: Optional[datetime]) -> WindowKey:
+    return (as_utc(start_date) if start_date else None, as_utc(end_date) if end_date else None)
+
+
+@dataclass
+class AgendaCache:
+    """
+    In-process read-through cache of decoded agenda items, keyed by group id (the PartitionKey).
+
+    A group entry can hold the complete set of items of the group, which answers list and
+    single-item reads, and the results of date-window queries, which only answer the same window.
+    Views expire after `ttl_seconds` and the least recently used groups are evicted once
+    `max_groups` or `max_items` is exceeded. Writes update the cached views of a group in place.
+    Window reads of a complete group (`get_group_window`) go through an interval index of its items,
+    so they cost two binary searches plus the matching items rather than a scan of the group.
+    Expired views are kept `stale_seconds` longer, returned only to reads that pass `stale=True`
+    (the service does when the storage is unavailable).
+    """
+    ttl_seconds: float
+    max_groups: int
+    max_items: int
+    max_windows_per_group: int = 8
+    stale_seconds: float = 0
+    _groups: "OrderedDict[str, _GroupEntry]" = field(default_factory=OrderedDict)
+    _generations: Dict[str, int] = field(default_factory=dict)
+    _loading: Dict[str, int] = field(default_factory=dict)
+    _item_count: int = 0
+
+    def get_group(self, group_id: str, stale: bool = False) -> Optional[Dict[str, AgendaResponse]]:
+        entry = self._touch(group_id)
+        if entry is None or entry.full is None:
+            return None
+        now = time.monotonic()
+        if entry.full.expires_at <= now:
+            if now < entry.full.expires_at + self.stale_seconds:
+                return entry.full.items if stale else None
+            self._item_count -= len(entry.full.items)
+            entry.full = None
+            AGENDA_CACHE_EVICTIONS.labels(reason="expired").inc()
+            self._drop_if_empty(group_id, entry)
+            return None
+        return entry.full.items
+
+    def get_group_window(
+            self,
+            group_id: str,
+            start_date: Optional[datetime],
+            end_date: Optional[datetime],
+            stale: bool = False
+    ) -> Optional[List[AgendaResponse]]:
+        """The items of a cached complete group overlapping the window (recurring ones by their series span), ordered by start."""
+        group_items = self.get_group(group_id, stale)
+        if group_items is None:
+            return None
+        if not (start_date or end_date):
+            return list(group_items.values())
+        view = self._groups[group_id].full
+        if view.index is None:
+            view.index = IntervalIndex.build((item.id, *item_span(item)) for item in group_items.values())
+        return [group_items[key] for key in view.index.overlapping(start_date, end_date)]
+
+    def get_window(
+            self,
+            group_id: str,
+            start_date: Optional[datetime],
+            end_date: Optional[datetime],
+            stale: bool = False
+    ) -> Optional[Dict[str, AgendaResponse]]:
+        entry = self._touch(group_id)
+        if entry is None:
+            return None
+        key = window_key(start_date, end_date)
+        view = entry.windows.get(key)
+        if view is None:
+            return None
+        now = time.monotonic()
+        if view.expires_at <= now:
+            if now < view.expires_at + self.stale_seconds:
+                return view.items if stale else None
+            self._item_count -= len(entry.windows.pop(key).items)
+            AGENDA_CACHE_EVICTIONS.labels(reason="expired").inc()
+            self._drop_if_empty(group_id, entry)
+            return None
+        entry.windows.move_to_end(key)
+        return view.items
+
+    def begin_load(self, group_id: str) -> _LoadTicket:
+        # A write that lands while the group is being loaded bumps the generation,
+        # which makes the (now stale) load result be discarded in `put_group`/`put_window`.
+        # Every `begin_load` must be paired with an `end_load`.
+        self._loading[group_id] = self._loading.get(group_id, 0) + 1
+        return _LoadTicket(group_id, self._generations.get(group_id, 0))
+
+    def end_load(self, ticket: _LoadTicket) -> None:
+        remaining = self._loading.get(ticket.group_id, 0) - 1
+        if remaining > 0:
+            self._loading[ticket.group_id] = remaining
+        else:
+            self._loading.pop(ticket.group_id, None)
+            self._generations.pop(ticket.group_id, None)
+
+    def put_group(self, ticket: _LoadTicket, items: Iterable[AgendaResponse]) -> None:
+        view = self._new_view(ticket, items)
+        if view is None:
+            return
+        entry = self._groups.setdefault(ticket.group_id, _GroupEntry())
+        self._groups.move_to_end(ticket.group_id)
+        # The complete group answers every window, so the partial views are no longer needed
+        self._item_count -= entry.size()
+        entry.windows.clear()
+        entry.full = view
+        self._item_count += len(view.items)
+        self._evict()
+        self._report()
+
+    def put_window(
+            self,
+            ticket: _LoadTicket,
+            start_date: Optional[datetime],
+            end_date: Optional[datetime],
+            items: Iterable[AgendaResponse]
+    ) -> None:
+        view = self._new_view(ticket, items)
+        if view is None:
+            return
+        entry = self._groups.setdefault(ticket.group_id, _GroupEntry())
+        self._groups.move_to_end(ticket.group_id)
+        key = window_key(start_date, end_date)
+        previous = entry.windows.pop(key, None)
+        if previous:
+            self._item_count -= len(previous.items)
+        entry.windows[key] = view
+        self._item_count += len(view.items)
+        while len(entry.windows) > self.max_windows_per_group:
+            _, oldest = entry.windows.popitem(last=False)
+            self._item_count -= len(oldest.items)
+        self._evict()
+        self._report()
+
+    def upsert_item(self, group_id: str, item: AgendaResponse) -> None:
+        self._bump(group_id)
+        entry = self._groups.get(group_id)
+        if entry is None:
+            return
+        if entry.full:
+            self._item_count += item.id not in entry.full.items
+            entry.full.items[item.id] = item
+            if entry.full.index is not None:
+                entry.full.index.add(item.id, *item_span(item))
+        for (start_date, end_date), view in entry.windows.items():
+            if item_overlaps_window(item, start_date, end_date):
+                self._item_count += item.id not in view.items
+                view.items[item.id] = item
+            elif view.items.pop(item.id, None) is not None:
+                self._item_count -= 1
+        self._evict()
+        self._report()
+
+    def remove_item(self, group_id: str, item_id: str) -> None:
+        self._bump(group_id)
+        entry = self._groups.get(group_id)
+        if entry is None:
+            return
+        views = ([entry.full] if entry.full else []) + list(entry.windows.values())
+        for view in views:
+            if view.items.pop(item_id, None) is not None:
+                self._item_count -= 1
+            if view.index is not None:
+                view.index.remove(item_id)
+        self._report()
+
+    def invalidate(self, group_id: str) -> None:
+        self._bump(group_id)
+        self._drop(group_id, reason="invalidated")
+        self._report()
+
+    def _new_view(self, ticket: _LoadTicket, items: Iterable[AgendaResponse]) -> Optional[_View]:
+        if self._generations.get(ticket.group_id, 0) != ticket.generation:
+            return None
+        view_items = {item.id: item for item in items}
+        if len(view_items) > self.max_items:
+            return None
+        return _View(view_items, time.monotonic() + self.ttl_seconds)
+
+    def _touch(self, group_id: str) -> Optional[_GroupEntry]:
+        entry = self._groups.get(group_id)
+        if entry is not None:
+            self._groups.move_to_end(group_id)
+        return entry
+
+    def _bump(self, group_id: str) -> None:
+        if group_id in self._loading:
+            self._generations[group_id] = self._generations.get(group_id, 0) + 1
+
+    def _drop_if_empty(self, group_id: str, entry: _GroupEntry) -> None:
+        if entry.full is None and not entry.windows:
+            self._groups.pop(group_id, None)
+        self._report()
+
+    def _drop(self, group_id: str, reason: Optional[str] = None) -> None:
+        entry = self._groups.pop(group_id, None)
+        if entry is None:
+            return
+        self._item_count -= entry.size()
+        if reason:
+            AGENDA_CACHE_EVICTIONS.labels(reason=reason).inc()
+
+    def _evict(self) -> None:
+        while self._groups and (len(self._groups) > self.max_groups or self._item_count > self.max_items):
+            oldest = next(iter(self._groups))
+            self._drop(oldest, reason="size")
+
+    def _report(self) -> None:
+        AGENDA_CACHE_GROUPS.set(len(self._groups))
+        AGENDA_CACHE_ITEMS.set(self._item_count)
@@ -1,4 +1,13 @@
 MIN_LENGTH = 1
 MAX_LENGTH_SUMMARY = 64
 MAX_LENGTH_LOCATION = 64
-MAX_LENGTH_DESCRIPTION = 512
\ No newline at end of file
+MAX_LENGTH_DESCRIPTION = 512
+MAX_BATCH_ITEMS = 1000
+MAX_RECURRENCE_INTERVAL = 100
+MAX_RECURRENCE_COUNT = 10000
+MAX_RECURRENCE_EXCEPTIONS = 366
+MAX_RECURRENCE_OVERRIDES = 32
+# The rule, exceptions and overrides are stored as one property of the recurring item, and Table Storage
+# properties hold at most 32K UTF-16 code units. The caps above alone do not keep it below that (366
+# exceptions and 32 overrides with full descriptions take more), so the stored length is checked as well
+MAX_RECURRENCE_LENGTH = 32 * 1024
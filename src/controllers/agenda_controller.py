@@ -1,35 +1,186 @@
-from fastapi import APIRouter, Request, HTTPException, Depends
+from typing import List, Optional
+
+from fastapi import APIRouter, Request, HTTPException, Depends, Query
+from starlette.responses import Response, StreamingResponse
 from src.auth.decorators import authentication, Role
 from src.auth.context import get_user_context
 from src.dependancies import get_agenda_facade
 from src.exceptions.error_codes import ErrorCode
 from src.facades.agenda_facade import AgendaFacade
+from src.requests.batch_agenda_items_request import (
+    BatchCreateAgendaItemsRequest,
+    BatchDeleteAgendaItemsRequest,
+    BatchUpdateAgendaItemsRequest,
+)
 from src.requests.create_agenda_item_request import CreateAgendaItemRequest
+from src.requests.free_busy_request import FreeBusyQueryParams
 from src.requests.get_agenda_items_request import AgendaQueryParams
 from src.requests.update_agenda_item_request import UpdateAgendaItemRequest
-from src.responses.agenda_response import AgendaResponse, TimeSlot
+from src.responses.agenda_changes_response import AgendaChangesResponse
+from src.requests.recurrence_request import RecurrenceRequest
+from src.responses.agenda_response import AgendaResponse, Recurrence, TimeSlot
+from src.responses.batch_response import BatchResponse
+from src.responses.free_busy_response import FreeBusyResponse
+from src.settings import settings
+from src.utils.etag_util import caching_headers, collection_etag, etag_matches, item_etag, not_modified_response
+from src.utils.instrumentation import stage
+from src.utils.response_util import (
+    agenda_item_response,
+    agenda_items_response,
+    stream_json_array,
+    stream_server_sent_events,
+)
 from src.utils.validate_date_params import validate_date_params
+from src.utils.validate_pagination_params import validate_pagination_params
+from src.utils.validate_recurrence_params import validate_recurrence_params
 from src.utils.validation_util import validate_group_id
 
 agenda_router = APIRouter(tags=["agenda-service"])
 
+CHECK_CONFLICTS_DESCRIPTION = (
+    "Refuse (409) an event overlapping other events of the group, checking the occurrences of a recurring one; "
+    "a check before the write, not a reservation"
+)
+BATCH_CHECK_CONFLICTS_DESCRIPTION = (
+    "Give an event overlapping other events of the group, or an earlier item of the batch, a 409 result "
+    "instead of writing it; a check before the write, not a reservation"
+)
+
 
-@agenda_router.get("/agenda/items")
+@agenda_router.get(
+    "/agenda/items",
+    response_model=List[AgendaResponse],
+    description="Agenda items of the caller's group; with startDate or endDate, recurring items are returned as their "
+                "occurrences in that window, otherwise as stored (with their `recurrence`)",
+    responses={
+        200: {
+            "description": "Agenda items; when paginating, the X-Continuation-Token header holds the next page token",
+        },
+        304: {"description": "The list still matches the ETag sent in If-None-Match"},
+    }
+)
 @authentication([Role.PATIENT, Role.FAMILY_MEMBER, Role.PRIMARY_CAREGIVER])
 async def list_agenda_items(
         request: Request,
         params: AgendaQueryParams = Depends(),
         facade: AgendaFacade = Depends(get_agenda_facade)
 ):
-    print(f"Received start_date: {params.start_date}")
-    print(f"Received end_date: {params.end_date}")
+    user_context = get_user_context()
+    validate_group_id(user_context)
+    validate_date_params(params.start_date, params.end_date)
+    validate_pagination_params(params.limit, params.continuation_token, params.stream)
+
+    if params.stream:
+        return StreamingResponse(
+            stream_json_array(facade.stream_agenda_items(user_context.group_id, params.start_date, params.end_date)),
+            media_type="application/json"
+        )
+
+    if_none_match = request.headers.get("if-none-match")
+    if params.limit or params.continuation_token:
+        items, next_token = await facade.list_agenda_items_page(
+            user_context.group_id,
+            params.start_date,
+            params.end_date,
+            limit=params.limit or settings.AGENDA_DEFAULT_PAGE_SIZE,
+            continuation_token=params.continuation_token
+        )
+        operation = "list_page"
+        with stage("etag", operation):
+            etag = collection_etag(items, params.start_date, params.end_date, params.limit, params.continuation_token)
+        headers = caching_headers(etag)
+        if next_token:
+            headers["X-Continuation-Token"] = next_token
+    else:
+        items = await facade.list_agenda_items(user_context.group_id, params.start_date, params.end_date)
+        operation = "list_window" if params.start_date or params.end_date else "list"
+        with stage("etag", operation):
+            etag = collection_etag(items, params.start_date, params.end_date)
+        headers = caching_headers(etag)
+
+    # Compared before rendering, so an unchanged list costs no serialization
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+    with stage("serialize", operation):
+        return agenda_items_response(items, headers=headers)
+
+@agenda_router.get(
+    "/agenda/items/changes",
+    response_model=AgendaChangesResponse,
+    description="Items created, updated or deleted since the previous sync",
+    responses={
+        200: {"description": "Changed items, deleted item ids and the `since` token for the next sync"},
+        410: {"description": "The sync token is older than the deletion history; sync again without `since`"},
+    }
+)
+@authentication([Role.PATIENT, Role.FAMILY_MEMBER, Role.PRIMARY_CAREGIVER])
+async def list_agenda_changes(
+    request: Request,
+    since: Optional[str] = Query(None, description="The nextSince token of the previous sync; omit it for a full sync"),
+    facade: AgendaFacade = Depends(get_agenda_facade)
+):
+    user_context = get_user_context()
+    validate_group_id(user_context)
+    changes = await facade.list_agenda_changes(user_context.group_id, since)
+    with stage("serialize", "changes"):
+        return Response(content=changes.model_dump_json(), media_type="application/json")
+
+@agenda_router.get(
+    "/agenda/events",
+    description="Server-sent events for the items of the caller's group as they are created, updated and deleted",
+    response_class=StreamingResponse,
+    responses={
+        200: {
+            "content": {"text/event-stream": {}},
+            "description": "A `sync` event with a delta sync token, then `created`, `updated` and `deleted` events; "
+                           "sync with the token after (re)connecting to catch up on what happened in between",
+        },
+    }
+)
+@authentication([Role.PATIENT, Role.FAMILY_MEMBER, Role.PRIMARY_CAREGIVER])
+async def stream_agenda_events(
+    request: Request,
+    facade: AgendaFacade = Depends(get_agenda_facade)
+):
+    user_context = get_user_context()
+    validate_group_id(user_context)
+    return StreamingResponse(
+        stream_server_sent_events(facade.stream_agenda_events(user_context.group_id)),
+        media_type="text/event-stream",
+        # Unbuffered through nginx-style proxies, so events arrive as they happen
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
+@agenda_router.get(
+    "/agenda/freebusy",
+    response_model=FreeBusyResponse,
+    description="The periods between startDate and endDate taken by the events of the caller's group (occurrences of "
+                "recurring events included), merged and clipped to that window; logs never take time",
+    responses={
+        400: {"description": "Missing or invalid startDate or endDate"},
+    }
+)
+@authentication([Role.PATIENT, Role.FAMILY_MEMBER, Role.PRIMARY_CAREGIVER])
+async def get_free_busy(
+    request: Request,
+    params: FreeBusyQueryParams = Depends(),
+    facade: AgendaFacade = Depends(get_agenda_facade)
+):
     user_context = get_user_context()
     validate_group_id(user_context)
     validate_date_params(params.start_date, params.end_date)
-    return await facade.list_agenda_items(user_context.group_id, params.start_date, params.end_date)
+    free_busy = await facade.get_free_busy(user_context.group_id, params.start_date, params.end_date)
+    with stage("serialize", "freebusy"):
+        return Response(content=free_busy.model_dump_json(), media_type="application/json")
 
-@agenda_router.get("/agenda/items/{itemId}")
+@agenda_router.get(
+    "/agenda/items/{itemId}",
+    response_model=AgendaResponse,
+    description="Get an agenda item, or a single occurrence of a recurring item by its occurrence id",
+    responses={
+        304: {"description": "The item still matches the ETag sent in If-None-Match"},
+    }
+)
 @authentication([Role.PATIENT, Role.FAMILY_MEMBER, Role.PRIMARY_CAREGIVER])
 async def get_agenda_item(
     request: Request,
@@ -41,7 +192,12 @@ async def get_agenda_item(
     agenda_item = await facade.get_agenda_item(user_context.group_id, itemId)
     if not agenda_item:
         raise HTTPException(status_code=404, detail="Agenda item not found")
-    return agenda_item
+
+    etag = item_etag(agenda_item)
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return not_modified_response(etag)
+    with stage("serialize", "get"):
+        return agenda_item_response(agenda_item, headers=caching_headers(etag))
 
 @agenda_router.post(
     "/agenda/items",
@@ -50,13 +206,15 @@ async def get_agenda_item(
     responses={
         400: {"description": "Invalid request body or missing group ID"},
         401: {"description": "Invalid or missing authentication token"},
-        403: {"description": "Insufficient permissions to access this resource"}
+        403: {"description": "Insufficient permissions to access this resource"},
+        409: {"description": "With checkConflicts, the event overlaps other events of the group"}
     }
 )
 @authentication([Role.PATIENT, Role.FAMILY_MEMBER, Role.PRIMARY_CAREGIVER])
 async def create_agenda_item(
     request: Request,
     item: CreateAgendaItemRequest,
+    checkConflicts: bool = Query(False, description=CHECK_CONFLICTS_DESCRIPTION),
     facade: AgendaFacade = Depends(get_agenda_facade)
 ) -> AgendaResponse:
     user_context = get_user_context()
@@ -69,6 +227,8 @@ async def create_agenda_item(
             }
         )
 
+    validate_recurrence_params(item.timeSlot.startTime, item.recurrence)
+
     time_slot = TimeSlot(
         start=item.timeSlot.startTime,
         end=item.timeSlot.endTime
@@ -80,18 +240,22 @@ async def create_agenda_item(
         description=item.description,
         location=item.location,
         item_type=item.itemType,
-        time_slot=time_slot
+        time_slot=time_slot,
+        recurrence=_recurrence(item.recurrence),
+        check_conflicts=checkConflicts
     )
 
 @agenda_router.put(
     "/agenda/items/{itemId}",
     response_model=AgendaResponse,
-    description="Update an existing agenda item",
+    description="Update an existing agenda item; an occurrence id updates just that occurrence of a recurring item",
     responses={
         400: {"description": "Invalid request body or missing group ID"},
         401: {"description": "Invalid or missing authentication token"},
         403: {"description": "Insufficient permissions to access this resource"},
-        404: {"description": "Agenda item not found"}
+        404: {"description": "Agenda item not found"},
+        409: {"description": "With checkConflicts, the event overlaps other events of the group"},
+        412: {"description": "The agenda item was modified concurrently"}
     }
 )
 @authentication([Role.PATIENT, Role.FAMILY_MEMBER, Role.PRIMARY_CAREGIVER])
@@ -99,6 +263,7 @@ async def update_agenda_item(
     request: Request,
     itemId: str,
     item: UpdateAgendaItemRequest,
+    checkConflicts: bool = Query(False, description=CHECK_CONFLICTS_DESCRIPTION),
     facade: AgendaFacade = Depends(get_agenda_facade)
 ) -> AgendaResponse:
     user_context = get_user_context()
@@ -111,6 +276,8 @@ async def update_agenda_item(
             }
         )
 
+    validate_recurrence_params(item.timeSlot.startTime, item.recurrence)
+
     time_slot = TimeSlot(
         start=item.timeSlot.startTime,
         end=item.timeSlot.endTime
@@ -123,7 +290,9 @@ async def update_agenda_item(
         description=item.description,
         location=item.location,
         item_type=item.itemType,
-        time_slot=time_slot
+        time_slot=time_slot,
+        recurrence=_recurrence(item.recurrence),
+        check_conflicts=checkConflicts
     )
 
     if not updated_item:
@@ -134,12 +303,13 @@ async def update_agenda_item(
 @agenda_router.delete(
     "/agenda/items/{itemId}",
     status_code=204,
-    description="Delete an agenda item by its ID",
+    description="Delete an agenda item by its ID; an occurrence id deletes just that occurrence of a recurring item",
     responses={
         204: {"description": "Agenda item deleted successfully"},
         404: {"description": "Agenda item not found"},
         401: {"description": "Invalid or missing authentication token"},
-        403: {"description": "Insufficient permissions to access this resource"}
+        403: {"description": "Insufficient permissions to access this resource"},
+        412: {"description": "The recurring item was modified concurrently while deleting one of its occurrences"}
     }
 )
 @authentication([Role.PATIENT, Role.FAMILY_MEMBER, Role.PRIMARY_CAREGIVER])
@@ -155,3 +325,101 @@ async def delete_agenda_item(
     deleted = await facade.delete_agenda_item(user_context.group_id, itemId)
     if not deleted:
         raise HTTPException(status_code=404, detail="Agenda item not found")
+
+
+@agenda_router.post(
+    "/agenda/items:batch",
+    response_model=BatchResponse,
+    description="Create many agenda items at once; every item gets its own result",
+    responses={
+        400: {"description": "Invalid request body or missing group ID"},
+        401: {"description": "Invalid or missing authentication token"},
+        403: {"description": "Insufficient permissions to access this resource"}
+    }
+)
+@authentication([Role.PATIENT, Role.FAMILY_MEMBER, Role.PRIMARY_CAREGIVER])
+async def create_agenda_items(
+    request: Request,
+    batch: BatchCreateAgendaItemsRequest,
+    checkConflicts: bool = Query(False, description=BATCH_CHECK_CONFLICTS_DESCRIPTION),
+    facade: AgendaFacade = Depends(get_agenda_facade)
+) -> BatchResponse:
+    user_context = get_user_context()
+    validate_group_id(user_context)
+
+    for item in batch.items:
+        validate_recurrence_params(item.timeSlot.startTime, item.recurrence)
+
+    results = await facade.create_agenda_items(
+        str(user_context.group_id),
+        [_item_fields(item) for item in batch.items],
+        check_conflicts=checkConflicts
+    )
+    return BatchResponse(results=results)
+
+@agenda_router.post(
+    "/agenda/items:batchUpdate",
+    response_model=BatchResponse,
+    description="Update many agenda items or occurrences of recurring ones at once; every item gets its own result",
+    responses={
+        400: {"description": "Invalid request body or missing group ID"},
+        401: {"description": "Invalid or missing authentication token"},
+        403: {"description": "Insufficient permissions to access this resource"}
+    }
+)
+@authentication([Role.PATIENT, Role.FAMILY_MEMBER, Role.PRIMARY_CAREGIVER])
+async def update_agenda_items(
+    request: Request,
+    batch: BatchUpdateAgendaItemsRequest,
+    checkConflicts: bool = Query(False, description=BATCH_CHECK_CONFLICTS_DESCRIPTION),
+    facade: AgendaFacade = Depends(get_agenda_facade)
+) -> BatchResponse:
+    user_context = get_user_context()
+    validate_group_id(user_context)
+
+    for item in batch.items:
+        validate_recurrence_params(item.timeSlot.startTime, item.recurrence)
+
+    results = await facade.update_agenda_items(
+        str(user_context.group_id),
+        [{"item_id": item.id, **_item_fields(item)} for item in batch.items],
+        check_conflicts=checkConflicts
+    )
+    return BatchResponse(results=results)
+
+@agenda_router.post(
+    "/agenda/items:batchDelete",
+    response_model=BatchResponse,
+    description="Delete many agenda items or occurrences of recurring ones at once; every item gets its own result",
+    responses={
+        400: {"description": "Invalid request body or missing group ID"},
+        401: {"description": "Invalid or missing authentication token"},
+        403: {"description": "Insufficient permissions to access this resource"}
+    }
+)
+@authentication([Role.PATIENT, Role.FAMILY_MEMBER, Role.PRIMARY_CAREGIVER])
+async def delete_agenda_items(
+    request: Request,
+    batch: BatchDeleteAgendaItemsRequest,
+    facade: AgendaFacade = Depends(get_agenda_facade)
+) -> BatchResponse:
+    user_context = get_user_context()
+    validate_group_id(user_context)
+
+    results = await facade.delete_agenda_items(str(user_context.group_id), batch.ids)
+    return BatchResponse(results=results)
+
+
+def _item_fields(item) -> dict:
+    return {
+        "summary": item.summary,
+        "description": item.description,
+        "location": item.location,
+        "item_type": item.itemType,
+        "time_slot": TimeSlot(start=item.timeSlot.startTime, end=item.timeSlot.endTime),
+        "recurrence": _recurrence(item.recurrence),
+    }
+
+
+def _recurrence(recurrence: Optional[RecurrenceRequest]) -> Optional[Recurrence]:
+    return Recurrence(**recurrence.model_dump()) if recurrence is not None else None
@@ -1,4 +1,7 @@
+from fastapi import Request
+
 from src.facades.agenda_facade import AgendaFacade
 
-def get_agenda_facade() -> AgendaFacade:
-    return AgendaFacade()
\ No newline at end of file
+def get_agenda_facade(request: Request) -> AgendaFacade:
+    # Built once in the application lifespan, see src.main.lifespan
+    return request.app.state.agenda_facade
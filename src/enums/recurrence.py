@@ -0,0 +1,16 @@
+from enum import Enum
+
+class RecurrenceFrequency(str, Enum):
+    DAILY = "Daily"
+    WEEKLY = "Weekly"
+    MONTHLY = "Monthly"
+
+class Weekday(str, Enum):
+    # In the order of `datetime.weekday()`
+    MONDAY = "Monday"
+    TUESDAY = "Tuesday"
+    WEDNESDAY = "Wednesday"
+    THURSDAY = "Thursday"
+    FRIDAY = "Friday"
+    SATURDAY = "Saturday"
+    SUNDAY = "Sunday"
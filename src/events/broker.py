@@ -0,0 +1,105 @@
+"""
+Publish/subscribe of agenda changes per group, behind GET /agenda/events.
+
+The service publishes an `AgendaEvent` after every successful write; each open event stream holds a
+subscription to its group. `LocalEventBroker` fans events out within the process, which covers a
+single replica. A broker shared by replicas (e.g. on Redis pub/sub) implements `EventBroker` by
+sending what is published to its channel and handing what it receives to a `LocalEventBroker`.
+"""
+import asyncio
+from contextlib import asynccontextmanager
+from typing import AsyncContextManager, AsyncIterator, Dict, Optional, Protocol, Set, Tuple
+
+from src.metrics import AGENDA_EVENT_SUBSCRIBERS, AGENDA_EVENT_SUBSCRIBERS_DROPPED, AGENDA_EVENTS_PUBLISHED
+from src.responses.agenda_event import AgendaEvent
+from src.settings import settings
+
+# (event type, event as JSON), rendered once per event rather than once per subscriber
+Message = Tuple[str, str]
+
+
+class SubscriptionOverflow(Exception):
+    """The subscriber fell more than its queue size behind, so events were dropped."""
+
+
+class EventSubscription:
+    """The events of one group for one stream, buffered up to `queue_size` messages."""
+
+    def __init__(self, queue_size: int):
+        self._queue: asyncio.Queue = asyncio.Queue(queue_size)
+        self.overflowed = False
+
+    def deliver(self, message: Message):
+        if self.overflowed:
+            return
+        try:
+            self._queue.put_nowait(message)
+        except asyncio.QueueFull:
+            # Publishers never wait for a slow reader; it is disconnected and resyncs instead
+            self.overflowed = True
+            AGENDA_EVENT_SUBSCRIBERS_DROPPED.inc()
+
+    async def next(self, timeout: float) -> Optional[Message]:
+        """The next message, or None if none arrived within `timeout` seconds."""
+        if self.overflowed:
+            raise SubscriptionOverflow()
+        try:
+            return await asyncio.wait_for(self._queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class EventBroker(Protocol):
+    """Application-scoped like the repository: `open()` at startup, `close()` on shutdown."""
+
+    async def open(self): ...
+
+    async def close(self): ...
+
+    async def publish(self, group_id: str, event: AgendaEvent): ...
+
+    def subscribe(self, group_id: str) -> AsyncContextManager[EventSubscription]: ...
+
+
+class LocalEventBroker:
+    """Fans events out to the subscriptions of this process (`EVENT_BROKER=local`)."""
+
+    def __init__(self, queue_size: int):
+        self.queue_size = queue_size
+        self._subscriptions: Dict[str, Set[EventSubscription]] = {}
+
+    async def open(self):
+        pass
+
+    async def close(self):
+        pass
+
+    async def publish(self, group_id: str, event: AgendaEvent):
+        AGENDA_EVENTS_PUBLISHED.labels(type=event.type.value).inc()
+        self.deliver(group_id, (event.type.value, event.model_dump_json()))
+
+    def deliver(self, group_id: str, message: Message):
+        for subscription in self._subscriptions.get(str(group_id), ()):
+            subscription.deliver(message)
+
+    @asynccontextmanager
+    async def subscribe(self, group_id: str) -> AsyncIterator[EventSubscription]:
+        group_id = str(group_id)
+        subscription = EventSubscription(self.queue_size)
+        self._subscriptions.setdefault(group_id, set()).add(subscription)
+        AGENDA_EVENT_SUBSCRIBERS.inc()
+        try:
+            yield subscription
+        finally:
+            subscriptions = self._subscriptions[group_id]
+            subscriptions.discard(subscription)
+            if not subscriptions:
+                del self._subscriptions[group_id]
+            AGENDA_EVENT_SUBSCRIBERS.dec()
+
+
+def create_event_broker() -> EventBroker:
+    """Builds the (not yet opened) broker selected by EVENT_BROKER."""
+    if settings.EVENT_BROKER.lower() == "local":
+        return LocalEventBroker(settings.EVENT_QUEUE_SIZE)
+    raise ValueError(f"Unknown EVENT_BROKER '{settings.EVENT_BROKER}', expected local")
@@ -1,10 +1,12 @@
+from typing import Dict, Optional
+
 from fastapi import HTTPException
 from src.exceptions.error_codes import ErrorCode
 
 
 class APIException(HTTPException):
-    def __init__(self, message: str, error_code: ErrorCode):
+    def __init__(self, message: str, error_code: ErrorCode, headers: Optional[Dict[str, str]] = None):
         super().__init__(status_code=error_code.status, detail={
             "message": message,
             "code": error_code.code
-        })
+        }, headers=headers)
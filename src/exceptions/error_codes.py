@@ -9,8 +9,15 @@ class ErrorCode(Enum):
 
     VALIDATION_ERROR = ("SYS0001", http_status.HTTP_400_BAD_REQUEST)
     INTERNAL_SERVER_ERROR = ("SYS0002", http_status.HTTP_500_INTERNAL_SERVER_ERROR)
+    STORAGE_UNAVAILABLE = ("SYS0003", http_status.HTTP_503_SERVICE_UNAVAILABLE)
+    TOO_MANY_REQUESTS = ("SYS0004", http_status.HTTP_429_TOO_MANY_REQUESTS)
+    SERVICE_OVERLOADED = ("SYS0005", http_status.HTTP_503_SERVICE_UNAVAILABLE)
 
     BAD_REQUEST = ("AGENDA0001", http_status.HTTP_400_BAD_REQUEST)
+    PRECONDITION_FAILED = ("AGENDA0002", http_status.HTTP_412_PRECONDITION_FAILED)
+    ITEM_NOT_FOUND = ("AGENDA0003", http_status.HTTP_404_NOT_FOUND)
+    SYNC_TOKEN_EXPIRED = ("AGENDA0004", http_status.HTTP_410_GONE)
+    ITEM_CONFLICT = ("AGENDA0005", http_status.HTTP_409_CONFLICT)
 
     def __init__(self, code, status=http_status.HTTP_500_INTERNAL_SERVER_ERROR):
         self.code = code
@@ -1,122 +1,145 @@
 import json
 import logging
-import traceback
-from typing import Dict, Any
+from functools import lru_cache
+from typing import Any, Dict, Optional
 
 from fastapi import FastAPI, Request
 from fastapi.exceptions import RequestValidationError
-from starlette.responses import JSONResponse
+from fastapi.routing import APIRoute
+from pydantic import BaseModel
+from starlette.responses import Response
 
 from src.exceptions.api_exception import APIException
 from src.exceptions.error_codes import ErrorCode
 
 logger = logging.getLogger(__name__)
 
+# Never written to the logs
+REDACTED_HEADERS = frozenset({"cookie", "authorization"})
+
+
 def _log_request_details(request: Request) -> Dict[str, Any]:
     """Helper function to collect common request details for logging"""
     return {
         "method": request.method,
         "url": str(request.url),
         "client_host": request.client.host if request.client else "unknown",
-        "headers": dict(request.headers),
+        "headers": {
+            name: "<redacted>" if name in REDACTED_HEADERS else value
+            for name, value in request.headers.items()
+        },
     }
 
 
+@lru_cache(maxsize=256)
+def _error_body(code: str, message: str) -> bytes:
+    # Error bodies repeat (most come straight from ErrorCode and a fixed message), so each is serialized once
+    return json.dumps({"code": code, "message": message}, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def error_response(status_code: int, code: str, message: str, headers: Optional[Dict[str, str]] = None) -> Response:
+    return Response(content=_error_body(code, message), status_code=status_code, media_type="application/json", headers=headers)
+
+
+def api_exception_response(exc: APIException) -> Response:
+    return error_response(exc.status_code, exc.detail.get("code"), exc.detail.get("message"), exc.headers)
+
+
+@lru_cache(maxsize=None)
+def _model_field_descriptions(model: type) -> Dict[str, str]:
+    descriptions = {}
+    for name, field_info in model.model_fields.items():
+        if field_info.description:
+            descriptions[name] = field_info.description
+            if field_info.alias:
+                descriptions[field_info.alias] = field_info.description
+    return descriptions
+
+
+# Per route (APIRoute is not hashable, its unique_id is)
+_route_descriptions: Dict[str, Dict[str, str]] = {}
+
+
+def _route_field_descriptions(route: APIRoute) -> Dict[str, str]:
+    """Descriptions of the fields of the request models (query parameter classes and bodies) of a route."""
+    descriptions = _route_descriptions.get(route.unique_id)
+    if descriptions is not None:
+        return descriptions
+
+    descriptions = {}
+    dependants = [route.dependant]
+    while dependants:
+        dependant = dependants.pop()
+        dependants.extend(dependant.dependencies)
+        models = [dependant.call] + [field.type_ for field in dependant.body_params]
+        for model in models:
+            if isinstance(model, type) and issubclass(model, BaseModel):
+                descriptions.update(_model_field_descriptions(model))
+    _route_descriptions[route.unique_id] = descriptions
+    return descriptions
+
+
+def _field_descriptions(request: Request) -> Dict[str, str]:
+    route = request.scope.get("route")
+    return _route_field_descriptions(route) if isinstance(route, APIRoute) else {}
+
+
 def configure_exception_handlers(app: FastAPI):
     @app.exception_handler(RequestValidationError)
     async def validation_exception_handler(request: Request, exc: RequestValidationError):
         """
         Handles FastAPI's RequestValidationError and formats it according to our API standard
         """
-        request_details = _log_request_details(request)
-
         # For query parameters, body, etc.
-        model = None
-        for error in exc.errors():
-            # Try to get the Pydantic model that was used for validation
-            if hasattr(error, 'ctx') and hasattr(error['ctx'], 'model'):
-                model = error['ctx'].model
-                break
+        descriptions = _field_descriptions(request)
 
         errors = []
         for error in exc.errors():
             field_name = error["loc"][-1]
 
-            # If we have a model and it has field info, use that for the message
-            if model and hasattr(model, 'model_fields') and field_name in model.model_fields:
-                field_info = model.model_fields[field_name]
-                if field_info.description:
-                    errors.append(f"Invalid {field_name}: {field_info.description}.")
-                    continue
+            # If the request model describes the field, use that for the message
+            description = descriptions.get(field_name)
+            if description:
+                errors.append(f"Invalid {field_name}: {description}.")
+                continue
 
             # Fallback to a generic message
             errors.append(f"Invalid value provided for {field_name}.")
 
-        return JSONResponse(
-            status_code=ErrorCode.VALIDATION_ERROR.status,
-            content={
-                "code": ErrorCode.VALIDATION_ERROR.code,
-                "message": " ".join(errors)
-            }
-        )
+        return error_response(ErrorCode.VALIDATION_ERROR.status, ErrorCode.VALIDATION_ERROR.code, " ".join(errors))
 
     @app.exception_handler(APIException)
     async def api_exception_handler(request: Request, exc: APIException):
-        request_details = _log_request_details(request)
-
-        # Log based on the severity of the error
-        if exc.status_code >= 500:
-            logger.error(
-                "API error occurred",
-                extra={
-                    "request": request_details,
-                    "error_code": exc.detail.get("code"),
-                    "error_message": exc.detail.get("message"),
-                    "status_code": exc.status_code,
-                    "traceback": traceback.format_exc()
-                }
-            )
-        else:
-            logger.warning(
+        # Log based on the severity of the error; the details are only collected when they will be written
+        level = logging.ERROR if exc.status_code >= 500 else logging.WARNING
+        if logger.isEnabledFor(level):
+            logger.log(
+                level,
                 "API error occurred",
                 extra={
-                    "request": request_details,
+                    "request": _log_request_details(request),
                     "error_code": exc.detail.get("code"),
                     "error_message": exc.detail.get("message"),
                     "status_code": exc.status_code
-                }
+                },
+                exc_info=exc if exc.status_code >= 500 else None
             )
-        return JSONResponse(
-            status_code=exc.status_code,
-            content=exc.detail
-        )
+        return api_exception_response(exc)
 
     @app.exception_handler(Exception)
     async def general_exception_handler(request: Request, exc: Exception):
         """
         Handles any unhandled exceptions to prevent exposing internal errors
         """
-        request_details = _log_request_details(request)
-        error_details = {
-            "request": request_details,
-            "error_type": exc.__class__.__name__,
-            "error_message": str(exc),
-            "traceback": traceback.format_exc()
-        }
-
         # Just add a distinctive marker to make it clear our handler caught it
         logger.error(
-            "=== Exception Handler Caught: {} ===".format(exc.__class__.__name__),
-            extra=error_details
+            "=== Exception Handler Caught: %s ===", exc.__class__.__name__,
+            extra={
+                "request": _log_request_details(request),
+                "error_type": exc.__class__.__name__,
+                "error_message": str(exc),
+            },
+            exc_info=exc
         )
 
-        logger.error(f"Error message: {str(exc)}")
-        logger.debug(f"Full traceback:\n{traceback.format_exc()}")
-
-        return JSONResponse(
-            status_code=500,
-            content={
-                "code": ErrorCode.INTERNAL_SERVER_ERROR.code,
-                "message": "An unexpected error occurred"
-            }
-        )
\ No newline at end of file
+        return error_response(500, ErrorCode.INTERNAL_SERVER_ERROR.code, "An unexpected error occurred")
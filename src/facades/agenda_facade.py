@@ -1,15 +1,24 @@
 import uuid
 from typing import Optional
 
-from src.repositories.agenda_repository import AgendaRepository
+from src.cache.agenda_cache import AgendaCache
+from src.events.broker import EventBroker
+from src.repositories.base import BaseAgendaRepository
 from src.responses.agenda_response import AgendaResponse
 from src.services.agenda_service import AgendaService
 
 
 class AgendaFacade:
-    def __init__(self):
-        self.repository = AgendaRepository()
-        self.service = AgendaService(self.repository)
+    def __init__(
+            self,
+            repository: BaseAgendaRepository,
+            cache: Optional[AgendaCache] = None,
+            events: Optional[EventBroker] = None
+    ):
+        self.repository = repository
+        self.cache = cache
+        self.events = events
+        self.service = AgendaService(self.repository, self.cache, self.events)
 
     async def initialize(self):
         await self.repository.ensure_table_exists()
@@ -17,6 +26,21 @@ class AgendaFacade:
     async def list_agenda_items(self, *args, **kwargs):
         return await self.service.list_agenda_items(*args, **kwargs)
 
+    async def list_agenda_items_page(self, *args, **kwargs):
+        return await self.service.list_agenda_items_page(*args, **kwargs)
+
+    def stream_agenda_items(self, *args, **kwargs):
+        return self.service.stream_agenda_items(*args, **kwargs)
+
+    async def list_agenda_changes(self, *args, **kwargs):
+        return await self.service.list_agenda_changes(*args, **kwargs)
+
+    def stream_agenda_events(self, *args, **kwargs):
+        return self.service.stream_agenda_events(*args, **kwargs)
+
+    async def get_free_busy(self, *args, **kwargs):
+        return await self.service.get_free_busy(*args, **kwargs)
+
     async def get_agenda_item(self, group_id: uuid, item_id: uuid) -> Optional[AgendaResponse]:
         return await self.service.get_agenda_item(group_id, item_id)
 
@@ -28,3 +52,12 @@ class AgendaFacade:
 
     async def delete_agenda_item(self, group_id: uuid, item_id: uuid) -> bool:
         return await self.service.delete_agenda_item(group_id, item_id)
+
+    async def create_agenda_items(self, *args, **kwargs):
+        return await self.service.create_agenda_items(*args, **kwargs)
+
+    async def update_agenda_items(self, *args, **kwargs):
+        return await self.service.update_agenda_items(*args, **kwargs)
+
+    async def delete_agenda_items(self, *args, **kwargs):
+        return await self.service.delete_agenda_items(*args, **kwargs)
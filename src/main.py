@@ -1,51 +1,73 @@
-import logging
+import os
+from contextlib import AsyncExitStack, asynccontextmanager
 
 import uvicorn
 from fastapi import FastAPI
+from prometheus_client import multiprocess
 from prometheus_fastapi_instrumentator import Instrumentator
 from starlette.responses import RedirectResponse
 
+from src.admission.middleware import AdmissionControlMiddleware
 from src.auth.configuration import configure_security_scheme
 from src.auth.middleware import AuthenticationMiddleware
+from src.cache.agenda_cache import AgendaCache
 from src.controllers.agenda_controller import agenda_router
+from src.events.broker import create_event_broker
 from src.exceptions.exception_handler import configure_exception_handlers
+from src.facades.agenda_facade import AgendaFacade
+from src.manage.health import LoopLagMonitor, ReadinessCheck
 from src.manage.router import router as health_router
+from src.repositories.factory import create_repository
+from src.server import server_options
 from src.settings import settings
+from src.utils.logging_util import configure_logging
 
 
-def configure_logging():
-    logging.basicConfig(
-        level=logging.DEBUG,
-        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-    )
-    logging.getLogger("uvicorn.error").setLevel(logging.CRITICAL)
-    # Keep other loggers as they are
-    logging.getLogger("uvicorn.access").setLevel(logging.INFO)
-    logging.getLogger(__name__).setLevel(logging.DEBUG)
-
 configure_logging()
 
-class ExcludePathFilter(logging.Filter):
-    def __init__(self, excluded_paths):
-        super().__init__()
-        self.excluded_paths = excluded_paths
-
-    def filter(self, record):
-        # Check if the log message contains any excluded path
-        message = record.getMessage()
-        return not any(path in message for path in self.excluded_paths)
 
-# Apply the filter to the access logger
-excluded_paths = ["/metrics", "/manage/health"]
-logging.getLogger("uvicorn.access").addFilter(ExcludePathFilter(excluded_paths))
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # One repository (and connection pool) per process; the table is provisioned here, not per request
+    repository = create_repository()
+    events = create_event_broker()
+    lag_monitor = LoopLagMonitor()
+    try:
+        # Whatever opened is closed again in reverse order, also when a later step fails
+        async with AsyncExitStack() as resources:
+            await repository.open()
+            resources.push_async_callback(repository.close)
+            await events.open()
+            resources.push_async_callback(events.close)
+            lag_monitor.start()
+            resources.push_async_callback(lag_monitor.stop)
+
+            await repository.ensure_table_exists()
+            cache = AgendaCache(
+                ttl_seconds=settings.AGENDA_CACHE_TTL_SECONDS,
+                max_groups=settings.AGENDA_CACHE_MAX_GROUPS,
+                max_items=settings.AGENDA_CACHE_MAX_ITEMS,
+                stale_seconds=settings.AGENDA_CACHE_STALE_SECONDS,
+            ) if settings.AGENDA_CACHE_ENABLED else None
+            app.state.agenda_facade = AgendaFacade(repository, cache, events)
+            app.state.readiness = ReadinessCheck(repository, lag_monitor)
+            yield
+    finally:
+        if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+            # Drops this worker's gauges from the totals the other workers report
+            multiprocess.mark_process_dead(os.getpid())
 
 
 app = FastAPI(
     title=settings.SERVICE_TITLE,
     description=settings.SERVICE_DESCRIPTION,
     version=settings.SERVICE_VERSION,
+    lifespan=lifespan,
 )
 
+# Added first, so it runs inside the authentication middleware and sees the user's group
+if settings.ADMISSION_CONTROL_ENABLED:
+    app.add_middleware(AdmissionControlMiddleware)
 app.add_middleware(AuthenticationMiddleware)
 
 Instrumentator().instrument(app).expose(
@@ -71,13 +93,7 @@ app.include_router(agenda_router)
 configure_security_scheme(app, settings.ACCESS_TOKEN_COOKIE_NAME)
 
 if __name__ == "__main__":
-    config = uvicorn.Config(
-        app,
-        host=settings.HOST,
-        port=settings.PORT,
-        use_colors=True,
-        log_level=settings.LOG_LEVEL,
-    )
-
+    # A single process for local runs; production uses src.server, which can start several workers
+    config = uvicorn.Config(app, **server_options())
     server = uvicorn.Server(config)
     server.run()
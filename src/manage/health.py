@@ -0,0 +1,109 @@
+"""
+Health of a worker, behind the Kubernetes probes in src/manage/router.py.
+
+Liveness only needs the event loop to answer. Readiness also checks what requests depend on: a
+storage round trip, room left in the storage connection pool and an event loop that keeps up. A
+worker that fails any of them reports not ready, so the load balancer sends its traffic elsewhere
+until it recovers.
+"""
+import asyncio
+import contextlib
+import logging
+import time
+from collections import deque
+from typing import Optional
+
+from src.metrics import EVENT_LOOP_LAG
+from src.repositories.base import BaseAgendaRepository
+from src.settings import settings
+from src.utils.single_flight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+
+class LoopLagMonitor:
+    """
+    Measures how late the event loop wakes a task sleeping `interval` seconds. A busy loop delays
+    every request by about as much; `lag` is the worst of the last `window` samples.
+    """
+
+    def __init__(self, interval: float = 0.5, window: int = 10):
+        self.interval = interval
+        self._samples = deque(maxlen=window)
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def lag(self) -> float:
+        return max(self._samples, default=0.0)
+
+    def start(self):
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            await asyncio.sleep(self.interval)
+            self._samples.append(max(0.0, loop.time() - started - self.interval))
+            EVENT_LOOP_LAG.set(self.lag)
+
+
+class ReadinessCheck:
+    """
+    Runs the readiness checks at most once per HEALTH_CACHE_SECONDS; probes arriving in between get
+    the cached report, and probes arriving while a check runs share it, so probing never adds load.
+    """
+
+    def __init__(self, repository: BaseAgendaRepository, lag_monitor: LoopLagMonitor):
+        self.repository = repository
+        self.lag_monitor = lag_monitor
+        self._report: Optional[dict] = None
+        self._checked_at = 0.0
+        self._checks = SingleFlight()
+
+    async def check(self) -> dict:
+        if self._report is not None and time.monotonic() - self._checked_at < settings.HEALTH_CACHE_SECONDS:
+            return self._report
+        return await self._checks.do("ready", ("ready",), self._run_checks)
+
+    async def _run_checks(self) -> dict:
+        reasons = []
+
+        started = time.perf_counter()
+        try:
+            await asyncio.wait_for(self.repository.ping(), settings.HEALTH_STORAGE_TIMEOUT_SECONDS)
+            storage = {"status": "ok", "latency_ms": round((time.perf_counter() - started) * 1000, 1)}
+        except Exception as e:
+            storage = {"status": "error", "error": str(e) or type(e).__name__}
+            reasons.append("storage unreachable")
+
+        pool = None
+        usage = self.repository.pool_usage()
+        if usage is not None:
+            in_use, size = usage
+            pool = {"in_use": in_use, "size": size, "saturation": round(in_use / size, 2)}
+            if pool["saturation"] >= settings.HEALTH_MAX_POOL_SATURATION:
+                reasons.append("storage connection pool saturated")
+
+        lag = self.lag_monitor.lag
+        if lag > settings.HEALTH_MAX_LOOP_LAG_SECONDS:
+            reasons.append("event loop lagging")
+
+        report = {
+            "status": "not ready" if reasons else "ready",
+            "reasons": reasons,
+            "checks": {"storage": storage, "pool": pool, "event_loop": {"lag_ms": round(lag * 1000, 1)}},
+        }
+        if reasons and (self._report is None or not self._report["reasons"]):
+            logger.warning("Reporting not ready: %s", ", ".join(reasons))
+        elif not reasons and self._report is not None and self._report["reasons"]:
+            logger.info("Reporting ready again")
+        self._report, self._checked_at = report, time.monotonic()
+        return report
@@ -1,4 +1,5 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Request
+from starlette.responses import JSONResponse
 
 router = APIRouter(prefix="/manage", include_in_schema=False)
 
@@ -6,3 +7,15 @@ router = APIRouter(prefix="/manage", include_in_schema=False)
 @router.get("/health")
 def health() -> bool:
     return True
+
+
+@router.get("/live")
+async def live(request: Request) -> dict:
+    # Answering at all proves the event loop runs; dependencies are left to /manage/ready
+    return {"status": "alive", "event_loop_lag_ms": round(request.app.state.readiness.lag_monitor.lag * 1000, 1)}
+
+
+@router.get("/ready")
+async def ready(request: Request) -> JSONResponse:
+    report = await request.app.state.readiness.check()
+    return JSONResponse(report, status_code=200 if report["status"] == "ready" else 503)
@@ -0,0 +1,144 @@
+from prometheus_client import Counter, Gauge, Histogram
+
+# Registered on the default registry, so the Instrumentator's /metrics endpoint exposes them as well.
+# With several workers (see src/server.py) gauges report the sum over the running workers.
+
+AGENDA_CACHE_HITS = Counter(
+    "agenda_cache_hits_total",
+    "Agenda reads served from the per-group cache",
+    ["operation"]
+)
+AGENDA_CACHE_MISSES = Counter(
+    "agenda_cache_misses_total",
+    "Agenda reads that had to go to storage",
+    ["operation"]
+)
+AGENDA_CACHE_EVICTIONS = Counter(
+    "agenda_cache_evictions_total",
+    "Groups dropped from the agenda cache (size, invalidated) and views of a group that expired (expired)",
+    ["reason"]
+)
+AGENDA_CACHE_GROUPS = Gauge(
+    "agenda_cache_groups",
+    "Number of groups currently held in the agenda cache",
+    multiprocess_mode="livesum"
+)
+AGENDA_CACHE_ITEMS = Gauge(
+    "agenda_cache_items",
+    "Number of agenda items currently held in the agenda cache",
+    multiprocess_mode="livesum"
+)
+
+EVENT_LOOP_LAG = Gauge(
+    "event_loop_lag_seconds",
+    "Recent worst delay of the event loop in waking a sleeping task",
+    multiprocess_mode="livemax"
+)
+
+AUTH_TOKEN_CACHE_HITS = Counter(
+    "auth_token_cache_hits_total",
+    "Requests whose access token was found in the verified-token cache"
+)
+AUTH_TOKEN_CACHE_MISSES = Counter(
+    "auth_token_cache_misses_total",
+    "Requests whose access token had to be verified"
+)
+
+AGENDA_EVENT_SUBSCRIBERS = Gauge(
+    "agenda_event_subscribers",
+    "Open agenda event streams",
+    multiprocess_mode="livesum"
+)
+AGENDA_EVENTS_PUBLISHED = Counter(
+    "agenda_events_published_total",
+    "Agenda change events published",
+    ["type"]
+)
+AGENDA_EVENT_SUBSCRIBERS_DROPPED = Counter(
+    "agenda_event_subscribers_dropped_total",
+    "Agenda event streams closed because the client fell too far behind"
+)
+
+SINGLE_FLIGHT_CALLS = Counter(
+    "agenda_single_flight_calls_total",
+    "Storage reads started by the single-flight layer",
+    ["operation"]
+)
+SINGLE_FLIGHT_COLLAPSED = Counter(
+    "agenda_single_flight_collapsed_total",
+    "Reads that joined an identical storage read already in flight instead of starting one",
+    ["operation"]
+)
+
+STORAGE_CALL_FAILURES = Counter(
+    "agenda_storage_call_failures_total",
+    "Storage calls that timed out or failed with a server or connection error",
+    ["operation", "reason"]
+)
+STORAGE_RETRIES = Counter(
+    "agenda_storage_retries_total",
+    "Storage reads retried after a failure",
+    ["operation"]
+)
+STORAGE_CIRCUIT_STATE = Gauge(
+    "agenda_storage_circuit_state",
+    "Storage circuit breaker: 0 closed, 1 half-open (trial call), 2 open (failing fast)",
+    multiprocess_mode="livemax"
+)
+STORAGE_CIRCUIT_REJECTED = Counter(
+    "agenda_storage_circuit_rejected_total",
+    "Storage calls failed fast because the circuit was open",
+    ["operation"]
+)
+STORAGE_HEDGED_READS = Counter(
+    "agenda_storage_hedged_reads_total",
+    "Second point reads sent because the first was slow, and how many of them answered first",
+    ["outcome"]
+)
+AGENDA_STALE_READS = Counter(
+    "agenda_stale_reads_total",
+    "Reads answered from expired cache entries because the storage was unavailable",
+    ["operation"]
+)
+
+ADMISSION_IN_FLIGHT = Gauge(
+    "agenda_admission_in_flight",
+    "Requests holding an admission slot",
+    multiprocess_mode="livesum"
+)
+ADMISSION_QUEUE_DEPTH = Gauge(
+    "agenda_admission_queue_depth",
+    "Requests waiting for an admission slot",
+    multiprocess_mode="livesum"
+)
+ADMISSION_REJECTED = Counter(
+    "agenda_admission_rejected_total",
+    "Requests refused by admission control: 429 for group_rate and group_concurrency, 503 for queue_full and queue_timeout",
+    ["reason"]
+)
+
+# From 50µs (a token cache hit, decoding one entity) to 10s (a full scan of a large group)
+STAGE_BUCKETS = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+REQUEST_STAGE_SECONDS = Histogram(
+    "agenda_request_stage_seconds",
+    "Time spent in one stage of handling a request: auth, decode (entities to items) or serialize (items to JSON)",
+    ["stage", "operation"],
+    buckets=STAGE_BUCKETS
+)
+STORAGE_OPERATION_SECONDS = Histogram(
+    "agenda_storage_operation_seconds",
+    "Duration of calls to the storage engine (each attempt when retried); for query_items, the time spent fetching while iterating",
+    ["operation", "outcome"],
+    buckets=STAGE_BUCKETS
+)
+STORAGE_ENTITIES_SCANNED = Counter(
+    "agenda_storage_entities_scanned_total",
+    "Entities read from the storage, including those filtered out before they were returned",
+    ["operation"]
+)
+STORAGE_ENTITIES_RETURNED = Counter(
+    "agenda_storage_entities_returned_total",
+    "Entities (and tombstones) returned by the storage engine",
+    ["operation"]
+)
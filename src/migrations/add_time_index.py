@@ -0,0 +1,91 @@
+"""
+One-off backfill of the time index (see src/repositories/time_index.py) for agenda items written
+before the index existed, or whose index entity is missing or stale.
+
+    python -m src.migrations.add_time_index --dry-run
+    python -m src.migrations.add_time_index
+
+Each item is rewritten in a transaction with its index entity, conditional on the item's ETag, so
+items changed by the running service while the migration runs are skipped and can be picked up by
+running it again. Once it reports nothing left to migrate, set AZURE_TABLE_INDEX_READS_ENABLED=true.
+"""
+import argparse
+import asyncio
+import logging
+from collections import defaultdict
+
+from azure.core import MatchConditions
+from azure.data.tables import TableTransactionError, TransactionOperation, UpdateMode
+
+from src.repositories.agenda_repository import AgendaRepository
+from src.repositories.time_index import INDEX_PREFIX, INDEX_ROW_KEY_PROPERTY, build_index_entity
+
+logger = logging.getLogger(__name__)
+
+# Two operations per item, and a transaction holds at most 100
+ITEMS_PER_TRANSACTION = 50
+
+
+def _needs_migration(entity: dict) -> bool:
+    expected = dict(entity)
+    build_index_entity(expected)
+    return entity.get(INDEX_ROW_KEY_PROPERTY) != expected[INDEX_ROW_KEY_PROPERTY]
+
+
+async def migrate(repository: AgendaRepository, dry_run: bool) -> dict:
+    stats = {"scanned": 0, "migrated": 0, "skipped": 0}
+    pending = defaultdict(list)
+
+    entities = await repository.query_entities("RowKey lt @index", parameters={"index": INDEX_PREFIX})
+    async for entity in entities:
+        stats["scanned"] += 1
+        if _needs_migration(entity):
+            pending[entity["PartitionKey"]].append(entity)
+
+    for partition_key, items in pending.items():
+        for offset in range(0, len(items), ITEMS_PER_TRANSACTION):
+            chunk = items[offset:offset + ITEMS_PER_TRANSACTION]
+            if dry_run:
+                stats["migrated"] += len(chunk)
+                continue
+
+            operations = []
+            for existing in chunk:
+                entity = dict(existing)
+                index_entity = build_index_entity(entity)
+                operations.append((
+                    TransactionOperation.UPDATE,
+                    entity,
+                    {"mode": UpdateMode.REPLACE, "etag": existing.metadata["etag"], "match_condition": MatchConditions.IfNotModified}
+                ))
+                stale_index_key = existing.get(INDEX_ROW_KEY_PROPERTY)
+                if stale_index_key and stale_index_key != index_entity["RowKey"]:
+                    operations.append((TransactionOperation.DELETE, {"PartitionKey": partition_key, "RowKey": stale_index_key}))
+                operations.append((TransactionOperation.UPSERT, index_entity, {"mode": UpdateMode.REPLACE}))
+
+            try:
+                await repository.table_client.submit_transaction(operations)
+                stats["migrated"] += len(chunk)
+            except TableTransactionError as e:
+                # A concurrent write to one of the items fails the whole chunk; a rerun retries it
+                logger.warning("Skipped %s items in partition %s: %s", len(chunk), partition_key, e.message)
+                stats["skipped"] += len(chunk)
+
+    return stats
+
+
+async def main(dry_run: bool):
+    repository = AgendaRepository()
+    await repository.open()
+    try:
+        stats = await migrate(repository, dry_run)
+        logger.info("Time index migration finished%s: %s", " (dry run)" if dry_run else "", stats)
+    finally:
+        await repository.close()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dry-run", action="store_true", help="only count the items that need migrating")
+    asyncio.run(main(parser.parse_args().dry_run))
@@ -0,0 +1,33 @@
+"""
+Removes the tombstones deleted agenda items leave behind for delta sync (GET /agenda/items/changes)
+once they are older than AGENDA_TOMBSTONE_RETENTION_DAYS. Meant to run periodically, e.g. daily:
+
+    python -m src.migrations.purge_tombstones
+
+Sync tokens older than the retention are answered with 410 Gone regardless, so a late or skipped run
+only costs storage.
+"""
+import asyncio
+import logging
+from datetime import datetime, timedelta
+
+from src.repositories.factory import create_repository
+from src.settings import settings
+
+logger = logging.getLogger(__name__)
+
+
+async def main():
+    repository = create_repository()
+    await repository.open()
+    try:
+        before = datetime.utcnow() - timedelta(days=settings.AGENDA_TOMBSTONE_RETENTION_DAYS)
+        purged = await repository.purge_tombstones(before)
+        logger.info("Purged %s tombstones deleted before %s", purged, before.isoformat())
+    finally:
+        await repository.close()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    asyncio.run(main())
@@ -1,60 +1,417 @@
 import asyncio
+from datetime import datetime
+from typing import AsyncIterator, List, Optional, Tuple
 
-from azure.data.tables import TableServiceClient
+import aiohttp
+from azure.core import MatchConditions
+from azure.core.exceptions import ResourceExistsError, ResourceNotFoundError
+from azure.core.pipeline.transport import AioHttpTransport
+from azure.data.tables import TableEntity, TableErrorCode, TableTransactionError, TransactionOperation, UpdateMode
 from azure.data.tables.aio import TableClient
+from src.repositories.base import (
+    BatchOperationError,
+    EntityExistsError,
+    EntityModifiedError,
+    EntityNotFoundError,
+    entity_span,
+    tombstone,
+)
+from src.repositories.time_index import (
+    INDEX_PREFIX,
+    INDEX_ROW_KEY_PROPERTY,
+    ITEM_ID_PROPERTY,
+    build_index_entity,
+    index_entity_to_item,
+    range_filters,
+)
+from src.responses.agenda_response import TimeSlot
 from src.settings import settings
 from src.exceptions.exception_handler import logger
+from src.utils.instrumentation import record_discarded
+from src.utils.time_window_util import overlaps_window
+
+# Tombstones of deleted items share the partition; '~tomb~' sorts after the items and the time index
+TOMBSTONE_PREFIX = "~tomb~"
+TOMBSTONE_END = TOMBSTONE_PREFIX + "~"
+TOMBSTONE_QUERY = "RowKey gt @tomb_start and RowKey lt @tomb_end"
+TOMBSTONE_PARAMETERS = {"tomb_start": TOMBSTONE_PREFIX, "tomb_end": TOMBSTONE_END}
+
+# Read by readiness checks; no entity is ever stored under it
+PING_KEY = "~ping~"
 
 
 class AgendaRepository:
-    def __init__(self):
+    """
+    Application-scoped access to the agenda table in Azure Table Storage (`STORAGE_BACKEND=azure`).
+
+    A single instance is opened at startup and shared by every request, so all
+    calls reuse one aiohttp connection pool instead of opening new TCP/TLS
+    connections per request. Call `open()` before use and `close()` on shutdown.
+    """
+
+    # A transaction holds at most 100 operations and every item comes with up to 3 (item + index
+    # moves, or item + index + tombstone on delete)
+    MAX_BATCH_ITEMS = 33
+
+    def __init__(self, sdk_retries: bool = True):
         self.table_name = settings.AZURE_STORAGE_TABLE_NAME
-        self.table_service_client = TableServiceClient.from_connection_string(
-            settings.AZURE_STORAGE_CONNECTION_STRING
+        self.sdk_retries = sdk_retries
+        self.session: Optional[aiohttp.ClientSession] = None
+        self.table_client: Optional[TableClient] = None
+
+    async def open(self):
+        connector = aiohttp.TCPConnector(
+            limit=settings.AZURE_TABLE_POOL_SIZE,
+            limit_per_host=settings.AZURE_TABLE_POOL_SIZE_PER_HOST,
+            keepalive_timeout=settings.AZURE_TABLE_KEEPALIVE_SECONDS,
         )
+        self.session = aiohttp.ClientSession(connector=connector)
+        transport = AioHttpTransport(
+            session=self.session,
+            session_owner=False,
+            connection_timeout=settings.AZURE_TABLE_CONNECT_TIMEOUT,
+            read_timeout=settings.AZURE_TABLE_READ_TIMEOUT,
+        )
+        # Without SDK retries, only requests that could not be sent at all are retried
+        retries = {} if self.sdk_retries else dict(retry_read=0, retry_status=0)
         self.table_client = TableClient.from_connection_string(
             settings.AZURE_STORAGE_CONNECTION_STRING,
-            self.table_name
+            self.table_name,
+            transport=transport,
+            **retries
         )
-        asyncio.run(self.ensure_table_exists())
+        logger.info("Opened table client for %s", self.table_name)
+
+    async def close(self):
+        if self.table_client is not None:
+            await self.table_client.close()
+            self.table_client = None
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+        logger.info("Closed table client for %s", self.table_name)
 
     async def ensure_table_exists(self):
         try:
-            loop = asyncio.get_event_loop()
-            await loop.run_in_executor(None, self._create_table_if_not_exists)
-            logger.info(f"Table {self.table_name} ensured.")
+            await self.table_client.create_table()
+            logger.info("Table %s created.", self.table_name)
+        except ResourceExistsError:
+            logger.info("Table %s ensured.", self.table_name)
         except Exception as e:
-            logger.error(f"Error checking or creating table: {e}")
+            logger.error("Error checking or creating table: %s", e)
             raise
 
-    def _create_table_if_not_exists(self):
+    async def ping(self):
+        # A point read of a key that never exists: one small round trip, answered with 404
+        await self.get_entity(PING_KEY, PING_KEY)
+
+    def pool_usage(self) -> Optional[Tuple[int, int]]:
+        connector = self.session.connector if self.session is not None else None
+        if connector is None or not connector.limit:
+            return None
+        # aiohttp does not expose the number of connections handed out other than through `_acquired`
+        return len(getattr(connector, "_acquired", ())), connector.limit
+
+    async def query_entities(self, filter_query: str, parameters: Optional[dict] = None):
+        return self.table_client.query_entities(filter_query, parameters=parameters)
+
+    async def query_items(self, partition_key: str) -> AsyncIterator[dict]:
+        """All item entities of a partition, skipping the time index rows stored next to them."""
+        return self.table_client.query_entities(
+            "PartitionKey eq @pk and RowKey lt @index",
+            parameters={"pk": str(partition_key), "index": INDEX_PREFIX}
+        )
+
+    async def get_entity(self, partition_key: str, row_key: str) -> Optional[TableEntity]:
+        """Point read by PartitionKey/RowKey; the entity's ETag is available as `entity.metadata["etag"]`."""
         try:
-            self.table_service_client.create_table_if_not_exists(self.table_name)
-        except Exception as e:
-            logger.error(f"Error creating table: {e}")
-            raise
+            return await self.table_client.get_entity(
+                partition_key=str(partition_key),
+                row_key=str(row_key)
+            )
+        except ResourceNotFoundError:
+            return None
+
+    async def query_items_page(
+            self,
+            partition_key: str,
+            results_per_page: int,
+            continuation_token: Optional[dict] = None
+    ) -> Tuple[List[dict], Optional[dict]]:
+        """Fetches a single page of item entities using the service's native continuation token."""
+        return await self._query_page(
+            "PartitionKey eq @pk and RowKey lt @index",
+            {"pk": str(partition_key), "index": INDEX_PREFIX},
+            results_per_page,
+            continuation_token
+        )
+
+    async def query_range(
+            self,
+            partition_key: str,
+            start_date: Optional[datetime],
+            end_date: Optional[datetime]
+    ) -> List[dict]:
+        """
+        Item entities overlapping [start_date, end_date], read through the time index as RowKey range
+        scans. Until the index has been backfilled (see src.migrations.add_time_index) it falls back to
+        scanning the partition.
+        """
+        if not settings.AZURE_TABLE_INDEX_READS_ENABLED:
+            scanned, items = 0, []
+            async for entity in await self.query_items(partition_key):
+                scanned += 1
+                if _overlaps(entity, start_date, end_date):
+                    items.append(entity)
+            record_discarded("query_range", scanned - len(items))
+            return items
+
+        async def scan(query: str, parameters: dict) -> List[dict]:
+            entities = self.table_client.query_entities(query, parameters=parameters)
+            return [index_entity_to_item(entity) async for entity in entities]
+
+        segments = await asyncio.gather(
+            *(scan(query, parameters) for query, parameters in range_filters(str(partition_key), start_date, end_date))
+        )
+        scanned = sum(len(segment) for segment in segments)
+        items = [entity for segment in segments for entity in segment if _overlaps(entity, start_date, end_date)]
+        record_discarded("query_range", scanned - len(items))
+        return items
 
-    async def query_entities(self, filter_query: str):
-        return self.table_client.query_entities(filter_query)
+    async def query_range_page(
+            self,
+            partition_key: str,
+            start_date: Optional[datetime],
+            end_date: Optional[datetime],
+            results_per_page: int,
+            continuation_token: Optional[dict] = None
+    ) -> Tuple[List[dict], Optional[dict]]:
+        """
+        One page of `query_range`. The index is read as consecutive segments (short, then long items),
+        so the token records the segment next to the service's continuation token.
+        """
+        if not settings.AZURE_TABLE_INDEX_READS_ENABLED:
+            entities, next_token = await self.query_items_page(partition_key, results_per_page, continuation_token)
+            items = [entity for entity in entities if _overlaps(entity, start_date, end_date)]
+            record_discarded("query_range_page", len(entities) - len(items))
+            return items, next_token
+
+        filters = range_filters(str(partition_key), start_date, end_date)
+        segment = (continuation_token or {}).get("segment", 0)
+        if segment >= len(filters):
+            return [], None
+        query, parameters = filters[segment]
+        entities, next_token = await self._query_page(
+            query, parameters, results_per_page, (continuation_token or {}).get("next")
+        )
+
+        items = [index_entity_to_item(entity) for entity in entities]
+        items = [entity for entity in items if _overlaps(entity, start_date, end_date)]
+        record_discarded("query_range_page", len(entities) - len(items))
+        if next_token:
+            return items, {"segment": segment, "next": next_token}
+        if segment + 1 < len(filters):
+            return items, {"segment": segment + 1}
+        return items, None
+
+    async def _query_page(
+            self,
+            query: str,
+            parameters: dict,
+            results_per_page: int,
+            continuation_token: Optional[dict]
+    ) -> Tuple[List[dict], Optional[dict]]:
+        pages = self.table_client.query_entities(
+            query,
+            parameters=parameters,
+            results_per_page=results_per_page
+        ).by_page(continuation_token=continuation_token)
+        async for page in pages:
+            return [entity async for entity in page], pages.continuation_token
+        return [], None
+
+    async def query_changes(self, partition_key: str, since: datetime) -> Tuple[List[dict], List[dict]]:
+        """
+        Items updated and tombstones written after `since`. Table Storage applies both filters, so only
+        the changes cross the network, although it still scans the item and tombstone key ranges.
+        """
+        async def scan(query: str, parameters: dict) -> List[dict]:
+            return [entity async for entity in self.table_client.query_entities(query, parameters=parameters)]
+
+        since = since.isoformat()
+        items, tombstones = await asyncio.gather(
+            scan(
+                "PartitionKey eq @pk and RowKey lt @index and updated gt @since",
+                {"pk": str(partition_key), "index": INDEX_PREFIX, "since": since}
+            ),
+            scan(
+                f"PartitionKey eq @pk and {TOMBSTONE_QUERY} and deleted gt @since",
+                {"pk": str(partition_key), "since": since, **TOMBSTONE_PARAMETERS}
+            )
+        )
+        return items, [_from_tombstone_entity(entity) for entity in tombstones]
+
+    async def purge_tombstones(self, before: datetime) -> int:
+        """Deletes expired tombstones of all partitions, found with one table scan."""
+        expired = self.table_client.query_entities(
+            f"{TOMBSTONE_QUERY} and deleted lt @before",
+            parameters={"before": before.isoformat(), **TOMBSTONE_PARAMETERS}
+        )
+        pending: dict = {}
+        purged = 0
+        async for entity in expired:
+            partition = pending.setdefault(entity["PartitionKey"], [])
+            partition.append((TransactionOperation.DELETE, {"PartitionKey": entity["PartitionKey"], "RowKey": entity["RowKey"]}))
+            if len(partition) == 100:
+                await self.table_client.submit_transaction(pending.pop(entity["PartitionKey"]))
+                purged += 100
+        for operations in pending.values():
+            await self.table_client.submit_transaction(operations)
+            purged += len(operations)
+        return purged
 
     async def create_entity(self, entity: dict):
-        return await self.table_client.create_entity(entity=entity)
+        """Creates the item and its time index entity in one transaction."""
+        return await self._submit(_create_operations(entity))
 
-    async def update_entity(self, entity: dict):
+    async def update_entity(self, entity: dict, previous: Optional[TableEntity] = None):
+        """
+        Replaces an item and moves its time index entity. When `previous` (the entity as read before)
+        is given, the write only succeeds if the item is unchanged since that read, raising
+        `EntityModifiedError` otherwise (and `EntityNotFoundError` if it is gone).
+        """
         try:
-            await self.table_client.update_entity(mode='replace', entity=entity)
+            await self._submit(_update_operations(entity, previous))
         except Exception as e:
-            logger.error(f"Error updating entity: {e}")
+            logger.error("Error updating entity: %s", e)
             raise
 
-    async def delete_entity(self, partition_key: str, row_key: str):
+    async def delete_entity(self, partition_key: str, row_key: str) -> bool:
+        """
+        Deletes an item with the time index entity it points to; returns whether it existed. The delete
+        is conditional on the item as read, so an update moving the index entity in between is noticed;
+        it is read again and deleted once more.
+        """
         try:
-            logger.info(f"Attempting to delete entity with PartitionKey={partition_key}, RowKey={row_key}")
-            await self.table_client.delete_entity(
-                partition_key=str(partition_key),
-                row_key=str(row_key)
-            )
-            logger.info(f"Successfully deleted entity with PartitionKey={partition_key}, RowKey={row_key}")
+            logger.debug("Attempting to delete entity with PartitionKey=%s, RowKey=%s", partition_key, row_key)
+            for attempt in range(2):
+                existing = await self.get_entity(partition_key, row_key)
+                if existing is None:
+                    return False
+                try:
+                    await self._submit(_delete_operations(existing))
+                    break
+                except EntityModifiedError:
+                    if attempt:
+                        raise
+                except EntityNotFoundError:
+                    # Deleted concurrently
+                    return False
+            logger.debug("Successfully deleted entity with PartitionKey=%s, RowKey=%s", partition_key, row_key)
+            return True
         except Exception as e:
-            logger.error(f"Error deleting entity with PartitionKey={partition_key}, RowKey={row_key}: {e}")
+            logger.error("Error deleting entity with PartitionKey=%s, RowKey=%s: %s", partition_key, row_key, e)
             raise
+
+    async def create_entities(self, entities: List[dict]):
+        """
+        Creates up to MAX_BATCH_ITEMS items of one partition atomically. If the transaction is rejected
+        because of one item, raises `BatchOperationError` naming that item; nothing is written.
+        """
+        await self._submit_items([_create_operations(entity) for entity in entities])
+
+    async def update_entities(self, entities: List[dict], previous: List[TableEntity]):
+        """Replaces up to MAX_BATCH_ITEMS items of one partition atomically, each conditional on its previous ETag."""
+        await self._submit_items([_update_operations(entity, old) for entity, old in zip(entities, previous)])
+
+    async def delete_entities(self, existing: List[TableEntity]):
+        """Deletes up to MAX_BATCH_ITEMS previously read items of one partition atomically."""
+        await self._submit_items([_delete_operations(entity) for entity in existing])
+
+    async def _submit_items(self, item_operations: List[list]):
+        operations = [operation for item in item_operations for operation in item]
+        try:
+            await self.table_client.submit_transaction(operations)
+        except TableTransactionError as e:
+            error_type = _TRANSACTION_ERRORS.get(getattr(e.error_code, "value", e.error_code))
+            if error_type is None:
+                raise
+            # Map the index of the failing operation back to the item it belongs to
+            item_index, operation_count = 0, 0
+            for item_index, item in enumerate(item_operations):
+                operation_count += len(item)
+                if e.index < operation_count:
+                    break
+            raise BatchOperationError(item_index, error_type(e.message)) from e
+
+    async def _submit(self, operations: list):
+        try:
+            return await self.table_client.submit_transaction(operations)
+        except TableTransactionError as e:
+            # Surface the storage-neutral errors of src.repositories.base
+            error_type = _TRANSACTION_ERRORS.get(getattr(e.error_code, "value", e.error_code))
+            if error_type:
+                raise error_type(e.message) from e
+            raise
+
+
+_TRANSACTION_ERRORS = {
+    TableErrorCode.ENTITY_ALREADY_EXISTS.value: EntityExistsError,
+    TableErrorCode.RESOURCE_NOT_FOUND.value: EntityNotFoundError,
+    TableErrorCode.UPDATE_CONDITION_NOT_SATISFIED.value: EntityModifiedError,
+}
+
+
+def _create_operations(entity: dict) -> list:
+    entity = dict(entity)
+    index_entity = build_index_entity(entity)
+    return [
+        (TransactionOperation.CREATE, entity),
+        (TransactionOperation.UPSERT, index_entity, {"mode": UpdateMode.REPLACE}),
+    ]
+
+
+def _update_operations(entity: dict, previous: Optional[TableEntity]) -> list:
+    entity = dict(entity)
+    index_entity = build_index_entity(entity)
+
+    update_options = {"mode": UpdateMode.REPLACE}
+    etag = previous.metadata.get("etag") if previous is not None else None
+    if etag:
+        update_options.update(etag=etag, match_condition=MatchConditions.IfNotModified)
+    operations = [(TransactionOperation.UPDATE, entity, update_options)]
+
+    previous_index_key = previous.get(INDEX_ROW_KEY_PROPERTY) if previous is not None else None
+    if previous_index_key and previous_index_key != index_entity["RowKey"]:
+        operations.append((TransactionOperation.DELETE, {"PartitionKey": entity["PartitionKey"], "RowKey": previous_index_key}))
+    operations.append((TransactionOperation.UPSERT, index_entity, {"mode": UpdateMode.REPLACE}))
+    return operations
+
+
+def _delete_operations(existing: TableEntity) -> list:
+    # Conditional on the item as read: the index entity to delete with it is the one it pointed to then
+    delete_options = {}
+    etag = existing.metadata.get("etag") if getattr(existing, "metadata", None) else None
+    if etag:
+        delete_options.update(etag=etag, match_condition=MatchConditions.IfNotModified)
+    operations = [(TransactionOperation.DELETE, {"PartitionKey": existing["PartitionKey"], "RowKey": existing["RowKey"]}, delete_options)]
+    if existing.get(INDEX_ROW_KEY_PROPERTY):
+        operations.append((TransactionOperation.DELETE, {"PartitionKey": existing["PartitionKey"], "RowKey": existing[INDEX_ROW_KEY_PROPERTY]}))
+    operations.append((TransactionOperation.UPSERT, _tombstone_entity(existing), {"mode": UpdateMode.REPLACE}))
+    return operations
+
+
+def _tombstone_entity(existing: TableEntity) -> dict:
+    entity = tombstone(existing["PartitionKey"], existing["RowKey"])
+    entity[ITEM_ID_PROPERTY] = entity["RowKey"]
+    entity["RowKey"] = TOMBSTONE_PREFIX + entity["RowKey"]
+    return entity
+
+
+def _from_tombstone_entity(entity: dict) -> dict:
+    return {"PartitionKey": entity["PartitionKey"], "RowKey": entity[ITEM_ID_PROPERTY], "deleted": entity["deleted"]}
+
+
+def _overlaps(entity: dict, start_date: Optional[datetime], end_date: Optional[datetime]) -> bool:
+    start, end = entity_span(entity)
+    return overlaps_window(TimeSlot(start=start, end=end), start_date, end_date)
@@ -0,0 +1,155 @@
+"""
+Storage contract of the agenda service.
+
+Entities are plain dicts keyed like the table entities the service has always stored: `PartitionKey`
+(the group id), `RowKey` (the item id) and the item fields, with datetimes as ISO strings. Entities
+returned by reads also carry `metadata["etag"]`, which write methods take back as `previous` to make
+the write conditional on the entity being unchanged since that read.
+
+Continuation tokens are JSON-serializable dicts that only the engine that issued them understands.
+
+Recurring items (see src/utils/recurrence_util.py) also carry `seriesStart` and `seriesEnd`, bounds
+around all their occurrences. Date windows are matched against those instead of the time slot, which
+only holds the first occurrence; `entity_span` returns whichever applies.
+
+Deletes leave a tombstone behind: `{"PartitionKey", "RowKey", "deleted"}` with the item's keys and the
+(naive UTC, ISO) time of the delete, so `query_changes` can report deletions. Tombstones are kept
+until `purge_tombstones` removes them.
+"""
+from datetime import datetime
+from typing import AsyncIterator, List, Optional, Protocol, Tuple
+
+
+class EntityExistsError(Exception):
+    """An entity with the same PartitionKey/RowKey already exists."""
+
+
+class EntityNotFoundError(Exception):
+    """The entity to update or delete does not exist (anymore)."""
+
+
+class EntityModifiedError(Exception):
+    """The entity changed since it was read; its ETag no longer matches."""
+
+
+class BatchOperationError(Exception):
+    """A batch transaction was rejected because of the item at `item_index`; no item was written."""
+
+    def __init__(self, item_index: int, error: Exception):
+        super().__init__(str(error))
+        self.item_index = item_index
+        self.error = error
+
+
+class StorageUnavailableError(Exception):
+    """
+    The storage did not answer within the deadline, kept failing, or is not called at all while the
+    circuit breaker is open (see src/repositories/resilient_repository.py). A write that timed out may
+    still have been applied. `retry_after` is a hint in seconds for when to try again.
+    """
+
+    def __init__(self, message: str, retry_after: float = 1):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class Entity(dict):
+    """A stored entity together with its `metadata` (the `etag`), shaped like azure's `TableEntity`."""
+
+    def __init__(self, *args, metadata: Optional[dict] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.metadata = metadata or {}
+
+
+class BaseAgendaRepository(Protocol):
+    """
+    Operations the service needs from a storage engine. Engines are application-scoped: `open()` is
+    awaited once at startup, `close()` on shutdown. Writes raise `EntityExistsError`,
+    `EntityNotFoundError` or `EntityModifiedError`; batch writes wrap them in `BatchOperationError`.
+    """
+
+    # Largest number of items `create_entities`/`update_entities`/`delete_entities` accept at once
+    MAX_BATCH_ITEMS: int
+
+    async def open(self): ...
+
+    async def close(self): ...
+
+    async def ensure_table_exists(self): ...
+
+    async def ping(self):
+        """Cheapest possible round trip to the storage, for readiness checks; raises when it is unreachable."""
+
+    def pool_usage(self) -> Optional[Tuple[int, int]]:
+        """(connections in use, pool size) of the storage connection pool, or None without a bounded pool."""
+
+    async def query_items(self, partition_key: str) -> AsyncIterator[dict]:
+        """All items of a group (awaited, then iterated)."""
+
+    async def get_entity(self, partition_key: str, row_key: str) -> Optional[Entity]: ...
+
+    async def query_items_page(
+            self,
+            partition_key: str,
+            results_per_page: int,
+            continuation_token: Optional[dict] = None
+    ) -> Tuple[List[dict], Optional[dict]]: ...
+
+    async def query_range(
+            self,
+            partition_key: str,
+            start_date: Optional[datetime],
+            end_date: Optional[datetime]
+    ) -> List[dict]:
+        """Items of a group whose time slot overlaps [start_date, end_date]."""
+
+    async def query_range_page(
+            self,
+            partition_key: str,
+            start_date: Optional[datetime],
+            end_date: Optional[datetime],
+            results_per_page: int,
+            continuation_token: Optional[dict] = None
+    ) -> Tuple[List[dict], Optional[dict]]: ...
+
+    async def query_changes(self, partition_key: str, since: datetime) -> Tuple[List[dict], List[dict]]:
+        """Items of a group whose `updated` is after `since`, and tombstones of items deleted after it."""
+
+    async def purge_tombstones(self, before: datetime) -> int:
+        """Removes the tombstones of every group deleted before `before`; returns how many were removed."""
+
+    async def create_entity(self, entity: dict): ...
+
+    async def update_entity(self, entity: dict, previous: Optional[Entity] = None): ...
+
+    async def delete_entity(self, partition_key: str, row_key: str) -> bool:
+        """Deletes an item (leaving a tombstone); returns whether there was one to delete."""
+
+    async def create_entities(self, entities: List[dict]): ...
+
+    async def update_entities(self, entities: List[dict], previous: List[Entity]): ...
+
+    async def delete_entities(self, existing: List[Entity]):
+        """Deletes entities as read, all or none; each only while unchanged since (`EntityModifiedError`)."""
+
+
+def entity_span(entity: dict) -> Tuple[datetime, datetime]:
+    """The start and end date windows are matched against: the time slot, or a recurring item's series bounds."""
+    return (
+        _parse(entity.get("seriesStart") or entity["timeSlotStart"]),
+        _parse(entity.get("seriesEnd") or entity["timeSlotEnd"])
+    )
+
+
+def _parse(value) -> datetime:
+    return value if isinstance(value, datetime) else datetime.fromisoformat(value)
+
+
+def tombstone(partition_key: str, row_key: str) -> dict:
+    return {"PartitionKey": str(partition_key), "RowKey": str(row_key), "deleted": datetime.utcnow().isoformat()}
+
+
+async def iterate(entities: List[dict]) -> AsyncIterator[dict]:
+    """Serves already loaded entities through the async iterator `query_items` returns."""
+    for entity in entities:
+        yield entity
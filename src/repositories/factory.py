@@ -0,0 +1,34 @@
+from src.repositories.base import BaseAgendaRepository
+from src.repositories.instrumented_repository import InstrumentedAgendaRepository
+from src.repositories.resilient_repository import ResilientAgendaRepository
+from src.settings import settings
+
+
+def create_repository() -> BaseAgendaRepository:
+    """
+    Builds the (not yet opened) storage engine selected by STORAGE_BACKEND, with its calls timed and
+    behind the resilience layer when STORAGE_RESILIENCE_ENABLED.
+    """
+    repository = InstrumentedAgendaRepository(create_engine())
+    if settings.STORAGE_RESILIENCE_ENABLED:
+        return ResilientAgendaRepository(repository)
+    return repository
+
+
+def create_engine() -> BaseAgendaRepository:
+    """
+    Engines are imported here, so a process only loads the client libraries of the one it uses (the
+    Azure SDK and aiohttp take a good part of the startup time).
+    """
+    backend = settings.STORAGE_BACKEND.lower()
+    if backend == "azure":
+        from src.repositories.agenda_repository import AgendaRepository
+        # Behind the resilience layer, which retries reads within its deadline and never retries writes
+        return AgendaRepository(sdk_retries=not settings.STORAGE_RESILIENCE_ENABLED)
+    if backend == "memory":
+        from src.repositories.memory_repository import MemoryAgendaRepository
+        return MemoryAgendaRepository()
+    if backend == "sqlite":
+        from src.repositories.sqlite_repository import SqliteAgendaRepository
+        return SqliteAgendaRepository(settings.SQLITE_PATH)
+    raise ValueError(f"Unknown STORAGE_BACKEND '{settings.STORAGE_BACKEND}', expected azure, memory or sqlite")
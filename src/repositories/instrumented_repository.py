@@ -0,0 +1,143 @@
+import time
+from datetime import datetime
+from typing import AsyncIterator, Awaitable, Callable, List, Optional, Tuple, TypeVar
+
+from src.metrics import STORAGE_ENTITIES_RETURNED, STORAGE_ENTITIES_SCANNED, STORAGE_OPERATION_SECONDS
+from src.repositories.base import BaseAgendaRepository, Entity
+from src.utils.instrumentation import labelled, span
+
+T = TypeVar("T")
+
+
+class InstrumentedAgendaRepository:
+    """
+    Wraps the storage engine (below the resilience layer, so every attempt is measured) to time each
+    call by operation and outcome, and to count the entities queries return. Engines that filter after
+    reading add what they dropped with `record_discarded`, so scanned minus returned shows wasted reads.
+    """
+
+    def __init__(self, inner: BaseAgendaRepository):
+        self.inner = inner
+        self.MAX_BATCH_ITEMS = inner.MAX_BATCH_ITEMS
+
+    async def open(self):
+        await self.inner.open()
+
+    async def close(self):
+        await self.inner.close()
+
+    async def ensure_table_exists(self):
+        await self.inner.ensure_table_exists()
+
+    async def ping(self):
+        await self._timed("ping", self.inner.ping)
+
+    def pool_usage(self) -> Optional[Tuple[int, int]]:
+        return self.inner.pool_usage()
+
+    async def query_items(self, partition_key: str) -> AsyncIterator[dict]:
+        return self._iterate(await self.inner.query_items(partition_key))
+
+    async def get_entity(self, partition_key: str, row_key: str) -> Optional[Entity]:
+        entity = await self._timed("get_entity", lambda: self.inner.get_entity(partition_key, row_key))
+        _count("get_entity", 1 if entity is not None else 0)
+        return entity
+
+    async def query_items_page(
+            self,
+            partition_key: str,
+            results_per_page: int,
+            continuation_token: Optional[dict] = None
+    ) -> Tuple[List[dict], Optional[dict]]:
+        entities, next_token = await self._timed(
+            "query_items_page", lambda: self.inner.query_items_page(partition_key, results_per_page, continuation_token)
+        )
+        _count("query_items_page", len(entities))
+        return entities, next_token
+
+    async def query_range(
+            self,
+            partition_key: str,
+            start_date: Optional[datetime],
+            end_date: Optional[datetime]
+    ) -> List[dict]:
+        entities = await self._timed("query_range", lambda: self.inner.query_range(partition_key, start_date, end_date))
+        _count("query_range", len(entities))
+        return entities
+
+    async def query_range_page(
+            self,
+            partition_key: str,
+            start_date: Optional[datetime],
+            end_date: Optional[datetime],
+            results_per_page: int,
+            continuation_token: Optional[dict] = None
+    ) -> Tuple[List[dict], Optional[dict]]:
+        entities, next_token = await self._timed(
+            "query_range_page",
+            lambda: self.inner.query_range_page(partition_key, start_date, end_date, results_per_page, continuation_token)
+        )
+        _count("query_range_page", len(entities))
+        return entities, next_token
+
+    async def query_changes(self, partition_key: str, since: datetime) -> Tuple[List[dict], List[dict]]:
+        entities, tombstones = await self._timed("query_changes", lambda: self.inner.query_changes(partition_key, since))
+        _count("query_changes", len(entities) + len(tombstones))
+        return entities, tombstones
+
+    async def purge_tombstones(self, before: datetime) -> int:
+        return await self._timed("purge_tombstones", lambda: self.inner.purge_tombstones(before))
+
+    async def create_entity(self, entity: dict):
+        await self._timed("create_entity", lambda: self.inner.create_entity(entity))
+
+    async def update_entity(self, entity: dict, previous: Optional[Entity] = None):
+        await self._timed("update_entity", lambda: self.inner.update_entity(entity, previous))
+
+    async def delete_entity(self, partition_key: str, row_key: str) -> bool:
+        return await self._timed("delete_entity", lambda: self.inner.delete_entity(partition_key, row_key))
+
+    async def create_entities(self, entities: List[dict]):
+        await self._timed("create_entities", lambda: self.inner.create_entities(entities))
+
+    async def update_entities(self, entities: List[dict], previous: List[Entity]):
+        await self._timed("update_entities", lambda: self.inner.update_entities(entities, previous))
+
+    async def delete_entities(self, existing: List[Entity]):
+        await self._timed("delete_entities", lambda: self.inner.delete_entities(existing))
+
+    async def _timed(self, operation: str, function: Callable[[], Awaitable[T]]) -> T:
+        outcome = "error"
+        started = time.perf_counter()
+        try:
+            with span(f"storage {operation}", operation=operation):
+                result = await function()
+            outcome = "ok"
+            return result
+        finally:
+            labelled(STORAGE_OPERATION_SECONDS, operation, outcome).observe(time.perf_counter() - started)
+
+    async def _iterate(self, entities: AsyncIterator[dict]) -> AsyncIterator[dict]:
+        # Only the time spent fetching counts, not what the caller does between items
+        iterator = entities.__aiter__()
+        outcome, count, elapsed = "error", 0, 0.0
+        try:
+            while True:
+                started = time.perf_counter()
+                try:
+                    entity = await iterator.__anext__()
+                except StopAsyncIteration:
+                    outcome = "ok"
+                    return
+                finally:
+                    elapsed += time.perf_counter() - started
+                count += 1
+                yield entity
+        finally:
+            labelled(STORAGE_OPERATION_SECONDS, "query_items", outcome).observe(elapsed)
+            _count("query_items", count)
+
+
+def _count(operation: str, returned: int):
+    labelled(STORAGE_ENTITIES_RETURNED, operation).inc(returned)
+    labelled(STORAGE_ENTITIES_SCANNED, operation).inc(returned)
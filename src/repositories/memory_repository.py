@@ -0,0 +1,222 @@
+import itertools
+from bisect import bisect_right, insort
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+from src.exceptions.exception_handler import logger
+from src.repositories.base import (
+    BatchOperationError,
+    Entity,
+    EntityExistsError,
+    EntityModifiedError,
+    EntityNotFoundError,
+    entity_span,
+    iterate,
+    tombstone,
+)
+from src.utils.interval_index import IntervalIndex
+
+
+@dataclass
+class _Group:
+    entities: Dict[str, Entity] = field(default_factory=dict)
+    # RowKeys in order, for stable pages
+    row_keys: List[str] = field(default_factory=list)
+    index: IntervalIndex = field(default_factory=IntervalIndex)
+    # Tombstones of deleted items: RowKey -> time of the delete
+    tombstones: Dict[str, str] = field(default_factory=dict)
+
+
+class MemoryAgendaRepository:
+    """
+    Process-local storage (`STORAGE_BACKEND=memory`): nothing survives a restart and replicas do not
+    share data. Meant for tests, demos and benchmarking the API layer without storage latency.
+
+    Each group keeps its entities by RowKey plus an `IntervalIndex` over their time slots, so date
+    windows are answered without scanning the group. Every method runs without awaiting in between,
+    which makes each write (and each batch) atomic on the event loop.
+    """
+
+    MAX_BATCH_ITEMS = 100
+
+    def __init__(self):
+        self._groups: Dict[str, _Group] = {}
+        self._etags = itertools.count(1)
+
+    async def open(self):
+        logger.info("Using in-memory agenda storage")
+
+    async def close(self):
+        pass
+
+    async def ensure_table_exists(self):
+        pass
+
+    async def ping(self):
+        pass
+
+    def pool_usage(self) -> Optional[Tuple[int, int]]:
+        return None
+
+    async def query_items(self, partition_key: str) -> AsyncIterator[dict]:
+        group = self._groups.get(str(partition_key))
+        return iterate([self._copy(group.entities[row_key]) for row_key in group.row_keys] if group else [])
+
+    async def get_entity(self, partition_key: str, row_key: str) -> Optional[Entity]:
+        group = self._groups.get(str(partition_key))
+        entity = group.entities.get(str(row_key)) if group else None
+        return self._copy(entity) if entity else None
+
+    async def query_items_page(
+            self,
+            partition_key: str,
+            results_per_page: int,
+            continuation_token: Optional[dict] = None
+    ) -> Tuple[List[dict], Optional[dict]]:
+        group = self._groups.get(str(partition_key))
+        if group is None:
+            return [], None
+        offset = bisect_right(group.row_keys, continuation_token["after"]) if continuation_token else 0
+        row_keys = group.row_keys[offset:offset + results_per_page]
+        next_token = {"after": row_keys[-1]} if offset + results_per_page < len(group.row_keys) else None
+        return [self._copy(group.entities[row_key]) for row_key in row_keys], next_token
+
+    async def query_range(
+            self,
+            partition_key: str,
+            start_date: Optional[datetime],
+            end_date: Optional[datetime]
+    ) -> List[dict]:
+        group = self._groups.get(str(partition_key))
+        if group is None:
+            return []
+        return [self._copy(group.entities[row_key]) for row_key in group.index.overlapping(start_date, end_date)]
+
+    async def query_range_page(
+            self,
+            partition_key: str,
+            start_date: Optional[datetime],
+            end_date: Optional[datetime],
+            results_per_page: int,
+            continuation_token: Optional[dict] = None
+    ) -> Tuple[List[dict], Optional[dict]]:
+        group = self._groups.get(str(partition_key))
+        if group is None:
+            return [], None
+        # Ordered by (start, RowKey), so the last returned pair marks where the next page begins
+        intervals = group.index.intervals(start_date, end_date)
+        if continuation_token:
+            after = (datetime.fromisoformat(continuation_token["start"]), continuation_token["after"])
+            intervals = [interval for interval in intervals if (interval[1], interval[0]) > after]
+        page = intervals[:results_per_page]
+        next_token = None
+        if len(intervals) > results_per_page:
+            row_key, start, _ = page[-1]
+            next_token = {"start": start.isoformat(), "after": row_key}
+        return [self._copy(group.entities[row_key]) for row_key, _, _ in page], next_token
+
+    async def query_changes(self, partition_key: str, since: datetime) -> Tuple[List[dict], List[dict]]:
+        group = self._groups.get(str(partition_key))
+        if group is None:
+            return [], []
+        since = since.isoformat()
+        items = [self._copy(entity) for entity in group.entities.values() if entity["updated"] > since]
+        tombstones = [
+            {"PartitionKey": str(partition_key), "RowKey": row_key, "deleted": deleted}
+            for row_key, deleted in group.tombstones.items() if deleted > since
+        ]
+        return items, tombstones
+
+    async def purge_tombstones(self, before: datetime) -> int:
+        before = before.isoformat()
+        purged = 0
+        for partition_key, group in list(self._groups.items()):
+            expired = [row_key for row_key, deleted in group.tombstones.items() if deleted < before]
+            for row_key in expired:
+                del group.tombstones[row_key]
+            purged += len(expired)
+            if not group.entities and not group.tombstones:
+                del self._groups[partition_key]
+        return purged
+
+    async def create_entity(self, entity: dict):
+        self._check_create(entity)
+        self._put(entity)
+
+    async def update_entity(self, entity: dict, previous: Optional[Entity] = None):
+        self._check_update(entity, previous)
+        self._put(entity)
+
+    async def delete_entity(self, partition_key: str, row_key: str) -> bool:
+        return self._remove(str(partition_key), str(row_key))
+
+    async def create_entities(self, entities: List[dict]):
+        self._check_batch(self._check_create, [(entity,) for entity in entities])
+        for entity in entities:
+            self._put(entity)
+
+    async def update_entities(self, entities: List[dict], previous: List[Entity]):
+        self._check_batch(self._check_update, list(zip(entities, previous)))
+        for entity in entities:
+            self._put(entity)
+
+    async def delete_entities(self, existing: List[Entity]):
+        self._check_batch(self._check_delete, [(entity,) for entity in existing])
+        for entity in existing:
+            self._remove(entity["PartitionKey"], entity["RowKey"])
+
+    def _check_batch(self, check, arguments: list):
+        # Validate every item before writing any, like a storage transaction
+        for index, item_arguments in enumerate(arguments):
+            try:
+                check(*item_arguments)
+            except (EntityExistsError, EntityNotFoundError, EntityModifiedError) as e:
+                raise BatchOperationError(index, e) from e
+
+    def _check_create(self, entity: dict):
+        if self._stored(entity) is not None:
+            raise EntityExistsError(f"Entity {entity['RowKey']} already exists")
+
+    def _check_update(self, entity: dict, previous: Optional[Entity] = None):
+        stored = self._check_exists(entity)
+        etag = previous.metadata.get("etag") if previous is not None else None
+        if etag and stored.metadata["etag"] != etag:
+            raise EntityModifiedError(f"Entity {entity['RowKey']} was modified")
+
+    def _check_delete(self, existing: Entity):
+        # Only while unchanged since it was read, like an update
+        self._check_update(existing, existing)
+
+    def _check_exists(self, entity: dict) -> Entity:
+        stored = self._stored(entity)
+        if stored is None:
+            raise EntityNotFoundError(f"Entity {entity['RowKey']} does not exist")
+        return stored
+
+    def _stored(self, entity: dict) -> Optional[Entity]:
+        group = self._groups.get(str(entity["PartitionKey"]))
+        return group.entities.get(str(entity["RowKey"])) if group else None
+
+    def _put(self, entity: dict):
+        group = self._groups.setdefault(str(entity["PartitionKey"]), _Group())
+        row_key = str(entity["RowKey"])
+        if row_key not in group.entities:
+            insort(group.row_keys, row_key)
+        group.entities[row_key] = Entity(entity, metadata={"etag": str(next(self._etags))})
+        group.index.add(row_key, *entity_span(entity))
+
+    def _remove(self, partition_key: str, row_key: str) -> bool:
+        group = self._groups.get(partition_key)
+        if group is None or group.entities.pop(row_key, None) is None:
+            return False
+        del group.row_keys[bisect_right(group.row_keys, row_key) - 1]
+        group.index.remove(row_key)
+        # The group is kept for its tombstones until they are purged
+        group.tombstones[row_key] = tombstone(partition_key, row_key)["deleted"]
+        return True
+
+    @staticmethod
+    def _copy(entity: Entity) -> Entity:
+        # Callers may modify what they read; the stored entity must not change with it
+        return Entity(entity, metadata=dict(entity.metadata))
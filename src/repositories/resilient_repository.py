@@ -0,0 +1,358 @@
+"""
+Resilience layer around a storage engine (`STORAGE_RESILIENCE_ENABLED`), so a degraded storage costs
+requests a bounded amount of time instead of holding them until clients give up:
+
+- Every call gets a deadline (STORAGE_READ_TIMEOUT_SECONDS per read attempt, STORAGE_WRITE_TIMEOUT_SECONDS
+  per write). Iterating `query_items` gets the read deadline per step, which covers each page fetch.
+  The first page is fetched (and retried) before the iterator is returned; later pages are not
+  retried, as the items before them have already been handed out.
+- Reads are idempotent and retried after a timeout or a server/connection error, with full-jitter
+  exponential backoff, as long as the retry budget allows: each call adds STORAGE_RETRY_BUDGET_RATIO of
+  a retry, so during an outage retries add at most that share to the load. Writes are never retried.
+- A circuit breaker opens after STORAGE_CIRCUIT_FAILURES failures in a row. While open, calls raise
+  `StorageUnavailableError` at once (the service answers 503, or serves stale cache); after
+  STORAGE_CIRCUIT_OPEN_SECONDS one trial call is let through, and its outcome closes or reopens it.
+- Hedged point reads (STORAGE_HEDGED_READS_ENABLED): a `get_entity` still running after the recent p95
+  latency gets a second, identical read; the first answer wins and the other is cancelled.
+
+Only known transient errors count as failures: timeouts, transport errors, and responses with status
+5xx, 408 or 429. Everything else passes through untouched. The neutral errors of
+src/repositories/base.py are answers from the storage and count as successful calls; other errors
+leave the breaker alone (a KeyError from bad entity data is not fixed by retrying, nor a reason to
+fail every group, nor proof that the storage is back).
+"""
+import asyncio
+import random
+import sqlite3
+import time
+from collections import deque
+from datetime import datetime
+from typing import AsyncIterator, Awaitable, Callable, List, Optional, Tuple, TypeVar
+
+import aiohttp
+from azure.core.exceptions import HttpResponseError, ServiceRequestError, ServiceResponseError
+from src.exceptions.exception_handler import logger
+from src.metrics import (
+    STORAGE_CALL_FAILURES,
+    STORAGE_CIRCUIT_REJECTED,
+    STORAGE_CIRCUIT_STATE,
+    STORAGE_HEDGED_READS,
+    STORAGE_RETRIES,
+)
+from src.repositories.base import (
+    BaseAgendaRepository,
+    BatchOperationError,
+    Entity,
+    EntityExistsError,
+    EntityModifiedError,
+    EntityNotFoundError,
+    StorageUnavailableError,
+)
+from src.settings import settings
+
+T = TypeVar("T")
+
+# Outcomes that say something about the request, not about the health of the storage
+_REQUEST_ERRORS = (EntityExistsError, EntityNotFoundError, EntityModifiedError, BatchOperationError, StopAsyncIteration)
+
+
+# The request could not be sent or no complete response came back; sqlite3.OperationalError is the
+# SQLite engine's equivalent (a locked or unreadable database file)
+_TRANSIENT_ERRORS = (
+    TimeoutError,
+    ConnectionError,
+    ServiceRequestError,
+    ServiceResponseError,
+    aiohttp.ClientError,
+    sqlite3.OperationalError,
+)
+
+
+def is_storage_failure(error: Exception) -> bool:
+    if isinstance(error, _REQUEST_ERRORS):
+        return False
+    if isinstance(error, _TRANSIENT_ERRORS):
+        return True
+    if isinstance(error, HttpResponseError):
+        # 408 and 429 are the storage being slow or throttling
+        status = error.status_code
+        return status is not None and (status >= 500 or status in (408, 429))
+    return False
+
+
+class CircuitBreaker:
+    """Closed → open after `failure_threshold` failures in a row → half-open (one trial) after `open_seconds`."""
+
+    CLOSED, HALF_OPEN, OPEN = 0, 1, 2
+
+    def __init__(self, failure_threshold: int, open_seconds: float):
+        self.failure_threshold = failure_threshold
+        self.open_seconds = open_seconds
+        self.state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+
+    def retry_after(self) -> float:
+        return max(0.0, self._opened_at + self.open_seconds - time.monotonic())
+
+    def allow(self) -> bool:
+        if self.state == self.CLOSED:
+            return True
+        if self.state == self.OPEN and self.retry_after() == 0:
+            self._set(self.HALF_OPEN)
+            return True
+        return False
+
+    def succeeded(self):
+        self._failures = 0
+        if self.state != self.CLOSED:
+            logger.info("Storage circuit closed")
+            self._set(self.CLOSED)
+
+    def failed(self):
+        self._failures += 1
+        if self.state == self.HALF_OPEN or (self.state == self.CLOSED and self._failures >= self.failure_threshold):
+            logger.warning("Storage circuit opened after %s failed calls", self._failures)
+            self._opened_at = time.monotonic()
+            self._set(self.OPEN)
+
+    def abandoned(self):
+        # A trial call that was cancelled (or failed for reasons of its own) proves nothing; the next call after it becomes the trial
+        if self.state == self.HALF_OPEN:
+            self._set(self.OPEN)
+
+    def _set(self, state: int):
+        self.state = state
+        STORAGE_CIRCUIT_STATE.set(state)
+
+
+class RetryBudget:
+    """Every call deposits `ratio` of a retry (up to `max_tokens`); every retry spends one."""
+
+    def __init__(self, ratio: float, max_tokens: float = 10):
+        self.ratio = ratio
+        self.max_tokens = max_tokens
+        self._tokens = max_tokens
+
+    def deposit(self):
+        self._tokens = min(self.max_tokens, self._tokens + self.ratio)
+
+    def withdraw(self) -> bool:
+        if self._tokens < 1:
+            return False
+        self._tokens -= 1
+        return True
+
+
+class LatencyTracker:
+    """p95 of the last `window` successful point reads, recomputed every `refresh` samples."""
+
+    def __init__(self, window: int = 200, refresh: int = 20, min_samples: int = 20):
+        self.refresh = refresh
+        self.min_samples = min_samples
+        self._samples = deque(maxlen=window)
+        self._pending = 0
+        self.p95: Optional[float] = None
+
+    def record(self, seconds: float):
+        self._samples.append(seconds)
+        self._pending += 1
+        if self._pending >= self.refresh and len(self._samples) >= self.min_samples:
+            self._pending = 0
+            ordered = sorted(self._samples)
+            self.p95 = ordered[int(len(ordered) * 0.95) - 1]
+
+
+class ResilientAgendaRepository:
+    """Wraps `inner` (any `BaseAgendaRepository`) with deadlines, read retries, a circuit breaker and hedging."""
+
+    def __init__(self, inner: BaseAgendaRepository):
+        self.inner = inner
+        self.MAX_BATCH_ITEMS = inner.MAX_BATCH_ITEMS
+        self.breaker = CircuitBreaker(settings.STORAGE_CIRCUIT_FAILURES, settings.STORAGE_CIRCUIT_OPEN_SECONDS)
+        self.retry_budget = RetryBudget(settings.STORAGE_RETRY_BUDGET_RATIO)
+        self.point_reads = LatencyTracker()
+
+    async def open(self):
+        await self.inner.open()
+
+    async def close(self):
+        await self.inner.close()
+
+    async def ensure_table_exists(self):
+        await self.inner.ensure_table_exists()
+
+    async def ping(self):
+        # Not retried: readiness should see the storage as it is
+        await self._call("ping", self.inner.ping, settings.STORAGE_READ_TIMEOUT_SECONDS)
+
+    def pool_usage(self) -> Optional[Tuple[int, int]]:
+        return self.inner.pool_usage()
+
+    async def query_items(self, partition_key: str) -> AsyncIterator[dict]:
+        async def first_page() -> Tuple[AsyncIterator[dict], List[dict]]:
+            # Engines such as Azure only fetch the first page on the first step, so that step is retried too
+            iterator = (await self.inner.query_items(partition_key)).__aiter__()
+            try:
+                return iterator, [await iterator.__anext__()]
+            except StopAsyncIteration:
+                return iterator, []
+
+        iterator, first = await self._read("query_items", first_page)
+        return self._iterate("query_items", iterator, first)
+
+    async def get_entity(self, partition_key: str, row_key: str) -> Optional[Entity]:
+        return await self._read(
+            "get_entity", lambda: self.inner.get_entity(partition_key, row_key), hedged=settings.STORAGE_HEDGED_READS_ENABLED
+        )
+
+    async def query_items_page(
+            self,
+            partition_key: str,
+            results_per_page: int,
+            continuation_token: Optional[dict] = None
+    ) -> Tuple[List[dict], Optional[dict]]:
+        return await self._read(
+            "query_items_page", lambda: self.inner.query_items_page(partition_key, results_per_page, continuation_token)
+        )
+
+    async def query_range(
+            self,
+            partition_key: str,
+            start_date: Optional[datetime],
+            end_date: Optional[datetime]
+    ) -> List[dict]:
+        return await self._read("query_range", lambda: self.inner.query_range(partition_key, start_date, end_date))
+
+    async def query_range_page(
+            self,
+            partition_key: str,
+            start_date: Optional[datetime],
+            end_date: Optional[datetime],
+            results_per_page: int,
+            continuation_token: Optional[dict] = None
+    ) -> Tuple[List[dict], Optional[dict]]:
+        return await self._read(
+            "query_range_page",
+            lambda: self.inner.query_range_page(partition_key, start_date, end_date, results_per_page, continuation_token)
+        )
+
+    async def query_changes(self, partition_key: str, since: datetime) -> Tuple[List[dict], List[dict]]:
+        return await self._read("query_changes", lambda: self.inner.query_changes(partition_key, since))
+
+    async def purge_tombstones(self, before: datetime) -> int:
+        # A maintenance job scanning every partition; the per-call deadline does not fit it
+        return await self.inner.purge_tombstones(before)
+
+    async def create_entity(self, entity: dict):
+        await self._write("create_entity", lambda: self.inner.create_entity(entity))
+
+    async def update_entity(self, entity: dict, previous: Optional[Entity] = None):
+        await self._write("update_entity", lambda: self.inner.update_entity(entity, previous))
+
+    async def delete_entity(self, partition_key: str, row_key: str) -> bool:
+        return await self._write("delete_entity", lambda: self.inner.delete_entity(partition_key, row_key))
+
+    async def create_entities(self, entities: List[dict]):
+        await self._write("create_entities", lambda: self.inner.create_entities(entities))
+
+    async def update_entities(self, entities: List[dict], previous: List[Entity]):
+        await self._write("update_entities", lambda: self.inner.update_entities(entities, previous))
+
+    async def delete_entities(self, existing: List[Entity]):
+        await self._write("delete_entities", lambda: self.inner.delete_entities(existing))
+
+    async def _write(self, operation: str, function: Callable[[], Awaitable[T]]) -> T:
+        return await self._call(operation, function, settings.STORAGE_WRITE_TIMEOUT_SECONDS)
+
+    async def _read(self, operation: str, function: Callable[[], Awaitable[T]], hedged: bool = False) -> T:
+        self.retry_budget.deposit()
+        if hedged:
+            function = self._hedge(function)
+        attempt = 0
+        while True:
+            try:
+                return await self._call(operation, function, settings.STORAGE_READ_TIMEOUT_SECONDS)
+            except StorageUnavailableError as e:
+                # Retrying into an open circuit only adds latency
+                if attempt >= settings.STORAGE_READ_RETRIES or self.breaker.state == CircuitBreaker.OPEN \
+                        or not self.retry_budget.withdraw():
+                    raise
+                attempt += 1
+                STORAGE_RETRIES.labels(operation=operation).inc()
+                logger.info("Retrying storage %s (attempt %s) after: %s", operation, attempt + 1, e)
+                await asyncio.sleep(random.uniform(0, settings.STORAGE_RETRY_BACKOFF_SECONDS * 2 ** attempt))
+
+    async def _call(self, operation: str, function: Callable[[], Awaitable[T]], timeout: float) -> T:
+        """One storage call under the deadline and the circuit breaker; failures become `StorageUnavailableError`."""
+        if not self.breaker.allow():
+            STORAGE_CIRCUIT_REJECTED.labels(operation=operation).inc()
+            raise StorageUnavailableError("Storage circuit is open", retry_after=self.breaker.retry_after() or 1)
+        try:
+            async with asyncio.timeout(timeout):
+                result = await function()
+        except asyncio.CancelledError:
+            self.breaker.abandoned()
+            raise
+        except _REQUEST_ERRORS:
+            # The storage answered
+            self.breaker.succeeded()
+            raise
+        except Exception as e:
+            if not is_storage_failure(e):
+                # Says nothing about the storage; a trial call ending this way lets the next call be the trial
+                self.breaker.abandoned()
+                raise
+            self.breaker.failed()
+            reason = "timeout" if isinstance(e, TimeoutError) else "error"
+            STORAGE_CALL_FAILURES.labels(operation=operation, reason=reason).inc()
+            message = f"Storage {operation} timed out after {timeout}s" if reason == "timeout" else f"Storage {operation} failed: {e}"
+            raise StorageUnavailableError(message, retry_after=self.breaker.retry_after() or 1) from e
+        self.breaker.succeeded()
+        return result
+
+    async def _iterate(self, operation: str, iterator: AsyncIterator[dict], first: List[dict]) -> AsyncIterator[dict]:
+        if not first:
+            return
+        yield first[0]
+        while True:
+            try:
+                entity = await self._call(operation, iterator.__anext__, settings.STORAGE_READ_TIMEOUT_SECONDS)
+            except StopAsyncIteration:
+                return
+            yield entity
+
+    def _hedge(self, function: Callable[[], Awaitable[T]]) -> Callable[[], Awaitable[T]]:
+        async def timed():
+            started = time.perf_counter()
+            result = await function()
+            self.point_reads.record(time.perf_counter() - started)
+            return result
+
+        async def hedged():
+            if self.point_reads.p95 is None:
+                return await timed()
+            first = asyncio.ensure_future(timed())
+            second = None
+            try:
+                done, _ = await asyncio.wait({first}, timeout=max(self.point_reads.p95, settings.STORAGE_HEDGE_MIN_DELAY_SECONDS))
+                if done:
+                    return first.result()
+                STORAGE_HEDGED_READS.labels(outcome="sent").inc()
+                second = asyncio.ensure_future(timed())
+                pending = {first, second}
+                while pending:
+                    done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                    for task in done:
+                        if task.exception() is None:
+                            if task is second:
+                                STORAGE_HEDGED_READS.labels(outcome="won").inc()
+                            return task.result()
+                # Both failed; report the first read's error
+                return first.result()
+            finally:
+                for task in (first, second):
+                    if task is not None:
+                        task.cancel()
+
+        return hedged
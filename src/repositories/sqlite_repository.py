@@ -0,0 +1,309 @@
+import asyncio
+import json
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import AsyncIterator, Callable, List, Optional, Tuple
+
+from src.exceptions.exception_handler import logger
+from src.repositories.base import (
+    BatchOperationError,
+    Entity,
+    EntityExistsError,
+    EntityModifiedError,
+    EntityNotFoundError,
+    entity_span,
+    iterate,
+    tombstone,
+)
+from src.repositories.time_index import sortable_key
+from src.settings import settings
+
+
+class SqliteAgendaRepository:
+    """
+    Agenda storage in a local SQLite database (`STORAGE_BACKEND=sqlite`, file `SQLITE_PATH`), for
+    single-replica deployments and reproducible benchmarks.
+
+    Items are rows keyed by (group_id, item_id) holding the entity as JSON, next to sortable UTC
+    copies of its time slot; the index on (group_id, time_slot_start, time_slot_end) turns date
+    windows into index range scans, and the one on the entity's `updated` answers `query_changes`.
+    Tombstones live in a `<table>_tombstones` table. The blocking sqlite3 calls run on one dedicated thread that owns
+    the connection, which also serializes the writes, so every write or batch is one transaction.
+    """
+
+    MAX_BATCH_ITEMS = 100
+
+    def __init__(self, path: str):
+        self.path = path
+        self.table_name = settings.AZURE_STORAGE_TABLE_NAME
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._connection: Optional[sqlite3.Connection] = None
+
+    async def open(self):
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sqlite")
+        await self._run(self._connect)
+        logger.info("Opened SQLite database %s", self.path)
+
+    async def close(self):
+        if self._executor is None:
+            return
+        await self._run(self._connection.close)
+        self._executor.shutdown()
+        self._executor = None
+        self._connection = None
+        logger.info("Closed SQLite database %s", self.path)
+
+    async def ensure_table_exists(self):
+        def create(connection: sqlite3.Connection):
+            with connection:
+                connection.execute(f"""
+                    CREATE TABLE IF NOT EXISTS {self.table_name} (
+                        group_id TEXT NOT NULL,
+                        item_id TEXT NOT NULL,
+                        time_slot_start TEXT NOT NULL,
+                        time_slot_end TEXT NOT NULL,
+                        etag INTEGER NOT NULL,
+                        data TEXT NOT NULL,
+                        PRIMARY KEY (group_id, item_id)
+                    ) WITHOUT ROWID
+                """)
+                connection.execute(
+                    f"CREATE INDEX IF NOT EXISTS ix_{self.table_name}_time_slot "
+                    f"ON {self.table_name} (group_id, time_slot_start, time_slot_end)"
+                )
+                # An index on the expression, so existing databases need no new column
+                connection.execute(
+                    f"CREATE INDEX IF NOT EXISTS ix_{self.table_name}_updated "
+                    f"ON {self.table_name} (group_id, json_extract(data, '$.updated'))"
+                )
+                connection.execute(f"""
+                    CREATE TABLE IF NOT EXISTS {self.table_name}_tombstones (
+                        group_id TEXT NOT NULL,
+                        item_id TEXT NOT NULL,
+                        deleted TEXT NOT NULL,
+                        PRIMARY KEY (group_id, item_id)
+                    ) WITHOUT ROWID
+                """)
+                connection.execute(
+                    f"CREATE INDEX IF NOT EXISTS ix_{self.table_name}_tombstones_deleted "
+                    f"ON {self.table_name}_tombstones (group_id, deleted)"
+                )
+        await self._run(create, self._connection)
+        logger.info("Table %s ensured.", self.table_name)
+
+    async def ping(self):
+        await self._run(lambda: self._connection.execute("SELECT 1").fetchone())
+
+    def pool_usage(self) -> Optional[Tuple[int, int]]:
+        # One connection on one thread; callers queue on the executor instead of a pool
+        return None
+
+    async def query_items(self, partition_key: str) -> AsyncIterator[dict]:
+        rows = await self._select("group_id = ? ORDER BY item_id", (str(partition_key),))
+        return iterate([_to_entity(row) for row in rows])
+
+    async def get_entity(self, partition_key: str, row_key: str) -> Optional[Entity]:
+        rows = await self._select("group_id = ? AND item_id = ?", (str(partition_key), str(row_key)))
+        return _to_entity(rows[0]) if rows else None
+
+    async def query_items_page(
+            self,
+            partition_key: str,
+            results_per_page: int,
+            continuation_token: Optional[dict] = None
+    ) -> Tuple[List[dict], Optional[dict]]:
+        condition, parameters = "group_id = ?", [str(partition_key)]
+        if continuation_token:
+            condition += " AND item_id > ?"
+            parameters.append(continuation_token["after"])
+        rows = await self._select(f"{condition} ORDER BY item_id LIMIT ?", (*parameters, results_per_page + 1))
+
+        page = [_to_entity(row) for row in rows[:results_per_page]]
+        next_token = {"after": page[-1]["RowKey"]} if len(rows) > results_per_page else None
+        return page, next_token
+
+    async def query_range(
+            self,
+            partition_key: str,
+            start_date: Optional[datetime],
+            end_date: Optional[datetime]
+    ) -> List[dict]:
+        condition, parameters = _range_condition(str(partition_key), start_date, end_date)
+        rows = await self._select(f"{condition} ORDER BY time_slot_start, item_id", parameters)
+        return [_to_entity(row) for row in rows]
+
+    async def query_range_page(
+            self,
+            partition_key: str,
+            start_date: Optional[datetime],
+            end_date: Optional[datetime],
+            results_per_page: int,
+            continuation_token: Optional[dict] = None
+    ) -> Tuple[List[dict], Optional[dict]]:
+        condition, parameters = _range_condition(str(partition_key), start_date, end_date)
+        if continuation_token:
+            condition += " AND (time_slot_start, item_id) > (?, ?)"
+            parameters += (continuation_token["start"], continuation_token["after"])
+        rows = await self._select(
+            f"{condition} ORDER BY time_slot_start, item_id LIMIT ?", (*parameters, results_per_page + 1)
+        )
+
+        page = rows[:results_per_page]
+        next_token = None
+        if len(rows) > results_per_page:
+            next_token = {"start": page[-1][2], "after": page[-1][1]}
+        return [_to_entity(row) for row in page], next_token
+
+    async def query_changes(self, partition_key: str, since: datetime) -> Tuple[List[dict], List[dict]]:
+        def select(connection: sqlite3.Connection) -> Tuple[list, list]:
+            parameters = (str(partition_key), since.isoformat())
+            items = connection.execute(
+                f"SELECT data, item_id, time_slot_start, etag FROM {self.table_name} "
+                f"WHERE group_id = ? AND json_extract(data, '$.updated') > ?",
+                parameters
+            ).fetchall()
+            tombstones = connection.execute(
+                f"SELECT group_id, item_id, deleted FROM {self.table_name}_tombstones WHERE group_id = ? AND deleted > ?",
+                parameters
+            ).fetchall()
+            return items, tombstones
+
+        rows, tombstones = await self._run(select, self._connection)
+        return [_to_entity(row) for row in rows], [
+            {"PartitionKey": group_id, "RowKey": item_id, "deleted": deleted} for group_id, item_id, deleted in tombstones
+        ]
+
+    async def purge_tombstones(self, before: datetime) -> int:
+        def purge(connection: sqlite3.Connection) -> int:
+            with connection:
+                return connection.execute(
+                    f"DELETE FROM {self.table_name}_tombstones WHERE deleted < ?", (before.isoformat(),)
+                ).rowcount
+        return await self._run(purge, self._connection)
+
+    async def create_entity(self, entity: dict):
+        await self._write([(self._insert, entity)])
+
+    async def update_entity(self, entity: dict, previous: Optional[Entity] = None):
+        await self._write([(self._replace, entity, previous)])
+
+    async def delete_entity(self, partition_key: str, row_key: str) -> bool:
+        def delete(connection: sqlite3.Connection) -> bool:
+            with connection:
+                try:
+                    self._delete(connection, {"PartitionKey": partition_key, "RowKey": row_key})
+                    return True
+                except EntityNotFoundError:
+                    return False
+        return await self._run(delete, self._connection)
+
+    async def create_entities(self, entities: List[dict]):
+        await self._write([(self._insert, entity) for entity in entities], batch=True)
+
+    async def update_entities(self, entities: List[dict], previous: List[Entity]):
+        await self._write([(self._replace, entity, old) for entity, old in zip(entities, previous)], batch=True)
+
+    async def delete_entities(self, existing: List[Entity]):
+        await self._write([(self._delete, entity) for entity in existing], batch=True)
+
+    async def _write(self, operations: List[tuple], batch: bool = False):
+        def write(connection: sqlite3.Connection):
+            with connection:
+                for index, (operation, *arguments) in enumerate(operations):
+                    try:
+                        operation(connection, *arguments)
+                    except (EntityExistsError, EntityNotFoundError, EntityModifiedError) as e:
+                        # Leaving the `with` block rolls back what the earlier items wrote
+                        if batch:
+                            raise BatchOperationError(index, e) from e
+                        raise
+        await self._run(write, self._connection)
+
+    def _insert(self, connection: sqlite3.Connection, entity: dict):
+        try:
+            connection.execute(
+                f"INSERT INTO {self.table_name} "
+                f"(group_id, item_id, time_slot_start, time_slot_end, etag, data) VALUES (?, ?, ?, ?, 1, ?)",
+                (str(entity["PartitionKey"]), str(entity["RowKey"]), *_slot_keys(entity), json.dumps(entity))
+            )
+        except sqlite3.IntegrityError as e:
+            raise EntityExistsError(f"Entity {entity['RowKey']} already exists") from e
+
+    def _replace(self, connection: sqlite3.Connection, entity: dict, previous: Optional[Entity]):
+        keys = (str(entity["PartitionKey"]), str(entity["RowKey"]))
+        condition = "group_id = ? AND item_id = ?"
+        etag = previous.metadata.get("etag") if previous is not None else None
+        if etag:
+            condition += " AND etag = ?"
+            keys += (int(etag),)
+        cursor = connection.execute(
+            f"UPDATE {self.table_name} SET time_slot_start = ?, time_slot_end = ?, etag = etag + 1, data = ? "
+            f"WHERE {condition}",
+            (*_slot_keys(entity), json.dumps(entity), *keys)
+        )
+        if cursor.rowcount == 0:
+            self._raise_missing_or_modified(connection, entity)
+
+    def _delete(self, connection: sqlite3.Connection, entity: dict):
+        keys = (str(entity["PartitionKey"]), str(entity["RowKey"]))
+        condition = "group_id = ? AND item_id = ?"
+        # An entity as read is only deleted while unchanged, like a replace
+        etag = entity.metadata.get("etag") if isinstance(entity, Entity) else None
+        if etag:
+            condition += " AND etag = ?"
+            keys += (int(etag),)
+        cursor = connection.execute(f"DELETE FROM {self.table_name} WHERE {condition}", keys)
+        if cursor.rowcount == 0:
+            self._raise_missing_or_modified(connection, entity)
+        deleted = tombstone(entity["PartitionKey"], entity["RowKey"])
+        connection.execute(
+            f"INSERT OR REPLACE INTO {self.table_name}_tombstones (group_id, item_id, deleted) VALUES (?, ?, ?)",
+            (deleted["PartitionKey"], deleted["RowKey"], deleted["deleted"])
+        )
+
+    def _raise_missing_or_modified(self, connection: sqlite3.Connection, entity: dict):
+        exists = connection.execute(
+            f"SELECT 1 FROM {self.table_name} WHERE group_id = ? AND item_id = ?",
+            (str(entity["PartitionKey"]), str(entity["RowKey"]))
+        ).fetchone()
+        if exists:
+            raise EntityModifiedError(f"Entity {entity['RowKey']} was modified")
+        raise EntityNotFoundError(f"Entity {entity['RowKey']} does not exist")
+
+    async def _select(self, condition: str, parameters: tuple) -> List[tuple]:
+        query = f"SELECT data, item_id, time_slot_start, etag FROM {self.table_name} WHERE {condition}"
+        return await self._run(lambda: self._connection.execute(query, parameters).fetchall())
+
+    def _connect(self):
+        self._connection = sqlite3.connect(self.path, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+
+    async def _run(self, function: Callable, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, function, *args)
+
+
+def _range_condition(
+        partition_key: str,
+        start_date: Optional[datetime],
+        end_date: Optional[datetime]
+) -> Tuple[str, tuple]:
+    condition, parameters = "group_id = ?", (partition_key,)
+    if end_date:
+        condition += " AND time_slot_start <= ?"
+        parameters += (sortable_key(end_date),)
+    if start_date:
+        condition += " AND time_slot_end >= ?"
+        parameters += (sortable_key(start_date),)
+    return condition, parameters
+
+
+def _slot_keys(entity: dict) -> Tuple[str, str]:
+    start, end = entity_span(entity)
+    return sortable_key(start), sortable_key(end)
+
+
+def _to_entity(row: tuple) -> Entity:
+    data, _, _, etag = row
+    return Entity(json.loads(data), metadata={"etag": str(etag)})
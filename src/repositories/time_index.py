@@ -0,0 +1,89 @@
+"""
+Time-ordered secondary index stored next to the agenda items in the same partition.
+
+Item entities keep their uuid RowKey (which is the public item id). For every item an index entity
+is written whose RowKey starts with a sortable UTC timestamp of the item's start:
+
+    ~idx~s~20240117T100000000000Z~<item id>    items spanning at most INDEX_MAX_SHORT_SPAN
+    ~idx~l~20240101T000000000000Z~<item id>    longer items
+
+The index entity carries a full copy of the item, so a date window becomes one or two RowKey range
+scans returning the items directly. Because a short item cannot end more than INDEX_MAX_SHORT_SPAN
+after it starts, items overlapping [start, end] are found between `start - INDEX_MAX_SHORT_SPAN` and
+`end` in the short range; the (rare) long items are found by scanning the long range up to `end`.
+'~' sorts after every character of a uuid, so item entities are exactly the rows below INDEX_PREFIX.
+"""
+from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
+
+from src.repositories.base import entity_span
+from src.settings import settings
+from src.utils.time_window_util import as_utc
+
+INDEX_PREFIX = "~idx~"
+SHORT_PREFIX = INDEX_PREFIX + "s~"
+LONG_PREFIX = INDEX_PREFIX + "l~"
+
+INDEX_ROW_KEY_PROPERTY = "indexRowKey"
+ITEM_ID_PROPERTY = "itemId"
+START_KEY_PROPERTY = "startKey"
+END_KEY_PROPERTY = "endKey"
+
+INDEX_MAX_SHORT_SPAN = timedelta(hours=settings.AZURE_TABLE_INDEX_MAX_SHORT_SPAN_HOURS)
+
+
+def sortable_key(value: datetime) -> str:
+    # Fixed width, so lexicographic order equals chronological order
+    return as_utc(value).strftime("%Y%m%dT%H%M%S%fZ")
+
+
+def index_row_key(item_id: str, start: datetime, end: datetime) -> str:
+    prefix = SHORT_PREFIX if as_utc(end) - as_utc(start) <= INDEX_MAX_SHORT_SPAN else LONG_PREFIX
+    return f"{prefix}{sortable_key(start)}~{item_id}"
+
+
+def is_item_row(row_key: str) -> bool:
+    return row_key < INDEX_PREFIX
+
+
+def build_index_entity(entity: dict) -> dict:
+    """Derives the index entity of an item entity; sets the item's `indexRowKey` as a side effect."""
+    start, end = entity_span(entity)
+    row_key = index_row_key(entity["RowKey"], start, end)
+    entity[INDEX_ROW_KEY_PROPERTY] = row_key
+
+    index_entity = {key: value for key, value in entity.items() if key != INDEX_ROW_KEY_PROPERTY}
+    index_entity["RowKey"] = row_key
+    index_entity[ITEM_ID_PROPERTY] = entity["RowKey"]
+    index_entity[START_KEY_PROPERTY] = sortable_key(start)
+    index_entity[END_KEY_PROPERTY] = sortable_key(end)
+    return index_entity
+
+
+def index_entity_to_item(index_entity: dict) -> dict:
+    item = {
+        key: value for key, value in index_entity.items()
+        if key not in (ITEM_ID_PROPERTY, START_KEY_PROPERTY, END_KEY_PROPERTY)
+    }
+    item["RowKey"] = index_entity[ITEM_ID_PROPERTY]
+    return item
+
+
+def range_filters(
+        partition_key: str,
+        start_date: Optional[datetime],
+        end_date: Optional[datetime]
+) -> List[Tuple[str, dict]]:
+    """OData filters (with parameters) of the range scans covering items that overlap the window."""
+    upper = sortable_key(end_date) + "~~" if end_date else "~"
+    short_lower = SHORT_PREFIX + sortable_key(as_utc(start_date) - INDEX_MAX_SHORT_SPAN) if start_date else SHORT_PREFIX
+
+    filters = []
+    for lower, prefix in ((short_lower, SHORT_PREFIX), (LONG_PREFIX, LONG_PREFIX)):
+        query = "PartitionKey eq @pk and RowKey ge @lower and RowKey lt @upper"
+        parameters = {"pk": partition_key, "lower": lower, "upper": prefix + upper}
+        if start_date:
+            query += f" and {END_KEY_PROPERTY} ge @endKey"
+            parameters["endKey"] = sortable_key(start_date)
+        filters.append((query, parameters))
+    return filters
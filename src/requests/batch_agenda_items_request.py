@@ -0,0 +1,43 @@
+from collections import Counter
+from typing import List
+from pydantic import BaseModel, Field, field_validator
+
+from src.constants.validation_contraints import MAX_BATCH_ITEMS, MIN_LENGTH
+from src.requests.create_agenda_item_request import CreateAgendaItemRequest
+from src.requests.update_agenda_item_request import UpdateAgendaItemRequest
+
+class BatchCreateAgendaItemsRequest(BaseModel):
+    items: List[CreateAgendaItemRequest] = Field(..., min_length=MIN_LENGTH, max_length=MAX_BATCH_ITEMS)
+
+class BatchUpdateAgendaItem(UpdateAgendaItemRequest):
+    id: str = Field(..., min_length=MIN_LENGTH)
+
+class BatchUpdateAgendaItemsRequest(BaseModel):
+    items: List[BatchUpdateAgendaItem] = Field(
+        ..., min_length=MIN_LENGTH, max_length=MAX_BATCH_ITEMS, description="The items to update, each id at most once"
+    )
+
+    @field_validator("items")
+    @classmethod
+    def unique_ids(cls, items: List[BatchUpdateAgendaItem]) -> List[BatchUpdateAgendaItem]:
+        _check_unique([item.id for item in items])
+        return items
+
+class BatchDeleteAgendaItemsRequest(BaseModel):
+    ids: List[str] = Field(
+        ..., min_length=MIN_LENGTH, max_length=MAX_BATCH_ITEMS, description="The ids of the items to delete, each at most once"
+    )
+
+    @field_validator("ids")
+    @classmethod
+    def unique_ids(cls, ids: List[str]) -> List[str]:
+        _check_unique(ids)
+        return ids
+
+
+def _check_unique(ids: List[str]):
+    # Two writes of one item in a batch would both be based on the same read (and one storage
+    # transaction cannot touch an entity twice), so every id may appear once
+    duplicates = [item_id for item_id, count in Counter(ids).items() if count > 1]
+    if duplicates:
+        raise ValueError(f"Duplicate ids in batch: {', '.join(duplicates)}")
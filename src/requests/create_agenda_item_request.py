@@ -4,6 +4,7 @@ from typing import Optional
 
 from src.constants.validation_contraints import MIN_LENGTH, MAX_LENGTH_LOCATION, MAX_LENGTH_DESCRIPTION, MAX_LENGTH_SUMMARY
 from src.enums.item_type import ItemType
+from src.requests.recurrence_request import RecurrenceRequest
 
 class TimeSlotRequest(BaseModel):
     startTime: datetime
@@ -14,4 +15,5 @@ class CreateAgendaItemRequest(BaseModel):
     description: Optional[str] = Field(None, min_length=MIN_LENGTH, max_length=MAX_LENGTH_DESCRIPTION)
     location: Optional[str] = Field(None, min_length=MIN_LENGTH, max_length=MAX_LENGTH_LOCATION)
     itemType: ItemType
-    timeSlot: TimeSlotRequest
\ No newline at end of file
+    timeSlot: TimeSlotRequest
+    recurrence: Optional[RecurrenceRequest] = None
\ No newline at end of file
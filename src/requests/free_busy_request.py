@@ -0,0 +1,16 @@
+from datetime import datetime
+from pydantic import BaseModel, Field
+
+class FreeBusyQueryParams(BaseModel):
+    start_date: datetime = Field(
+        ...,
+        alias="startDate",
+        description="Start of the period to report on (format: YYYY-MM-DDTHH:MM:SSZ)",
+        examples=["2024-01-17T00:00:00Z"]
+    )
+    end_date: datetime = Field(
+        ...,
+        alias="endDate",
+        description="End of the period to report on (format: YYYY-MM-DDTHH:MM:SSZ)",
+        examples=["2024-01-24T00:00:00Z"]
+    )
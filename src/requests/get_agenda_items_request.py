@@ -14,4 +14,19 @@ class AgendaQueryParams(BaseModel):
         alias="endDate",
         description="End date for filtering agenda items (format: YYYY-MM-DD)",
         examples=["2024-12-31"]
+    )
+    limit: Optional[int] = Field(
+        None,
+        ge=1,
+        le=1000,
+        description="Maximum number of agenda items to return; enables pagination"
+    )
+    continuation_token: Optional[str] = Field(
+        None,
+        alias="continuationToken",
+        description="Opaque token from the X-Continuation-Token header of the previous page"
+    )
+    stream: bool = Field(
+        False,
+        description="Stream the JSON array while it is read from storage instead of buffering it"
     )
\ No newline at end of file
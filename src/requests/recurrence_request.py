@@ -0,0 +1,44 @@
+from datetime import datetime
+from typing import List, Optional
+
+from pydantic import BaseModel, Field, model_validator
+
+from src.constants.validation_contraints import (
+    MAX_RECURRENCE_COUNT,
+    MAX_RECURRENCE_EXCEPTIONS,
+    MAX_RECURRENCE_INTERVAL,
+    MAX_RECURRENCE_LENGTH,
+    MIN_LENGTH,
+)
+from src.enums.recurrence import RecurrenceFrequency, Weekday
+from src.responses.agenda_response import Recurrence
+from src.utils.recurrence_util import stored_length
+
+class RecurrenceRequest(BaseModel):
+    frequency: RecurrenceFrequency
+    interval: int = Field(1, ge=1, le=MAX_RECURRENCE_INTERVAL, description="Repeat every `interval` days, weeks or months")
+    byDay: Optional[List[Weekday]] = Field(
+        None,
+        min_length=MIN_LENGTH,
+        max_length=len(Weekday),
+        description="Weekdays of a weekly series; must include the weekday of the time slot start"
+    )
+    count: Optional[int] = Field(None, ge=1, le=MAX_RECURRENCE_COUNT, description="Number of occurrences")
+    until: Optional[datetime] = Field(None, description="No occurrence starts after this time")
+    timeZone: Optional[str] = Field(
+        None,
+        description="IANA time zone the series repeats in, so occurrences keep their local time across DST",
+        examples=["Europe/Amsterdam"]
+    )
+    exceptions: List[datetime] = Field(
+        [],
+        max_length=MAX_RECURRENCE_EXCEPTIONS,
+        description="Start times of occurrences that are left out"
+    )
+
+    @model_validator(mode="after")
+    def fits_storage(self) -> "RecurrenceRequest":
+        # A rule that does not fit its storage property would only fail once written
+        if stored_length(Recurrence(**self.model_dump())) > MAX_RECURRENCE_LENGTH:
+            raise ValueError(f"A recurrence takes at most {MAX_RECURRENCE_LENGTH} characters as stored")
+        return self
@@ -0,0 +1,14 @@
+from pydantic import BaseModel
+from datetime import datetime
+from typing import List
+
+from src.responses.agenda_response import AgendaResponse
+
+class DeletedAgendaItem(BaseModel):
+    id: str
+    deleted: datetime
+
+class AgendaChangesResponse(BaseModel):
+    items: List[AgendaResponse]
+    deleted: List[DeletedAgendaItem]
+    nextSince: str
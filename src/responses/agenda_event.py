@@ -0,0 +1,16 @@
+from pydantic import BaseModel
+from enum import Enum
+from typing import Optional
+
+from src.responses.agenda_response import AgendaResponse
+
+class AgendaEventType(str, Enum):
+    CREATED = "created"
+    UPDATED = "updated"
+    DELETED = "deleted"
+
+class AgendaEvent(BaseModel):
+    type: AgendaEventType
+    id: str
+    # The item as written; absent for deletions
+    item: Optional[AgendaResponse] = None
@@ -1,7 +1,9 @@
 from pydantic import BaseModel
 from datetime import datetime
 from enum import Enum
-from typing import Optional
+from typing import List, Optional
+
+from src.enums.recurrence import RecurrenceFrequency, Weekday
 
 class ItemType(str, Enum):
     EVENT = "Event"
@@ -11,6 +13,26 @@ class TimeSlot(BaseModel):
     start: datetime
     end: datetime
 
+class OccurrenceOverride(BaseModel):
+    # The occurrence of the series this replaces, by its start as generated by the rule
+    originalStart: datetime
+    summary: str
+    description: Optional[str] = None
+    location: Optional[str] = None
+    itemType: ItemType
+    updated: datetime
+    timeSlot: TimeSlot
+
+class Recurrence(BaseModel):
+    frequency: RecurrenceFrequency
+    interval: int = 1
+    byDay: Optional[List[Weekday]] = None
+    count: Optional[int] = None
+    until: Optional[datetime] = None
+    timeZone: Optional[str] = None
+    exceptions: List[datetime] = []
+    overrides: List[OccurrenceOverride] = []
+
 class AgendaResponse(BaseModel):
     id: str
     summary: str
@@ -19,4 +41,9 @@ class AgendaResponse(BaseModel):
     itemType: ItemType
     created: datetime
     updated: datetime
-    timeSlot: TimeSlot
\ No newline at end of file
+    timeSlot: TimeSlot
+    # Set on recurring items as stored; lists with a date window return their occurrences instead
+    recurrence: Optional[Recurrence] = None
+    # Set on occurrences of a recurring item
+    seriesId: Optional[str] = None
+    originalStart: Optional[datetime] = None
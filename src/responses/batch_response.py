@@ -0,0 +1,18 @@
+from pydantic import BaseModel
+from typing import List, Optional
+
+from src.responses.agenda_response import AgendaResponse
+
+class BatchItemError(BaseModel):
+    code: str
+    message: str
+
+class BatchItemResult(BaseModel):
+    index: int
+    id: Optional[str] = None
+    status: int
+    item: Optional[AgendaResponse] = None
+    error: Optional[BatchItemError] = None
+
+class BatchResponse(BaseModel):
+    results: List[BatchItemResult]
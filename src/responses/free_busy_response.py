@@ -0,0 +1,12 @@
+from pydantic import BaseModel
+from datetime import datetime
+from typing import List
+
+class BusyPeriod(BaseModel):
+    start: datetime
+    end: datetime
+
+class FreeBusyResponse(BaseModel):
+    startDate: datetime
+    endDate: datetime
+    busy: List[BusyPeriod]
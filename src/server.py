@@ -0,0 +1,69 @@
+"""
+Production entry point, used by the Docker image:
+
+    python -m src.server
+
+Runs WEB_WORKERS uvicorn worker processes sharing the listening socket, each with the uvloop event
+loop and the httptools HTTP parser. With more than one worker, Prometheus metrics are written to
+PROMETHEUS_MULTIPROC_DIR, so `/metrics` on any worker reports the totals of all of them.
+
+Workers share nothing else: each has its own storage client, agenda cache and event broker, like
+separate replicas would.
+"""
+import logging
+import os
+import shutil
+import tempfile
+
+import uvicorn
+
+from src.settings import settings
+from src.utils.logging_util import configure_logging
+
+logger = logging.getLogger(__name__)
+
+
+def server_options() -> dict:
+    """Keyword arguments for `uvicorn.Config`/`uvicorn.run` built from the WEB_* settings."""
+    return dict(
+        host=settings.HOST,
+        port=int(settings.PORT),
+        loop="uvloop",
+        http="httptools",
+        backlog=settings.WEB_BACKLOG,
+        # Beyond this many open connections and in-flight requests, new requests get 503
+        limit_concurrency=settings.WEB_LIMIT_CONCURRENCY or None,
+        # Longer than the load balancer's idle timeout, so it never reuses a connection we just closed
+        timeout_keep_alive=settings.WEB_KEEPALIVE_SECONDS,
+        timeout_graceful_shutdown=settings.WEB_GRACEFUL_SHUTDOWN_SECONDS,
+        log_level=settings.LOG_LEVEL,
+        # Logging is set up by configure_logging, in every worker when it imports src.main
+        log_config=None,
+    )
+
+
+def prepare_multiprocess_metrics() -> str:
+    """
+    Points prometheus_client in the workers at an empty PROMETHEUS_MULTIPROC_DIR. Must run before
+    the workers start (they inherit the environment); files left by a previous run are removed.
+    """
+    directory = settings.PROMETHEUS_MULTIPROC_DIR or os.path.join(tempfile.gettempdir(), "agenda-service-metrics")
+    shutil.rmtree(directory, ignore_errors=True)
+    os.makedirs(directory)
+    os.environ["PROMETHEUS_MULTIPROC_DIR"] = directory
+    return directory
+
+
+def main():
+    configure_logging()
+    workers = settings.WEB_WORKERS
+    if workers > 1:
+        if settings.STORAGE_BACKEND.lower() == "memory":
+            raise ValueError("STORAGE_BACKEND=memory keeps items per process; run it with WEB_WORKERS=1")
+        logger.info("Starting %s workers, metrics in %s", workers, prepare_multiprocess_metrics())
+    # Workers import the application themselves, so it is passed by name
+    uvicorn.run("src.main:app", workers=workers, **server_options())
+
+
+if __name__ == "__main__":
+    main()
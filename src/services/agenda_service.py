@@ -1,19 +1,75 @@
+import asyncio
+import json
+import math
+import time
 import uuid
 
-from datetime import datetime
-from typing import Optional
-from azure.core.exceptions import ResourceExistsError
+from datetime import datetime, timedelta
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+from src.cache.agenda_cache import AgendaCache
+from src.constants.validation_contraints import MAX_RECURRENCE_EXCEPTIONS, MAX_RECURRENCE_LENGTH, MAX_RECURRENCE_OVERRIDES
+from src.events.broker import EventBroker, SubscriptionOverflow
+from src.exceptions.api_exception import APIException
 from src.exceptions.exception_handler import logger
-from src.repositories.agenda_repository import AgendaRepository
-from src.responses.agenda_response import AgendaResponse, TimeSlot, ItemType
+from src.metrics import AGENDA_CACHE_HITS, AGENDA_CACHE_MISSES, AGENDA_STALE_READS
+from src.repositories.base import (
+    BaseAgendaRepository,
+    BatchOperationError,
+    Entity,
+    EntityExistsError,
+    EntityModifiedError,
+    EntityNotFoundError,
+    StorageUnavailableError,
+)
+from src.responses.agenda_event import AgendaEvent, AgendaEventType
+from src.responses.agenda_changes_response import AgendaChangesResponse, DeletedAgendaItem
+from src.responses.agenda_response import AgendaResponse, OccurrenceOverride, Recurrence, TimeSlot, ItemType
+from src.responses.batch_response import BatchItemError, BatchItemResult
+from src.responses.free_busy_response import BusyPeriod, FreeBusyResponse
 from fastapi import HTTPException
 from src.exceptions.error_codes import ErrorCode
+from src.utils.continuation_token_util import decode_continuation_token, encode_continuation_token
+from src.utils.instrumentation import observe_stage, stage
+from src.utils.interval_index import IntervalIndex
+from src.utils.recurrence_util import (
+    expand_occurrences,
+    expand_series,
+    find_occurrence,
+    kept_overrides,
+    occurrence_id,
+    occurrence_slots,
+    original_start,
+    parse_occurrence_id,
+    series_span,
+    stored_length,
+    with_exception,
+    with_override,
+)
 from src.utils.response_util import map_entity_to_response
+from src.utils.single_flight import SingleFlight
+from src.utils.sync_token_util import decode_sync_token, encode_sync_token
+from src.settings import settings
+from src.utils.time_window_util import as_utc
+
+# Conflicting item ids named in the message of a 409
+MAX_LISTED_CONFLICTS = 10
+
+# Entities per storage read of a streamed date window; Table Storage returns at most 1000 per page
+STREAM_PAGE_SIZE = 1000
 
 
 class AgendaService:
-    def __init__(self, repository: AgendaRepository):
+    def __init__(
+            self,
+            repository: BaseAgendaRepository,
+            cache: Optional[AgendaCache] = None,
+            events: Optional[EventBroker] = None
+    ):
         self.repository = repository
+        self.cache = cache
+        self.events = events
+        # Concurrent identical storage reads share one call; keys start with the group id
+        self.reads = SingleFlight() if settings.AGENDA_SINGLE_FLIGHT_ENABLED else None
 
     async def create_agenda_item(
             self,
@@ -22,37 +78,29 @@ class AgendaService:
             description: Optional[str],
             location: Optional[str],
             item_type: ItemType,
-            time_slot: TimeSlot
+            time_slot: TimeSlot,
+            recurrence: Optional[Recurrence] = None,
+            check_conflicts: bool = False
     ) -> AgendaResponse:
         now = datetime.utcnow()
         row_key = str(uuid.uuid4())
 
-        entity = {
-            "PartitionKey": group_id,
-            "RowKey": row_key,
-            "summary": summary,
-            "description": description,
-            "location": location,
-            "itemType": item_type.value,
-            "created": now.isoformat(),
-            "updated": now.isoformat(),
-            "timeSlotStart": time_slot.start.isoformat(),
-            "timeSlotEnd": time_slot.end.isoformat()
-        }
+        fields = dict(
+            summary=summary, description=description, location=location, item_type=item_type, time_slot=time_slot, recurrence=recurrence
+        )
+        if check_conflicts:
+            await self._check_conflicts(group_id, None, fields)
+        entity = _to_entity(group_id, row_key, created=now, updated=now, **fields)
 
         try:
             await self.repository.create_entity(entity)
-            return AgendaResponse(
-                id=row_key,
-                summary=summary,
-                description=description,
-                location=location,
-                itemType=item_type,
-                created=now,
-                updated=now,
-                timeSlot=time_slot
-            )
-        except ResourceExistsError:
+            self._written(group_id)
+            item = _to_response(row_key, now, now, **fields)
+            if self.cache:
+                self.cache.upsert_item(group_id, item)
+            await self._publish(group_id, AgendaEventType.CREATED, row_key, item)
+            return item
+        except EntityExistsError:
             raise HTTPException(
                 status_code=ErrorCode.BAD_REQUEST.status,
                 detail={
@@ -60,33 +108,369 @@ class AgendaService:
                     "message": "An agenda item with this identifier already exists"
                 }
             )
+        except StorageUnavailableError as e:
+            # A create that timed out may still have been applied
+            self._written(group_id)
+            if self.cache:
+                self.cache.invalidate(group_id)
+            logger.error("Error creating agenda item: %s", e)
+            raise _storage_error(e, "Failed to create agenda item")
 
     async def list_agenda_items(self, group_id: str, start_date: Optional[datetime] = None, end_date: Optional[datetime] = None):
+        """
+        The items of a group, or those overlapping a date window. Within a window, recurring items are
+        expanded into their occurrences there; without one, they are returned as stored.
+        """
+        group_id = str(group_id)
+        try:
+            if start_date or end_date:
+                items = await self._load_window(group_id, start_date, end_date)
+                with stage("expand", "list_window"):
+                    return expand_occurrences(items, start_date, end_date)
+            return list((await self._load_group(group_id)).values())
+        except StorageUnavailableError as e:
+            items = self._stale_items(group_id, start_date, end_date)
+            if items is None:
+                logger.error("Error retrieving agenda items: %s", e)
+                raise _storage_error(e, "Failed to retrieve agenda items")
+            AGENDA_STALE_READS.labels(operation="list").inc()
+            logger.warning("Serving expired cached agenda items of group %s: %s", group_id, e)
+            return expand_occurrences(items, start_date, end_date)
+        except Exception as e:
+            logger.error("Error retrieving agenda items: %s", e)
+            raise _storage_error(e, "Failed to retrieve agenda items")
 
-        filter_query = f"PartitionKey eq '{group_id}'"
+    async def list_agenda_items_page(
+            self,
+            group_id: str,
+            start_date: Optional[datetime],
+            end_date: Optional[datetime],
+            limit: int,
+            continuation_token: Optional[str] = None
+    ) -> Tuple[List[AgendaResponse], Optional[str]]:
+        """
+        Returns one page of a group's items straight from storage, plus the token for the next page.
+        Pages follow the storage pages, so a page can hold fewer than `limit` items while more follow.
+        """
+        group_id = str(group_id)
+        token = decode_continuation_token(continuation_token)
 
-        if start_date:
-            filter_query += f" and timeSlotEnd ge datetime'{start_date.strftime('%Y-%m-%dT%H:%M:%SZ')}'"
-        if end_date:
-            filter_query += f" and timeSlotStart le datetime'{end_date.strftime('%Y-%m-%dT%H:%M:%SZ')}'"
+        async def read_page():
+            if start_date or end_date:
+                entities, next_token = await self.repository.query_range_page(group_id, start_date, end_date, limit, token)
+            else:
+                entities, next_token = await self.repository.query_items_page(group_id, limit, token)
+            with stage("decode", "list_page"):
+                items = [map_entity_to_response(entity) for entity in entities]
+            # The occurrences of a recurring item all come with the page holding the item
+            with stage("expand", "list_page"):
+                items = expand_occurrences(items, start_date, end_date)
+            return items, encode_continuation_token(next_token)
 
         try:
-            entities = await self.repository.query_entities(filter_query)
-            items = [map_entity_to_response(entity) async for entity in entities]
-            return items
+            return await self._single_flight(
+                "list_page", (group_id, "page", start_date, end_date, limit, continuation_token), read_page
+            )
+        except Exception as e:
+            logger.error("Error retrieving agenda items page: %s", e)
+            raise _storage_error(e, "Failed to retrieve agenda items")
+
+    async def stream_agenda_items(
+            self,
+            group_id: str,
+            start_date: Optional[datetime] = None,
+            end_date: Optional[datetime] = None
+    ) -> AsyncIterator[AgendaResponse]:
+        """Yields a group's items one by one; a cached group is served from memory, otherwise from storage."""
+        group_id = str(group_id)
+        if self.cache:
+            cached_items = self.cache.get_group_window(group_id, start_date, end_date)
+            if cached_items is not None:
+                AGENDA_CACHE_HITS.labels(operation="stream").inc()
+                for item in cached_items:
+                    for occurrence in _occurrences(item, start_date, end_date):
+                        yield occurrence
+                return
+
+        if start_date or end_date:
+            # Page by page, so only one storage page is held at a time (query_range would load the whole window)
+            token = None
+            while True:
+                entities, token = await self.repository.query_range_page(group_id, start_date, end_date, STREAM_PAGE_SIZE, token)
+                for entity in entities:
+                    for occurrence in _occurrences(map_entity_to_response(entity), start_date, end_date):
+                        yield occurrence
+                if not token:
+                    return
+
+        async for entity in await self.repository.query_items(group_id):
+            yield map_entity_to_response(entity)
+
+    async def list_agenda_changes(self, group_id: str, since_token: Optional[str] = None) -> AgendaChangesResponse:
+        """
+        Items created or updated and items deleted since the watermark in `since_token`; without a token,
+        all items. The returned token is the time of this read minus AGENDA_SYNC_CLOCK_SKEW_SECONDS, so
+        consecutive syncs overlap a little: a write stamped just before the read but committed after it
+        (possibly on another replica) is returned by the next sync, at the cost of some duplicates.
+        """
+        group_id = str(group_id)
+        now = datetime.utcnow()
+        since = decode_sync_token(since_token)
+        if since and since < now - timedelta(days=settings.AGENDA_TOMBSTONE_RETENTION_DAYS):
+            raise APIException(
+                "The sync token is older than the deletion history; sync again without `since`",
+                ErrorCode.SYNC_TOKEN_EXPIRED
+            )
+
+        try:
+            if since:
+                entities, tombstones = await self.repository.query_changes(group_id, since)
+            else:
+                # From storage, not the cache: a cached group can miss writes made through other replicas
+                entities, tombstones = [entity async for entity in await self.repository.query_items(group_id)], []
         except Exception as e:
-            logger.error(f"Error retrieving agenda items: {e}")
-            raise HTTPException(status_code=500, detail="Failed to retrieve agenda items")
+            logger.error("Error retrieving agenda changes: %s", e)
+            raise _storage_error(e, "Failed to retrieve agenda changes")
+
+        watermark = now - timedelta(seconds=settings.AGENDA_SYNC_CLOCK_SKEW_SECONDS)
+        with stage("decode", "changes"):
+            items = [map_entity_to_response(entity) for entity in entities]
+        return AgendaChangesResponse.model_construct(
+            items=items,
+            deleted=[
+                DeletedAgendaItem.model_construct(id=tombstone["RowKey"], deleted=datetime.fromisoformat(tombstone["deleted"]))
+                for tombstone in tombstones
+            ],
+            # Never moves backwards, when syncing again within the skew
+            nextSince=encode_sync_token(max(watermark, since) if since else watermark)
+        )
+
+    async def stream_agenda_events(self, group_id: str) -> AsyncIterator[Optional[Tuple[str, str]]]:
+        """
+        Changes to a group as (event type, JSON) pairs as they are published, starting with a `sync`
+        event holding a delta sync token taken after subscribing: syncing with it covers everything
+        written before the stream started, so a reconnecting client misses nothing. Yields None when
+        nothing happened for EVENT_HEARTBEAT_SECONDS. Ends after EVENT_STREAM_MAX_SECONDS, or as soon
+        as the client falls too far behind.
+        """
+        deadline = time.monotonic() + settings.EVENT_STREAM_MAX_SECONDS
+        async with self.events.subscribe(str(group_id)) as subscription:
+            sync_token = encode_sync_token(datetime.utcnow() - timedelta(seconds=settings.AGENDA_SYNC_CLOCK_SKEW_SECONDS))
+            yield "sync", json.dumps({"since": sync_token})
+            while (remaining := deadline - time.monotonic()) > 0:
+                try:
+                    yield await subscription.next(min(settings.EVENT_HEARTBEAT_SECONDS, remaining))
+                except SubscriptionOverflow:
+                    logger.info("Closing agenda event stream of group %s that fell behind", group_id)
+                    return
 
     async def get_agenda_item(self, group_id: str, item_id: str):
-        filter_query = f"PartitionKey eq '{group_id}' and RowKey eq '{item_id}'"
+        group_id = str(group_id)
+        occurrence = parse_occurrence_id(item_id)
+        if occurrence is not None:
+            series_id, stamp = occurrence
+            series = await self.get_agenda_item(group_id, series_id)
+            return find_occurrence(series, stamp) if series is not None and series.recurrence is not None else None
+
+        if self.cache:
+            group_items = self.cache.get_group(group_id)
+            if group_items is not None:
+                AGENDA_CACHE_HITS.labels(operation="get").inc()
+                return group_items.get(item_id)
+            AGENDA_CACHE_MISSES.labels(operation="get").inc()
+
+        async def read_item():
+            entity = await self.repository.get_entity(group_id, item_id)
+            if not entity:
+                return None
+            with stage("decode", "get"):
+                return map_entity_to_response(entity)
+
         try:
-            entities = await self.repository.query_entities(filter_query)
-            entity = await anext(entities, None)
-            return map_entity_to_response(entity) if entity else None
+            return await self._single_flight("get", (group_id, "item", str(item_id)), read_item)
+        except StorageUnavailableError as e:
+            group_items = self.cache.get_group(group_id, stale=True) if self.cache else None
+            if group_items is None:
+                logger.error("Error retrieving agenda item: %s", e)
+                raise _storage_error(e, "Failed to retrieve agenda item")
+            AGENDA_STALE_READS.labels(operation="get").inc()
+            logger.warning("Serving expired cached agenda item of group %s: %s", group_id, e)
+            return group_items.get(item_id)
         except Exception as e:
-            logger.error(f"Error retrieving agenda item: {e}")
-            raise HTTPException(status_code=500, detail="Failed to retrieve agenda item")
+            logger.error("Error retrieving agenda item: %s", e)
+            raise _storage_error(e, "Failed to retrieve agenda item")
+
+    async def get_free_busy(self, group_id: str, start_date: datetime, end_date: datetime) -> FreeBusyResponse:
+        """
+        The periods within [start_date, end_date] taken by the group's events (occurrences of recurring
+        events included), merged where they overlap or touch and clipped to the window. Logs record what
+        happened rather than book time, so they never make a period busy.
+        """
+        items = await self.list_agenda_items(group_id, start_date, end_date)
+        window_start, window_end = as_utc(start_date), as_utc(end_date)
+        slots = sorted(
+            (max(as_utc(item.timeSlot.start), window_start), min(as_utc(item.timeSlot.end), window_end))
+            for item in items if item.itemType == ItemType.EVENT
+        )
+        busy: List[List[datetime]] = []
+        for start, end in slots:
+            if end <= start:
+                continue
+            if busy and start <= busy[-1][1]:
+                busy[-1][1] = max(busy[-1][1], end)
+            else:
+                busy.append([start, end])
+        return FreeBusyResponse.model_construct(
+            startDate=start_date,
+            endDate=end_date,
+            busy=[BusyPeriod.model_construct(start=start, end=end) for start, end in busy]
+        )
+
+    async def find_conflicts(
+            self,
+            group_id: str,
+            time_slot: TimeSlot,
+            item_type: ItemType,
+            recurrence: Optional[Recurrence] = None,
+            item_id: Optional[str] = None
+    ) -> List[AgendaResponse]:
+        """
+        The group's events (or occurrences of them) overlapping an event at `time_slot`, or any occurrence
+        `recurrence` generates from it, leaving out item `item_id` itself (all of its occurrences, for a
+        series). Slots that only touch do not overlap, and logs neither conflict nor are conflicted with.
+        The group is read once for the whole span of the slots; each slot is then an interval index query.
+        """
+        slots = _busy_slots(time_slot, item_type, recurrence)
+        if not slots:
+            return []
+        events = await self._busy_events(group_id, slots, {item_id} if item_id is not None else set())
+        index = IntervalIndex.build((str(position), event.timeSlot.start, event.timeSlot.end) for position, event in enumerate(events))
+        return [events[int(key)] for key in sorted(_overlapping(index, slots), key=int)]
+
+    async def _check_conflicts(self, group_id: str, item_id: Optional[str], fields: dict):
+        conflicts = await self.find_conflicts(group_id, fields["time_slot"], fields["item_type"], fields["recurrence"], item_id)
+        if conflicts:
+            raise APIException(_conflict_message([item.id for item in conflicts]), ErrorCode.ITEM_CONFLICT)
+
+    async def _check_batch_conflicts(
+            self,
+            group_id: str,
+            items: List[Tuple[int, Optional[str], dict]],
+            results: List[Optional[BatchItemResult]]
+    ):
+        """
+        Conflict checks for the (index, item id or None, fields) items of a batch, in order: each against the
+        group's events, leaving out the items the batch replaces, and against the earlier items of the
+        batch that passed. The group is read once, for the span of all items; a conflict is a 409 result.
+        """
+        slots = {index: _busy_slots(fields["time_slot"], fields["item_type"], fields["recurrence"]) for index, _, fields in items}
+        taken = [slot for item_slots in slots.values() for slot in item_slots]
+        if not taken:
+            return
+        replaced = {item_id for _, item_id, _ in items if item_id is not None}
+        events = await self._busy_events(group_id, taken, replaced)
+        index = IntervalIndex.build((event.id, event.timeSlot.start, event.timeSlot.end) for event in events)
+        # Keys of the batch's own slots name the item they belong to
+        names = {event.id: event.id for event in events}
+
+        for position, item_id, _ in items:
+            conflicts = _overlapping(index, slots[position])
+            if conflicts:
+                listed = sorted({names[key] for key in conflicts})
+                results[position] = _batch_error(position, item_id, ErrorCode.ITEM_CONFLICT, _conflict_message(listed))
+                continue
+            name = item_id if item_id is not None else f"batch item {position}"
+            for number, (start, end) in enumerate(slots[position]):
+                key = f"{position}/{number}"
+                index.add(key, start, end)
+                names[key] = name
+
+    async def _busy_events(self, group_id: str, slots: List[Tuple[datetime, datetime]], excluded: set) -> List[AgendaResponse]:
+        """The group's events (occurrences of recurring ones) within the span of `slots`, but those of `excluded` items."""
+        items = await self.list_agenda_items(group_id, min(start for start, _ in slots), max(end for _, end in slots))
+        return [
+            item for item in items
+            if item.itemType == ItemType.EVENT and item.id not in excluded and item.seriesId not in excluded
+        ]
+
+    async def _load_group(self, group_id: str) -> Dict[str, AgendaResponse]:
+        """Returns all items of a group, from the cache when possible."""
+        if self.cache:
+            group_items = self.cache.get_group(group_id)
+            if group_items is not None:
+                AGENDA_CACHE_HITS.labels(operation="list").inc()
+                return group_items
+            AGENDA_CACHE_MISSES.labels(operation="list").inc()
+        return await self._single_flight("list", (group_id, "group"), lambda: self._read_group(group_id))
+
+    async def _read_group(self, group_id: str) -> Dict[str, AgendaResponse]:
+        if not self.cache:
+            return await self._query_group(group_id)
+        ticket = self.cache.begin_load(group_id)
+        try:
+            group_items = await self._query_group(group_id)
+            self.cache.put_group(ticket, group_items.values())
+            return group_items
+        finally:
+            self.cache.end_load(ticket)
+
+    def _stale_items(self, group_id: str, start_date: Optional[datetime], end_date: Optional[datetime]) -> Optional[List[AgendaResponse]]:
+        """The items of a group overlapping the window from expired cache entries, if any are left."""
+        if not self.cache:
+            return None
+        group_items = self.cache.get_group_window(group_id, start_date, end_date, stale=True)
+        if group_items is not None:
+            return group_items
+        if start_date or end_date:
+            window_items = self.cache.get_window(group_id, start_date, end_date, stale=True)
+            if window_items is not None:
+                return list(window_items.values())
+        return None
+
+    async def _load_window(self, group_id: str, start_date: Optional[datetime], end_date: Optional[datetime]) -> List[AgendaResponse]:
+        """
+        Returns the items of a group overlapping the window. A cached complete group or cached window
+        answers it from memory; otherwise only the window is read, as range scans over the time index.
+        """
+        if self.cache:
+            group_items = self.cache.get_group_window(group_id, start_date, end_date)
+            if group_items is not None:
+                AGENDA_CACHE_HITS.labels(operation="list").inc()
+                return group_items
+            window_items = self.cache.get_window(group_id, start_date, end_date)
+            if window_items is not None:
+                AGENDA_CACHE_HITS.labels(operation="list").inc()
+                return list(window_items.values())
+            AGENDA_CACHE_MISSES.labels(operation="list").inc()
+        return await self._single_flight(
+            "list_window", (group_id, "window", start_date, end_date), lambda: self._read_window(group_id, start_date, end_date)
+        )
+
+    async def _read_window(self, group_id: str, start_date: Optional[datetime], end_date: Optional[datetime]) -> List[AgendaResponse]:
+        ticket = self.cache.begin_load(group_id) if self.cache else None
+        try:
+            entities = await self.repository.query_range(group_id, start_date, end_date)
+            with stage("decode", "list_window"):
+                items = sorted((map_entity_to_response(entity) for entity in entities), key=lambda item: as_utc(item.timeSlot.start))
+            if self.cache:
+                self.cache.put_window(ticket, start_date, end_date, items)
+            return items
+        finally:
+            if self.cache:
+                self.cache.end_load(ticket)
+
+    async def _query_group(self, group_id: str) -> Dict[str, AgendaResponse]:
+        entities = await self.repository.query_items(group_id)
+        group_items = {}
+        # Decoding is interleaved with fetching the pages, so it is timed per item
+        decoding = 0.0
+        async for entity in entities:
+            started = time.perf_counter()
+            item = map_entity_to_response(entity)
+            decoding += time.perf_counter() - started
+            group_items[item.id] = item
+        observe_stage("decode", "list", decoding)
+        return group_items
 
     async def update_agenda_item(
             self,
@@ -96,49 +480,594 @@ class AgendaService:
             description: Optional[str],
             location: Optional[str],
             item_type: ItemType,
-            time_slot: TimeSlot
+            time_slot: TimeSlot,
+            recurrence: Optional[Recurrence] = None,
+            check_conflicts: bool = False
     ) -> Optional[AgendaResponse]:
+        """
+        Replaces an item. A recurring item keeps the edited occurrences its new rule still has; the id
+        of a single occurrence replaces just that occurrence (stored as an override in the item).
+        """
         now = datetime.utcnow()
+        fields = dict(
+            summary=summary, description=description, location=location, item_type=item_type, time_slot=time_slot, recurrence=recurrence
+        )
+        occurrence = parse_occurrence_id(item_id)
+        if occurrence is not None:
+            series_id, stamp = occurrence
+            return await self._update_occurrence(group_id, series_id, stamp, now, fields, check_conflicts)
 
-        existing_item = await self.get_agenda_item(group_id, item_id)
-        if not existing_item:
+        existing_entity = await self._read_entity(group_id, item_id)
+        if not existing_entity:
+            return None
+        if check_conflicts:
+            await self._check_conflicts(group_id, item_id, fields)
+        existing_item = map_entity_to_response(existing_entity)
+        if recurrence is not None and existing_item.recurrence is not None:
+            fields["recurrence"] = kept_overrides(existing_item.recurrence, time_slot, recurrence)
+            _check_stored_length(fields["recurrence"])
+        return await self._replace(group_id, item_id, existing_entity, existing_item.created, now, fields)
+
+    async def _update_occurrence(
+            self,
+            group_id: str,
+            series_id: str,
+            stamp: str,
+            now: datetime,
+            fields: dict,
+            check_conflicts: bool = False
+    ) -> Optional[AgendaResponse]:
+        _check_occurrence_fields(fields)
+        existing_entity = await self._read_entity(group_id, series_id)
+        series = map_entity_to_response(existing_entity) if existing_entity else None
+        start = original_start(series.timeSlot, series.recurrence, stamp) if series and series.recurrence else None
+        if start is None:
             return None
+        if check_conflicts:
+            await self._check_conflicts(group_id, occurrence_id(series_id, start), fields)
+
+        recurrence = _override_occurrence(series.recurrence, start, fields, now)
+        series = await self._replace(group_id, series_id, existing_entity, series.created, now, _series_fields(series, recurrence))
+        return find_occurrence(series, stamp) if series is not None else None
 
-        entity = {
-            "PartitionKey": group_id,
-            "RowKey": item_id,
-            "summary": summary,
-            "description": description,
-            "location": location,
-            "itemType": item_type.value,
-            "created": existing_item.created.isoformat(),
-            "updated": now.isoformat(),
-            "timeSlotStart": time_slot.start.isoformat(),
-            "timeSlotEnd": time_slot.end.isoformat()
-        }
+    async def _delete_occurrence(self, group_id: str, series_id: str, stamp: str) -> bool:
+        """Leaves one occurrence out of a recurring item, as an exception stored in the item."""
+        existing_entity = await self._read_entity(group_id, series_id)
+        series = map_entity_to_response(existing_entity) if existing_entity else None
+        start = original_start(series.timeSlot, series.recurrence, stamp) if series and series.recurrence else None
+        if start is None:
+            return False
+
+        recurrence = _skip_occurrence(series.recurrence, start)
+        now = datetime.utcnow()
+        return await self._replace(group_id, series_id, existing_entity, series.created, now, _series_fields(series, recurrence)) is not None
 
+    async def _read_entity(self, group_id: str, item_id: str):
+        # Read straight from storage (not the cache) to get the ETag the conditional replace is based on
         try:
-            await self.repository.update_entity(entity)
-
-            return AgendaResponse(
-                id=item_id,
-                summary=summary,
-                description=description,
-                location=location,
-                itemType=item_type,
-                created=existing_item.created,
-                updated=now,
-                timeSlot=time_slot
+            return await self.repository.get_entity(group_id, item_id)
+        except Exception as e:
+            logger.error("Error retrieving agenda item: %s", e)
+            raise _storage_error(e, "Failed to retrieve agenda item")
+
+    async def _replace(
+            self,
+            group_id: str,
+            item_id: str,
+            existing_entity: Entity,
+            created: datetime,
+            now: datetime,
+            fields: dict
+    ) -> Optional[AgendaResponse]:
+        """Writes `fields` over an item unless it changed since `existing_entity` was read; None if it is gone."""
+        entity = _to_entity(group_id, item_id, created=created, updated=now, **fields)
+
+        try:
+            await self.repository.update_entity(entity, previous=existing_entity)
+            self._written(group_id)
+
+            item = _to_response(item_id, created, now, **fields)
+            if self.cache:
+                self.cache.upsert_item(group_id, item)
+            await self._publish(group_id, AgendaEventType.UPDATED, item_id, item)
+            return item
+        except EntityNotFoundError:
+            # Deleted between the read and the write
+            if self.cache:
+                self.cache.remove_item(group_id, item_id)
+            return None
+        except EntityModifiedError:
+            if self.cache:
+                self.cache.invalidate(group_id)
+            raise APIException(
+                "The agenda item was modified concurrently, retry the update",
+                ErrorCode.PRECONDITION_FAILED
             )
         except Exception as e:
-            logger.error(f"Error updating agenda item: {e}")
-            raise HTTPException(status_code=500, detail="Failed to update agenda item")
+            # The write may or may not have been applied; let the next read reload the group
+            self._written(group_id)
+            if self.cache:
+                self.cache.invalidate(group_id)
+            logger.error("Error updating agenda item: %s", e)
+            raise _storage_error(e, "Failed to update agenda item")
 
     async def delete_agenda_item(self, group_id: uuid, item_id: uuid) -> bool:
+        occurrence = parse_occurrence_id(str(item_id))
+        if occurrence is not None:
+            series_id, stamp = occurrence
+            return await self._delete_occurrence(str(group_id), series_id, stamp)
         try:
-            await self.repository.delete_entity(group_id, item_id)
+            deleted = await self.repository.delete_entity(group_id, item_id)
+            # Also when it was not there: a cached copy can outlive a delete made through another replica
+            if self.cache:
+                self.cache.remove_item(str(group_id), str(item_id))
+            if not deleted:
+                return False
+            self._written(str(group_id))
+            await self._publish(str(group_id), AgendaEventType.DELETED, str(item_id))
             return True
         except Exception as e:
-            logger.error(f"Error deleting agenda item: {e}")
+            self._written(str(group_id))
+            if self.cache:
+                self.cache.invalidate(str(group_id))
+            logger.error("Error deleting agenda item: %s", e)
+            if isinstance(e, StorageUnavailableError):
+                raise _storage_error(e, "Failed to delete agenda item")
             return False
 
+    async def create_agenda_items(self, group_id: str, items: List[dict], check_conflicts: bool = False) -> List[BatchItemResult]:
+        """
+        Creates many items of one group. `items` hold the keyword arguments of `create_agenda_item`.
+        They are written in transactions of at most `repository.MAX_BATCH_ITEMS` items, run concurrently.
+        """
+        now = datetime.utcnow()
+        results: List[Optional[BatchItemResult]] = [None] * len(items)
+        if check_conflicts:
+            await self._check_batch_conflicts(group_id, [(index, None, item) for index, item in enumerate(items)], results)
+        pending = []
+        for index, item in enumerate(items):
+            if results[index] is not None:
+                continue
+            row_key = str(uuid.uuid4())
+            entity = _to_entity(group_id, row_key, created=now, updated=now, **item)
+            pending.append((index, row_key, entity, _to_response(row_key, now, now, **item)))
+
+        async def write(chunk):
+            await self.repository.create_entities([entity for _, _, entity, _ in chunk])
+
+        await self._run_batch(group_id, pending, write, results, success_status=201, event_type=AgendaEventType.CREATED)
+        return results
+
+    async def update_agenda_items(self, group_id: str, items: List[dict], check_conflicts: bool = False) -> List[BatchItemResult]:
+        """
+        Updates many items of one group. `items` hold the keyword arguments of `update_agenda_item`.
+        Every item is read once (concurrently) and replaced conditionally on that read, as in a single update.
+        Occurrence ids override their occurrence; each series is read and written once for all of its occurrences.
+        """
+        now = datetime.utcnow()
+        item_ids = [item["item_id"] for item in items]
+        item_fields = [{key: value for key, value in item.items() if key != "item_id"} for item in items]
+        results: List[Optional[BatchItemResult]] = [None] * len(items)
+        occurrences = _occurrence_edits(item_ids)
+        for edits in occurrences.values():
+            for index, item_id, _ in edits:
+                try:
+                    _check_occurrence_fields(item_fields[index])
+                except APIException as e:
+                    results[index] = _batch_error_from(index, item_id, e)
+        existing = await self._read_many(group_id, _stored_ids(item_ids), results)
+        if check_conflicts:
+            await self._check_batch_conflicts(
+                group_id,
+                [(index, item_ids[index], fields) for index, fields in enumerate(item_fields) if results[index] is None],
+                results
+            )
+
+        pending = []
+        for index, fields in enumerate(item_fields):
+            if results[index] is not None or existing[index] is None:
+                continue
+            fields = dict(fields)
+            existing_item = map_entity_to_response(existing[index])
+            created = existing_item.created
+            if fields.get("recurrence") is not None and existing_item.recurrence is not None:
+                fields["recurrence"] = kept_overrides(existing_item.recurrence, fields["time_slot"], fields["recurrence"])
+                try:
+                    _check_stored_length(fields["recurrence"])
+                except APIException as e:
+                    results[index] = _batch_error_from(index, item_ids[index], e)
+                    continue
+            entity = _to_entity(group_id, item_ids[index], created=created, updated=now, **fields)
+            pending.append((index, item_ids[index], (entity, existing[index]), _to_response(item_ids[index], created, now, **fields)))
+
+        async def write(chunk):
+            await self.repository.update_entities(
+                [entity for _, _, (entity, _), _ in chunk],
+                [previous for _, _, (_, previous), _ in chunk]
+            )
+
+        def override(recurrence: Recurrence, index: int, start: datetime) -> Recurrence:
+            return _override_occurrence(recurrence, start, item_fields[index], now)
+
+        await asyncio.gather(
+            self._run_batch(group_id, pending, write, results, success_status=200, event_type=AgendaEventType.UPDATED),
+            self._edit_occurrences(group_id, occurrences, override, results, now, success_status=200)
+        )
+        return results
+
+    async def delete_agenda_items(self, group_id: str, item_ids: List[str]) -> List[BatchItemResult]:
+        """Deletes many items of one group; occurrence ids are left out of their series, as in a single delete."""
+        results: List[Optional[BatchItemResult]] = [None] * len(item_ids)
+        existing = await self._read_many(group_id, _stored_ids(item_ids), results)
+        pending = [
+            (index, item_id, existing[index], None)
+            for index, item_id in enumerate(item_ids) if existing[index] is not None
+        ]
+
+        async def write(chunk):
+            await self.repository.delete_entities([entity for _, _, entity, _ in chunk])
+
+        def skip(recurrence: Recurrence, index: int, start: datetime) -> Recurrence:
+            return _skip_occurrence(recurrence, start)
+
+        await asyncio.gather(
+            self._run_batch(group_id, pending, write, results, success_status=204, event_type=AgendaEventType.DELETED),
+            self._edit_occurrences(group_id, _occurrence_edits(item_ids), skip, results, datetime.utcnow(), success_status=204)
+        )
+        return results
+
+    async def _read_many(self, group_id: str, item_ids: List[Optional[str]], results: List[Optional[BatchItemResult]]) -> list:
+        """Point-reads items concurrently, skipping None ids; missing or unreadable items get their result filled in."""
+        semaphore = asyncio.Semaphore(settings.AGENDA_BATCH_CONCURRENCY)
+
+        async def read(index: int, item_id: Optional[str]):
+            if item_id is None:
+                return None
+            async with semaphore:
+                try:
+                    entity = await self.repository.get_entity(group_id, item_id)
+                except Exception as e:
+                    logger.error("Error retrieving agenda item %s: %s", item_id, e)
+                    error_code = ErrorCode.STORAGE_UNAVAILABLE if isinstance(e, StorageUnavailableError) else ErrorCode.INTERNAL_SERVER_ERROR
+                    results[index] = _batch_error(index, item_id, error_code, "Failed to retrieve agenda item")
+                    return None
+                if entity is None:
+                    results[index] = _batch_error(index, item_id, ErrorCode.ITEM_NOT_FOUND, "Agenda item not found")
+                return entity
+
+        return await asyncio.gather(*(read(index, item_id) for index, item_id in enumerate(item_ids)))
+
+    async def _run_batch(
+            self,
+            group_id: str,
+            pending: list,
+            write: Callable[[list], Awaitable[None]],
+            results: List[Optional[BatchItemResult]],
+            success_status: int,
+            event_type: AgendaEventType
+    ):
+        """
+        Writes `pending` (index, item id, payload, response item) tuples in transaction-sized chunks, at
+        most AGENDA_BATCH_CONCURRENCY at a time. A transaction rejected because of one item is retried
+        without that item, so one conflict does not fail its neighbours.
+        """
+        semaphore = asyncio.Semaphore(settings.AGENDA_BATCH_CONCURRENCY)
+        chunk_size = self.repository.MAX_BATCH_ITEMS
+
+        async def run(chunk: list):
+            async with semaphore:
+                while chunk:
+                    try:
+                        await write(chunk)
+                    except BatchOperationError as e:
+                        index, item_id, _, _ = chunk.pop(e.item_index)
+                        error_code, message = _batch_error_for(e.error)
+                        results[index] = _batch_error(index, item_id, error_code, message)
+                        continue
+                    except Exception as e:
+                        logger.error("Error writing agenda items batch: %s", e)
+                        self._written(group_id)
+                        if self.cache:
+                            self.cache.invalidate(group_id)
+                        error_code, message = _batch_error_for(e)
+                        for index, item_id, _, _ in chunk:
+                            results[index] = _batch_error(index, item_id, error_code, message)
+                        return
+
+                    self._written(group_id)
+                    for index, item_id, _, item in chunk:
+                        results[index] = BatchItemResult(index=index, id=item_id, status=success_status, item=item)
+                        if self.cache:
+                            if item:
+                                self.cache.upsert_item(group_id, item)
+                            else:
+                                self.cache.remove_item(group_id, item_id)
+                        await self._publish(group_id, event_type, item_id, item)
+                    return
+
+        await asyncio.gather(*(run(pending[offset:offset + chunk_size]) for offset in range(0, len(pending), chunk_size)))
+
+    async def _edit_occurrences(
+            self,
+            group_id: str,
+            occurrences: Dict[str, List[Tuple[int, str, str]]],
+            edit: Callable[[Recurrence, int, datetime], Recurrence],
+            results: List[Optional[BatchItemResult]],
+            now: datetime,
+            success_status: int
+    ):
+        """
+        Applies the occurrence edits of a batch: `occurrences` holds (index, occurrence id, stamp) per series
+        id, and `edit(rule, index, original start)` returns the rule with one of them applied. Each series
+        is read once and replaced once for all of its edits, conditionally on that read, as in a single edit.
+        """
+        semaphore = asyncio.Semaphore(settings.AGENDA_BATCH_CONCURRENCY)
+
+        async def run(series_id: str, edits: List[Tuple[int, str, str]]):
+            edits = [(index, item_id, stamp) for index, item_id, stamp in edits if results[index] is None]
+            if not edits:
+                return
+            async with semaphore:
+                try:
+                    existing_entity = await self._read_entity(group_id, series_id)
+                except HTTPException as e:
+                    for index, item_id, _ in edits:
+                        results[index] = _batch_error_from(index, item_id, e)
+                    return
+                series = map_entity_to_response(existing_entity) if existing_entity else None
+                recurrence = series.recurrence if series else None
+
+                applied = []
+                for index, item_id, stamp in edits:
+                    start = original_start(series.timeSlot, recurrence, stamp) if recurrence else None
+                    if start is None:
+                        results[index] = _batch_error(index, item_id, ErrorCode.ITEM_NOT_FOUND, "Agenda item not found")
+                        continue
+                    try:
+                        recurrence = edit(recurrence, index, start)
+                    except APIException as e:
+                        results[index] = _batch_error_from(index, item_id, e)
+                        continue
+                    applied.append((index, item_id, stamp))
+                if not applied:
+                    return
+
+                try:
+                    series = await self._replace(group_id, series_id, existing_entity, series.created, now, _series_fields(series, recurrence))
+                except HTTPException as e:
+                    for index, item_id, _ in applied:
+                        results[index] = _batch_error_from(index, item_id, e)
+                    return
+                for index, item_id, stamp in applied:
+                    if series is None:
+                        results[index] = _batch_error(index, item_id, ErrorCode.ITEM_NOT_FOUND, "Agenda item not found")
+                    else:
+                        # None for a deleted occurrence
+                        item = find_occurrence(series, stamp)
+                        results[index] = BatchItemResult(index=index, id=item_id, status=success_status, item=item)
+
+        await asyncio.gather(*(run(series_id, edits) for series_id, edits in occurrences.items()))
+
+    async def _single_flight(self, operation: str, key: tuple, read: Callable[[], Awaitable]):
+        if self.reads is None:
+            return await read()
+        return await self.reads.do(operation, key, read)
+
+    def _written(self, group_id: str):
+        # Reads of the group already in flight may predate the write; later callers must not join them
+        if self.reads is not None:
+            self.reads.forget(str(group_id))
+
+    async def _publish(self, group_id: str, event_type: AgendaEventType, item_id: str, item: Optional[AgendaResponse] = None):
+        if not self.events:
+            return
+        try:
+            await self.events.publish(group_id, AgendaEvent.model_construct(type=event_type, id=item_id, item=item))
+        except Exception as e:
+            # The write itself succeeded; subscribers that miss the event catch up through delta sync
+            logger.warning("Error publishing agenda event: %s", e)
+
+
+def _to_response(
+        item_id: str,
+        created: datetime,
+        updated: datetime,
+        summary: str,
+        description: Optional[str],
+        location: Optional[str],
+        item_type: ItemType,
+        time_slot: TimeSlot,
+        recurrence: Optional[Recurrence] = None
+) -> AgendaResponse:
+    return AgendaResponse(
+        id=item_id,
+        summary=summary,
+        description=description,
+        location=location,
+        itemType=item_type,
+        created=created,
+        updated=updated,
+        timeSlot=time_slot,
+        recurrence=recurrence
+    )
+
+
+def _to_entity(
+        group_id: str,
+        row_key: str,
+        summary: str,
+        description: Optional[str],
+        location: Optional[str],
+        item_type: ItemType,
+        time_slot: TimeSlot,
+        created: datetime,
+        updated: datetime,
+        recurrence: Optional[Recurrence] = None
+) -> dict:
+    entity = {
+        "PartitionKey": group_id,
+        "RowKey": row_key,
+        "summary": summary,
+        "description": description,
+        "location": location,
+        "itemType": item_type.value,
+        "created": created.isoformat(),
+        "updated": updated.isoformat(),
+        "timeSlotStart": time_slot.start.isoformat(),
+        "timeSlotEnd": time_slot.end.isoformat()
+    }
+    if recurrence is not None:
+        # One entity for the whole series; the bounds let date windows find it (see src/repositories/base.py)
+        series_start, series_end = series_span(time_slot, recurrence)
+        entity["recurrence"] = recurrence.model_dump_json()
+        entity["seriesStart"] = series_start.isoformat()
+        entity["seriesEnd"] = series_end.isoformat()
+    return entity
+
+
+def _series_fields(series: AgendaResponse, recurrence: Recurrence) -> dict:
+    """The fields of recurring item `series` with its rule replaced by `recurrence`."""
+    return dict(
+        summary=series.summary,
+        description=series.description,
+        location=series.location,
+        item_type=series.itemType,
+        time_slot=series.timeSlot,
+        recurrence=recurrence
+    )
+
+
+def _busy_slots(time_slot: TimeSlot, item_type: ItemType, recurrence: Optional[Recurrence]) -> List[Tuple[datetime, datetime]]:
+    """The UTC slots an item takes from the group's time: none for a log, every occurrence of a recurring event."""
+    if item_type != ItemType.EVENT:
+        return []
+    if recurrence is not None:
+        return occurrence_slots(time_slot, recurrence)
+    return [(as_utc(time_slot.start), as_utc(time_slot.end))]
+
+
+def _overlapping(index: IntervalIndex, slots: List[Tuple[datetime, datetime]]) -> set:
+    """Keys of the intervals in `index` overlapping any of `slots`; slots that only touch do not overlap."""
+    keys = set()
+    for start, end in slots:
+        keys.update(
+            key for key, other_start, other_end in index.intervals(start, end)
+            if other_start < end and start < other_end
+        )
+    return keys
+
+
+def _conflict_message(conflicting: List[str]) -> str:
+    listed = ", ".join(conflicting[:MAX_LISTED_CONFLICTS])
+    more = f" and {len(conflicting) - MAX_LISTED_CONFLICTS} more" if len(conflicting) > MAX_LISTED_CONFLICTS else ""
+    return f"The time slot overlaps agenda items {listed}{more}"
+
+
+def _check_occurrence_fields(fields: dict):
+    if fields["recurrence"] is not None:
+        raise APIException("A single occurrence of a recurring item cannot recur itself", ErrorCode.BAD_REQUEST)
+
+
+def _override_occurrence(recurrence: Recurrence, start: datetime, fields: dict, now: datetime) -> Recurrence:
+    """`recurrence` with its occurrence at `start` replaced by `fields`."""
+    override = OccurrenceOverride(
+        originalStart=start,
+        summary=fields["summary"],
+        description=fields["description"],
+        location=fields["location"],
+        itemType=fields["item_type"],
+        updated=now,
+        timeSlot=fields["time_slot"]
+    )
+    recurrence = with_override(recurrence, override)
+    if len(recurrence.overrides) > MAX_RECURRENCE_OVERRIDES:
+        raise APIException(
+            f"A recurring item holds at most {MAX_RECURRENCE_OVERRIDES} changed occurrences; split the series",
+            ErrorCode.BAD_REQUEST
+        )
+    _check_stored_length(recurrence)
+    return recurrence
+
+
+def _skip_occurrence(recurrence: Recurrence, start: datetime) -> Recurrence:
+    """`recurrence` with its occurrence at `start` left out."""
+    recurrence = with_exception(recurrence, start)
+    if len(recurrence.exceptions) > MAX_RECURRENCE_EXCEPTIONS:
+        raise APIException(
+            f"A recurring item holds at most {MAX_RECURRENCE_EXCEPTIONS} deleted occurrences; split the series",
+            ErrorCode.BAD_REQUEST
+        )
+    _check_stored_length(recurrence)
+    return recurrence
+
+
+def _check_stored_length(recurrence: Recurrence):
+    # Checked before the write: a property over the storage's limit would fail it with a 5xx
+    if stored_length(recurrence) > MAX_RECURRENCE_LENGTH:
+        raise APIException(
+            "The changed and deleted occurrences of this recurring item no longer fit in it; split the series",
+            ErrorCode.BAD_REQUEST
+        )
+
+
+def _occurrence_edits(item_ids: List[str]) -> Dict[str, List[Tuple[int, str, str]]]:
+    """The occurrence ids of a batch as (index, occurrence id, stamp), grouped by series id."""
+    edits: Dict[str, List[Tuple[int, str, str]]] = {}
+    for index, item_id in enumerate(item_ids):
+        occurrence = parse_occurrence_id(item_id)
+        if occurrence is not None:
+            series_id, stamp = occurrence
+            edits.setdefault(series_id, []).append((index, item_id, stamp))
+    return edits
+
+
+def _stored_ids(item_ids: List[str]) -> List[Optional[str]]:
+    """`item_ids` with occurrence ids blanked out: the items a batch reads and writes by themselves."""
+    return [None if parse_occurrence_id(item_id) is not None else item_id for item_id in item_ids]
+
+
+def _occurrences(item: AgendaResponse, start_date: Optional[datetime], end_date: Optional[datetime]) -> List[AgendaResponse]:
+    if item.recurrence is None or not (start_date or end_date):
+        return [item]
+    return expand_series(item, start_date, end_date)
+
+
+def _batch_error(index: int, item_id: Optional[str], error_code: ErrorCode, message: str) -> BatchItemResult:
+    return BatchItemResult(
+        index=index,
+        id=item_id,
+        status=error_code.status,
+        error=BatchItemError(code=error_code.code, message=message)
+    )
+
+
+def _batch_error_from(index: int, item_id: Optional[str], error: HTTPException) -> BatchItemResult:
+    """The result of a batch item for the error the same single-item request would have raised."""
+    if isinstance(error.detail, dict):
+        item_error = BatchItemError(code=error.detail["code"], message=error.detail["message"])
+    else:
+        item_error = BatchItemError(code=ErrorCode.INTERNAL_SERVER_ERROR.code, message=str(error.detail))
+    return BatchItemResult(index=index, id=item_id, status=error.status_code, error=item_error)
+
+
+def _batch_error_for(error: Exception) -> Tuple[ErrorCode, str]:
+    if isinstance(error, EntityExistsError):
+        return ErrorCode.BAD_REQUEST, "An agenda item with this identifier already exists"
+    if isinstance(error, EntityNotFoundError):
+        return ErrorCode.ITEM_NOT_FOUND, "Agenda item not found"
+    if isinstance(error, EntityModifiedError):
+        return ErrorCode.PRECONDITION_FAILED, "The agenda item was modified concurrently, retry the update"
+    if isinstance(error, StorageUnavailableError):
+        return ErrorCode.STORAGE_UNAVAILABLE, "Agenda storage is temporarily unavailable, retry later"
+    return ErrorCode.INTERNAL_SERVER_ERROR, "Failed to write agenda item"
+
+
+def _storage_error(error: Exception, message: str) -> HTTPException:
+    """503 with Retry-After while the storage is unavailable, otherwise a 500 with `message`."""
+    if isinstance(error, StorageUnavailableError):
+        return APIException(
+            "Agenda storage is temporarily unavailable, retry later",
+            ErrorCode.STORAGE_UNAVAILABLE,
+            headers={"Retry-After": str(math.ceil(error.retry_after))}
+        )
+    return HTTPException(status_code=500, detail=message)
@@ -15,12 +15,114 @@ class Settings(BaseSettings):
     PORT: int = os.getenv("PORT", 8080)
     LOG_LEVEL: str = os.getenv("LOG_LEVEL", "info")
 
+    # Production server (python -m src.server); WEB_LIMIT_CONCURRENCY=0 means no limit
+    WEB_WORKERS: int = os.getenv("WEB_WORKERS", 1)
+    WEB_BACKLOG: int = os.getenv("WEB_BACKLOG", 2048)
+    WEB_LIMIT_CONCURRENCY: int = os.getenv("WEB_LIMIT_CONCURRENCY", 0)
+    WEB_KEEPALIVE_SECONDS: int = os.getenv("WEB_KEEPALIVE_SECONDS", 75)
+    WEB_GRACEFUL_SHUTDOWN_SECONDS: int = os.getenv("WEB_GRACEFUL_SHUTDOWN_SECONDS", 20)
+    # Where workers share their metrics when WEB_WORKERS > 1; emptied at startup
+    PROMETHEUS_MULTIPROC_DIR: Optional[str] = os.getenv("PROMETHEUS_MULTIPROC_DIR")
+    # "json" (one object per line) or "text"
+    LOG_FORMAT: str = os.getenv("LOG_FORMAT", "json")
+    # Fraction of the below-WARNING records kept per logger, e.g. "uvicorn.access=0.1,src.auth.middleware=0.01"
+    LOG_SAMPLE_RATES: str = os.getenv("LOG_SAMPLE_RATES", "")
+
     ACCESS_TOKEN_COOKIE_NAME: str = os.getenv("ACCESS_TOKEN_COOKIE_NAME", "access_token")
     KEYCLOAK_PUBLIC_KEY: Optional[str] = os.getenv("KEYCLOAK_PUBLIC_KEY")
     JWT_VALIDATION_ENABLED: bool = os.getenv("JWT_VALIDATION_ENABLED", True)
+    # Verified tokens are remembered until their exp claim (capped by the max TTL); 0 disables the cache
+    JWT_CACHE_SIZE: int = os.getenv("JWT_CACHE_SIZE", 4096)
+    JWT_CACHE_MAX_TTL_SECONDS: float = os.getenv("JWT_CACHE_MAX_TTL_SECONDS", 300)
+
+    # Admission control (src/admission): at most ADMISSION_MAX_IN_FLIGHT requests run at once and up to
+    # ADMISSION_MAX_QUEUE more wait ADMISSION_QUEUE_TIMEOUT_SECONDS for a slot; others get 503. A group
+    # gets 429 beyond ADMISSION_GROUP_MAX_IN_FLIGHT concurrent requests or ADMISSION_GROUP_RATE requests
+    # per second (bursts of up to ADMISSION_GROUP_BURST). 0 disables a limit
+    ADMISSION_CONTROL_ENABLED: bool = os.getenv("ADMISSION_CONTROL_ENABLED", True)
+    ADMISSION_MAX_IN_FLIGHT: int = os.getenv("ADMISSION_MAX_IN_FLIGHT", 256)
+    ADMISSION_MAX_QUEUE: int = os.getenv("ADMISSION_MAX_QUEUE", 256)
+    ADMISSION_QUEUE_TIMEOUT_SECONDS: float = os.getenv("ADMISSION_QUEUE_TIMEOUT_SECONDS", 1)
+    ADMISSION_GROUP_MAX_IN_FLIGHT: int = os.getenv("ADMISSION_GROUP_MAX_IN_FLIGHT", 16)
+    ADMISSION_GROUP_RATE: float = os.getenv("ADMISSION_GROUP_RATE", 50)
+    ADMISSION_GROUP_BURST: int = os.getenv("ADMISSION_GROUP_BURST", 100)
+
+    # Stages of request handling also become OpenTelemetry spans (needs opentelemetry-api and a configured SDK)
+    TRACING_ENABLED: bool = os.getenv("TRACING_ENABLED", False)
+
+    # Readiness (/manage/ready) is re-checked at most this often, and fails when the storage does not
+    # answer within the timeout, the event loop lags more than the max or the storage pool is this full
+    HEALTH_CACHE_SECONDS: float = os.getenv("HEALTH_CACHE_SECONDS", 2)
+    HEALTH_STORAGE_TIMEOUT_SECONDS: float = os.getenv("HEALTH_STORAGE_TIMEOUT_SECONDS", 1)
+    HEALTH_MAX_LOOP_LAG_SECONDS: float = os.getenv("HEALTH_MAX_LOOP_LAG_SECONDS", 0.5)
+    HEALTH_MAX_POOL_SATURATION: float = os.getenv("HEALTH_MAX_POOL_SATURATION", 0.9)
+
+    # Storage engine: "azure" (Table Storage), "sqlite" (file at SQLITE_PATH) or "memory" (process-local)
+    STORAGE_BACKEND: str = os.getenv("STORAGE_BACKEND", "azure")
+    SQLITE_PATH: str = os.getenv("SQLITE_PATH", "agenda.db")
+
+    # Resilience layer around the storage engine (see src/repositories/resilient_repository.py): every
+    # call gets a deadline, reads are retried with jittered backoff while the retry budget (a share of
+    # recent calls) allows, and after STORAGE_CIRCUIT_FAILURES failures in a row calls fail fast for
+    # STORAGE_CIRCUIT_OPEN_SECONDS. Hedged point reads send a second read when the first is slower
+    # than the recent p95 (but at least STORAGE_HEDGE_MIN_DELAY_SECONDS)
+    STORAGE_RESILIENCE_ENABLED: bool = os.getenv("STORAGE_RESILIENCE_ENABLED", True)
+    STORAGE_READ_TIMEOUT_SECONDS: float = os.getenv("STORAGE_READ_TIMEOUT_SECONDS", 2)
+    STORAGE_WRITE_TIMEOUT_SECONDS: float = os.getenv("STORAGE_WRITE_TIMEOUT_SECONDS", 5)
+    STORAGE_READ_RETRIES: int = os.getenv("STORAGE_READ_RETRIES", 2)
+    STORAGE_RETRY_BACKOFF_SECONDS: float = os.getenv("STORAGE_RETRY_BACKOFF_SECONDS", 0.05)
+    STORAGE_RETRY_BUDGET_RATIO: float = os.getenv("STORAGE_RETRY_BUDGET_RATIO", 0.2)
+    STORAGE_CIRCUIT_FAILURES: int = os.getenv("STORAGE_CIRCUIT_FAILURES", 5)
+    STORAGE_CIRCUIT_OPEN_SECONDS: float = os.getenv("STORAGE_CIRCUIT_OPEN_SECONDS", 10)
+    STORAGE_HEDGED_READS_ENABLED: bool = os.getenv("STORAGE_HEDGED_READS_ENABLED", False)
+    STORAGE_HEDGE_MIN_DELAY_SECONDS: float = os.getenv("STORAGE_HEDGE_MIN_DELAY_SECONDS", 0.01)
 
     # Add these new settings
-    AZURE_STORAGE_CONNECTION_STRING: str = os.getenv("AZURE_STORAGE_CONNECTION_STRING")
+    AZURE_STORAGE_CONNECTION_STRING: Optional[str] = os.getenv("AZURE_STORAGE_CONNECTION_STRING")
     AZURE_STORAGE_TABLE_NAME: str = os.getenv("AZURE_STORAGE_TABLE_NAME", "agendaitems")
 
+    # Shared connection pool used by the application-scoped table client
+    AZURE_TABLE_POOL_SIZE: int = os.getenv("AZURE_TABLE_POOL_SIZE", 100)
+    AZURE_TABLE_POOL_SIZE_PER_HOST: int = os.getenv("AZURE_TABLE_POOL_SIZE_PER_HOST", 0)
+    AZURE_TABLE_KEEPALIVE_SECONDS: float = os.getenv("AZURE_TABLE_KEEPALIVE_SECONDS", 30)
+    AZURE_TABLE_CONNECT_TIMEOUT: float = os.getenv("AZURE_TABLE_CONNECT_TIMEOUT", 5)
+    AZURE_TABLE_READ_TIMEOUT: float = os.getenv("AZURE_TABLE_READ_TIMEOUT", 30)
+
+    # Time index (see src/repositories/time_index.py); enable reads once src.migrations.add_time_index has run
+    AZURE_TABLE_INDEX_READS_ENABLED: bool = os.getenv("AZURE_TABLE_INDEX_READS_ENABLED", False)
+    AZURE_TABLE_INDEX_MAX_SHORT_SPAN_HOURS: int = os.getenv("AZURE_TABLE_INDEX_MAX_SHORT_SPAN_HOURS", 24)
+
+    # Per-group agenda cache; TTL bounds staleness of writes made through other replicas
+    AGENDA_CACHE_ENABLED: bool = os.getenv("AGENDA_CACHE_ENABLED", True)
+    AGENDA_CACHE_TTL_SECONDS: float = os.getenv("AGENDA_CACHE_TTL_SECONDS", 30)
+    AGENDA_CACHE_MAX_GROUPS: int = os.getenv("AGENDA_CACHE_MAX_GROUPS", 1000)
+    AGENDA_CACHE_MAX_ITEMS: int = os.getenv("AGENDA_CACHE_MAX_ITEMS", 50000)
+    # Expired views are kept this much longer, and only served while the storage is unavailable
+    AGENDA_CACHE_STALE_SECONDS: float = os.getenv("AGENDA_CACHE_STALE_SECONDS", 300)
+
+    # Concurrent identical storage reads (same group and query) share one call and its result
+    AGENDA_SINGLE_FLIGHT_ENABLED: bool = os.getenv("AGENDA_SINGLE_FLIGHT_ENABLED", True)
+
+    # Page size used when a client sends a continuationToken without a limit
+    AGENDA_DEFAULT_PAGE_SIZE: int = os.getenv("AGENDA_DEFAULT_PAGE_SIZE", 100)
+
+    # Number of transactions (or point reads) a batch request runs at the same time
+    AGENDA_BATCH_CONCURRENCY: int = os.getenv("AGENDA_BATCH_CONCURRENCY", 4)
+
+    # Delta sync: tombstones of deleted items are kept this long (older sync tokens get 410 Gone), and
+    # sync tokens lag the clock by the skew so writes still in flight on any replica are not skipped
+    AGENDA_TOMBSTONE_RETENTION_DAYS: float = os.getenv("AGENDA_TOMBSTONE_RETENTION_DAYS", 30)
+    AGENDA_SYNC_CLOCK_SKEW_SECONDS: float = os.getenv("AGENDA_SYNC_CLOCK_SKEW_SECONDS", 5)
+
+    # Most occurrences of one recurring item a date-window read returns (open-ended windows included)
+    AGENDA_RECURRENCE_MAX_OCCURRENCES: int = os.getenv("AGENDA_RECURRENCE_MAX_OCCURRENCES", 1000)
+
+    # Server-sent events (GET /agenda/events); the "local" broker only reaches streams of this process
+    EVENT_BROKER: str = os.getenv("EVENT_BROKER", "local")
+    # Events buffered per stream; a client falling further behind is disconnected and resyncs
+    EVENT_QUEUE_SIZE: int = os.getenv("EVENT_QUEUE_SIZE", 256)
+    EVENT_HEARTBEAT_SECONDS: float = os.getenv("EVENT_HEARTBEAT_SECONDS", 15)
+    # Streams end after this long, so clients reconnect and spread over the replicas again
+    EVENT_STREAM_MAX_SECONDS: float = os.getenv("EVENT_STREAM_MAX_SECONDS", 300)
+
 settings = Settings()
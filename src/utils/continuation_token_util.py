@@ -0,0 +1,25 @@
+import base64
+import json
+from typing import Optional
+
+from src.exceptions.api_exception import APIException
+from src.exceptions.error_codes import ErrorCode
+
+
+def encode_continuation_token(token: Optional[dict]) -> Optional[str]:
+    # Azure continuation tokens are small dicts (next PartitionKey/RowKey); clients only see an opaque string
+    if not token:
+        return None
+    return base64.urlsafe_b64encode(json.dumps(token, separators=(",", ":")).encode()).decode().rstrip("=")
+
+
+def decode_continuation_token(token: Optional[str]) -> Optional[dict]:
+    if not token:
+        return None
+    try:
+        decoded = json.loads(base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)))
+        if not isinstance(decoded, dict):
+            raise ValueError("continuation token must decode to an object")
+        return decoded
+    except ValueError:
+        raise APIException("Invalid continuation token", ErrorCode.BAD_REQUEST)
@@ -0,0 +1,53 @@
+import hashlib
+from typing import Iterable, Optional
+
+from starlette.responses import Response
+
+from src.responses.agenda_response import AgendaResponse
+
+# Responses are per user; clients (and only clients) may keep them but must revalidate each time
+CACHE_CONTROL = "private, no-cache"
+
+
+def _weak_etag(*parts) -> str:
+    digest = hashlib.blake2b("|".join(str(part) for part in parts).encode(), digest_size=8).hexdigest()
+    return f'W/"{digest}"'
+
+
+def item_etag(item: AgendaResponse) -> str:
+    # Every write sets `updated`, so it versions the item without reading the storage ETag
+    return _weak_etag(item.id, item.updated.isoformat())
+
+
+def collection_etag(items: Iterable[AgendaResponse], *query) -> str:
+    """
+    Version of a list response: item count and latest `updated`, plus the query (window, page) it
+    answers. A create or update raises the latest `updated`, a delete lowers the count.
+    """
+    count, latest = 0, ""
+    for item in items:
+        count += 1
+        updated = item.updated.isoformat()
+        if updated > latest:
+            latest = updated
+    return _weak_etag(count, latest, *query)
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak comparison of `etag` against an If-None-Match header value."""
+    if not if_none_match:
+        return False
+    opaque = etag.removeprefix("W/")
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == opaque:
+            return True
+    return False
+
+
+def caching_headers(etag: str) -> dict:
+    return {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+
+
+def not_modified_response(etag: str) -> Response:
+    return Response(status_code=304, headers=caching_headers(etag))
@@ -0,0 +1,89 @@
+"""
+Per-stage timings of request handling, on top of the whole-request histograms of the Instrumentator:
+authentication, storage calls (see src/repositories/instrumented_repository.py), decoding entities
+and rendering JSON. Each stage is observed in `agenda_request_stage_seconds{stage, operation}`.
+
+With TRACING_ENABLED every stage is also an OpenTelemetry span, a child of whatever span is current
+(e.g. the request span of an auto-instrumented process). `opentelemetry-api` is not a dependency of
+the service: without it, or without TRACING_ENABLED, spans are not created at all.
+"""
+import logging
+import time
+from contextlib import nullcontext
+from functools import lru_cache
+from typing import ContextManager
+
+from prometheus_client.metrics import MetricWrapperBase
+
+from src.metrics import REQUEST_STAGE_SECONDS, STORAGE_ENTITIES_SCANNED
+from src.settings import settings
+
+logger = logging.getLogger(__name__)
+
+_tracer = None
+_tracer_loaded = False
+
+
+def _get_tracer():
+    global _tracer, _tracer_loaded
+    if not _tracer_loaded:
+        _tracer_loaded = True
+        if settings.TRACING_ENABLED:
+            try:
+                from opentelemetry import trace
+                _tracer = trace.get_tracer("agenda-service")
+            except ImportError:
+                logger.warning("TRACING_ENABLED is set but opentelemetry-api is not installed; no spans are created")
+    return _tracer
+
+
+def span(name: str, **attributes) -> ContextManager:
+    """An OpenTelemetry span when tracing is enabled, otherwise a context manager doing nothing."""
+    tracer = _get_tracer()
+    if tracer is None:
+        return nullcontext()
+    return tracer.start_as_current_span(name, attributes=attributes)
+
+
+@lru_cache(maxsize=None)
+def labelled(metric: MetricWrapperBase, *values: str):
+    """`metric.labels(*values)`, looked up once: `labels()` takes a lock and costs more than observing."""
+    return metric.labels(*values)
+
+
+class _Stage:
+    __slots__ = ("histogram", "span", "started")
+
+    def __init__(self, name: str, operation: str):
+        self.histogram = labelled(REQUEST_STAGE_SECONDS, name, operation)
+        tracer = _get_tracer()
+        self.span = tracer.start_as_current_span(f"{name} {operation}", attributes={"operation": operation}) if tracer else None
+
+    def __enter__(self):
+        if self.span is not None:
+            self.span.__enter__()
+        self.started = time.perf_counter()
+
+    def __exit__(self, *exc_info):
+        self.histogram.observe(time.perf_counter() - self.started)
+        if self.span is not None:
+            return self.span.__exit__(*exc_info)
+
+
+def stage(name: str, operation: str) -> ContextManager:
+    """Times the enclosed block as stage `name` of `operation` (called in every request, so kept cheap)."""
+    return _Stage(name, operation)
+
+
+def observe_stage(name: str, operation: str, seconds: float):
+    """Records a stage timed by the caller, for work spread over a loop (no span)."""
+    labelled(REQUEST_STAGE_SECONDS, name, operation).observe(seconds)
+
+
+def record_discarded(operation: str, count: int):
+    """
+    Counts entities a storage engine read but did not return (filtered after the read). Engines that
+    return everything they read do not call this; scanned then equals returned.
+    """
+    if count:
+        labelled(STORAGE_ENTITIES_SCANNED, operation).inc(count)
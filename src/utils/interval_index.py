@@ -0,0 +1,96 @@
+from bisect import bisect_left, bisect_right, insort
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from src.utils.time_window_util import as_utc
+
+
+class IntervalIndex:
+    """
+    Time intervals keyed by id, kept sorted by start, answering "which intervals overlap [start, end]".
+
+    Only intervals starting at most `max_span` (the longest interval seen) before `start` can still
+    overlap it, so a query is two binary searches plus a scan of that slice, the same bound the
+    storage time index uses. `max_span` does not shrink on removal until the index is emptied.
+    Intervals longer than `long_span` (such as recurring series without an end) are kept apart and
+    checked one by one instead, so they do not widen that slice for every query.
+    All datetimes are compared in UTC; naive ones are taken as UTC.
+    """
+
+    def __init__(self, long_span: timedelta = timedelta(days=31)):
+        self.long_span = long_span
+        self._starts: List[Tuple[datetime, str]] = []
+        self._long: Dict[str, Tuple[datetime, datetime]] = {}
+        self._intervals: Dict[str, Tuple[datetime, datetime]] = {}
+        self._max_span = timedelta(0)
+
+    @classmethod
+    def build(cls, intervals: Iterable[Tuple[str, datetime, datetime]], long_span: timedelta = timedelta(days=31)) -> "IntervalIndex":
+        """An index of (key, start, end) intervals with unique keys, sorted once instead of inserted one by one."""
+        index = cls(long_span)
+        for key, start, end in intervals:
+            start, end = as_utc(start), as_utc(end)
+            index._intervals[key] = (start, end)
+            if end - start > long_span:
+                index._long[key] = (start, end)
+            else:
+                index._starts.append((start, key))
+                index._max_span = max(index._max_span, end - start)
+        index._starts.sort()
+        return index
+
+    def __len__(self) -> int:
+        return len(self._intervals)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._intervals
+
+    def get(self, key: str) -> Optional[Tuple[datetime, datetime]]:
+        return self._intervals.get(key)
+
+    def add(self, key: str, start: datetime, end: datetime) -> None:
+        self.remove(key)
+        start, end = as_utc(start), as_utc(end)
+        self._intervals[key] = (start, end)
+        if end - start > self.long_span:
+            self._long[key] = (start, end)
+            return
+        insort(self._starts, (start, key))
+        self._max_span = max(self._max_span, end - start)
+
+    def remove(self, key: str) -> None:
+        interval = self._intervals.pop(key, None)
+        if interval is None:
+            return
+        if self._long.pop(key, None) is not None:
+            return
+        position = bisect_left(self._starts, (interval[0], key))
+        del self._starts[position]
+        if not self._intervals:
+            self._max_span = timedelta(0)
+
+    def overlapping(self, start: Optional[datetime], end: Optional[datetime]) -> List[str]:
+        """Keys of the intervals overlapping [start, end] (either bound may be open), ordered by start."""
+        start = as_utc(start) if start else None
+        end = as_utc(end) if end else None
+        low = bisect_left(self._starts, start - self._max_span, key=_start) if start else 0
+        high = bisect_right(self._starts, end, key=_start) if end else len(self._starts)
+        keys = [
+            key for _, key in self._starts[low:high]
+            if start is None or self._intervals[key][1] >= start
+        ]
+        long_keys = [
+            key for key, (long_start, long_end) in self._long.items()
+            if (start is None or long_end >= start) and (end is None or long_start <= end)
+        ]
+        if long_keys:
+            keys = sorted(keys + long_keys, key=lambda key: (self._intervals[key][0], key))
+        return keys
+
+    def intervals(self, start: Optional[datetime], end: Optional[datetime]) -> List[Tuple[str, datetime, datetime]]:
+        """Like `overlapping`, with the (UTC) bounds of each interval."""
+        return [(key, *self._intervals[key]) for key in self.overlapping(start, end)]
+
+
+def _start(entry: Tuple[datetime, str]) -> datetime:
+    return entry[0]
@@ -0,0 +1,146 @@
+"""
+Process-wide logging setup.
+
+Records are handed to a `QueueHandler` on the calling thread and written to stderr by a
+`QueueListener` thread, so formatting to JSON and the write itself never run on the event loop.
+Messages use %-style arguments, which are only merged once a record passed the level check and
+the sampling filters. Uvicorn's own handlers are replaced, so access and server logs go through
+the same pipeline.
+"""
+import atexit
+import copy
+import json
+import logging
+import random
+import sys
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from queue import SimpleQueue
+from typing import Dict, Iterable, Optional
+
+from src.settings import settings
+
+UVICORN_LOGGERS = ("uvicorn", "uvicorn.error", "uvicorn.access")
+# Scraped and probed constantly; never worth an access log line
+EXCLUDED_ACCESS_PATHS = frozenset({"/metrics", "/manage/health", "/manage/live", "/manage/ready"})
+
+# Attributes every LogRecord has; anything else was passed through `extra=`
+_RECORD_ATTRIBUTES = frozenset(vars(logging.makeLogRecord({}))) | {"message", "asctime", "taskName"}
+
+_listener: Optional[QueueListener] = None
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line, including the fields passed through `extra=`."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        document = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRIBUTES:
+                document[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            document["exception"] = record.exc_text
+        return json.dumps(document, default=str)
+
+
+class _DeferredQueueHandler(QueueHandler):
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Unlike the default, leave formatting to the listener's handler; only merge the arguments
+        # (the caller may mutate them afterwards) and render the traceback while it is still current.
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+class SamplingFilter(logging.Filter):
+    """Keeps a fraction of the records below WARNING; warnings and errors always pass."""
+
+    def __init__(self, rate: float):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        return record.levelno >= logging.WARNING or random.random() < self.rate
+
+
+class ExcludePathFilter(logging.Filter):
+    """Drops uvicorn access log lines for the given request paths (query string ignored)."""
+
+    def __init__(self, excluded_paths: Iterable[str]):
+        super().__init__()
+        self.excluded_paths = frozenset(excluded_paths)
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        # uvicorn.access records carry (client_addr, method, full_path, http_version, status_code)
+        if isinstance(record.args, tuple) and len(record.args) == 5:
+            return str(record.args[2]).split("?", 1)[0] not in self.excluded_paths
+        return True
+
+
+def parse_sample_rates(value: str) -> Dict[str, float]:
+    """Parses "logger=rate,logger=rate" into a mapping, e.g. "uvicorn.access=0.1"."""
+    rates = {}
+    for entry in filter(None, (part.strip() for part in value.split(","))):
+        name, _, rate = entry.partition("=")
+        rates[name.strip()] = min(max(float(rate), 0.0), 1.0)
+    return rates
+
+
+def _level(name: str) -> int:
+    # Also accepts uvicorn's "trace", which uvicorn registers as a level name on import
+    level = logging.getLevelName(name.upper())
+    return level if isinstance(level, int) else logging.INFO
+
+
+def configure_logging() -> None:
+    global _listener
+    if _listener is not None:
+        return
+
+    output = logging.StreamHandler(sys.stderr)
+    if settings.LOG_FORMAT == "json":
+        output.setFormatter(JsonFormatter())
+    else:
+        output.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(_DeferredQueueHandler(SimpleQueue()))
+    root.setLevel(_level(settings.LOG_LEVEL))
+
+    for name in UVICORN_LOGGERS:
+        uvicorn_logger = logging.getLogger(name)
+        uvicorn_logger.handlers.clear()
+        uvicorn_logger.propagate = True
+        uvicorn_logger.setLevel(logging.NOTSET)
+    # Startup chatter only; errors still come through
+    logging.getLogger("uvicorn.error").setLevel(max(_level(settings.LOG_LEVEL), logging.WARNING))
+    logging.getLogger("uvicorn.access").addFilter(ExcludePathFilter(EXCLUDED_ACCESS_PATHS))
+
+    for name, rate in parse_sample_rates(settings.LOG_SAMPLE_RATES).items():
+        if rate < 1.0:
+            logging.getLogger(name).addFilter(SamplingFilter(rate))
+
+    _listener = QueueListener(root.handlers[0].queue, output)
+    _listener.start()
+    atexit.register(stop_logging)
+
+
+def stop_logging() -> None:
+    """Flushes the queued records; registered at exit, safe to call more than once."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
@@ -0,0 +1,319 @@
+"""
+Recurring agenda items. A series is stored as a single item: the time slot of its first occurrence
+plus a `recurrence` rule, a subset of RFC 5545 RRULE (FREQ=DAILY/WEEKLY/MONTHLY with INTERVAL, BYDAY
+for weekly series, COUNT or UNTIL, and EXDATE as `exceptions`), and the occurrences edited one by one
+as `overrides`. Nothing is stored per occurrence: reads with a date window expand the series into the
+occurrences inside the window. Daily and weekly series jump straight to the window; monthly ones
+(twelve steps a year) are walked from their start when they have a COUNT, to number the occurrences.
+
+Occurrences repeat at the same local time of the series' `timeZone` (or of the start's own UTC offset
+without one) and keep the duration of the first. An occurrence's id is the series id plus its original
+start in UTC, `<series id>_20240117T080000Z`, so single occurrences can be read, replaced (an override)
+and deleted (an exception) by id.
+"""
+from datetime import MAXYEAR, datetime, timedelta, timezone, tzinfo
+from typing import Dict, Iterator, List, Optional, Tuple
+from zoneinfo import ZoneInfo
+
+from src.enums.recurrence import RecurrenceFrequency, Weekday
+from src.responses.agenda_response import AgendaResponse, OccurrenceOverride, Recurrence, TimeSlot
+from src.settings import settings
+from src.utils.time_window_util import as_utc, overlaps_window
+
+OCCURRENCE_SEPARATOR = "_"
+STAMP_FORMAT = "%Y%m%dT%H%M%SZ"
+
+# Stored as the end of series without COUNT or UNTIL
+OPEN_END = datetime(9999, 12, 31, tzinfo=timezone.utc)
+
+_WEEKDAY_NUMBERS = {day: number for number, day in enumerate(Weekday)}
+
+
+def occurrence_stamp(start: datetime) -> str:
+    return as_utc(start).strftime(STAMP_FORMAT)
+
+
+def occurrence_id(series_id: str, original_start: datetime) -> str:
+    return f"{series_id}{OCCURRENCE_SEPARATOR}{occurrence_stamp(original_start)}"
+
+
+def parse_occurrence_id(item_id: str) -> Optional[Tuple[str, str]]:
+    """(series id, stamp) of an occurrence id; None for the id of a stored item, as uuids hold no '_'."""
+    series_id, separator, stamp = str(item_id).rpartition(OCCURRENCE_SEPARATOR)
+    if not separator or not series_id:
+        return None
+    return series_id, stamp
+
+
+def series_weekday(start: datetime, time_zone: Optional[str]) -> Weekday:
+    """The weekday a series starting at `start` starts on, in the series' local time."""
+    return list(Weekday)[_wall_clock(start, time_zone)[0].weekday()]
+
+
+def series_span(time_slot: TimeSlot, recurrence: Recurrence) -> Tuple[datetime, datetime]:
+    """
+    UTC bounds around every occurrence of a series, overrides included, stored with the item so the
+    storage engines can match it against date windows. The end may lie somewhat after the last
+    occurrence; it is OPEN_END for series without COUNT or UNTIL.
+    """
+    start, end = as_utc(time_slot.start), as_utc(time_slot.end)
+    # Generous per-occurrence steps: a monthly series skips the months without its day of the month
+    step = {
+        RecurrenceFrequency.DAILY: timedelta(days=1),
+        RecurrenceFrequency.WEEKLY: timedelta(weeks=1),
+        RecurrenceFrequency.MONTHLY: timedelta(days=62),
+    }[recurrence.frequency] * recurrence.interval
+    try:
+        if recurrence.until is not None:
+            last_start = as_utc(recurrence.until)
+        elif recurrence.count is not None:
+            last_start = start + step * (recurrence.count - 1)
+        else:
+            last_start = OPEN_END
+        # A day of slack for the UTC offset changing over the series
+        series_end = min(max(end, last_start + (end - start) + timedelta(days=1)), OPEN_END)
+    except OverflowError:
+        series_end = OPEN_END
+
+    series_start = start
+    for override in recurrence.overrides:
+        series_start = min(series_start, as_utc(override.timeSlot.start))
+        series_end = max(series_end, as_utc(override.timeSlot.end))
+    return series_start, series_end
+
+
+def stored_length(recurrence: Recurrence) -> int:
+    """Length of `recurrence` as stored with its item, in the UTF-16 code units Table Storage limits properties by."""
+    return len(recurrence.model_dump_json().encode("utf-16-le")) // 2
+
+
+def item_span(item: AgendaResponse) -> Tuple[datetime, datetime]:
+    """UTC bounds of an item; for a recurring item, around all of its occurrences (see `series_span`)."""
+    if item.recurrence is None:
+        return as_utc(item.timeSlot.start), as_utc(item.timeSlot.end)
+    return series_span(item.timeSlot, item.recurrence)
+
+
+def expand_occurrences(items: List[AgendaResponse], start_date: Optional[datetime], end_date: Optional[datetime]) -> List[AgendaResponse]:
+    """
+    The items of a date-window read with every recurring item replaced by its occurrences in the
+    window, ordered by start. Without a window or without recurring items, `items` is returned as is.
+    """
+    if not (start_date or end_date) or all(item.recurrence is None for item in items):
+        return items
+    expanded = []
+    for item in items:
+        if item.recurrence is None:
+            expanded.append(item)
+        else:
+            expanded.extend(expand_series(item, start_date, end_date))
+    expanded.sort(key=lambda item: as_utc(item.timeSlot.start))
+    return expanded
+
+
+def expand_series(item: AgendaResponse, start_date: Optional[datetime], end_date: Optional[datetime]) -> List[AgendaResponse]:
+    """
+    The occurrences of recurring `item` overlapping [start_date, end_date] (either bound may be open),
+    ordered by start, at most AGENDA_RECURRENCE_MAX_OCCURRENCES of them.
+    """
+    recurrence = item.recurrence
+    excluded = {occurrence_stamp(start) for start in recurrence.exceptions}
+    overrides = _overrides(recurrence)
+    duration = as_utc(item.timeSlot.end) - as_utc(item.timeSlot.start)
+    limit = settings.AGENDA_RECURRENCE_MAX_OCCURRENCES
+
+    occurrences = []
+    for start in _generated(item.timeSlot, recurrence, start_date, end_date):
+        if len(occurrences) >= limit:
+            break
+        stamp = occurrence_stamp(start)
+        if stamp not in excluded and stamp not in overrides:
+            occurrences.append(_occurrence(item, start, TimeSlot.model_construct(start=start, end=start + duration)))
+
+    moved = [
+        _occurrence(item, override.originalStart, override.timeSlot, override)
+        for stamp, override in overrides.items()
+        if stamp not in excluded and overlaps_window(override.timeSlot, start_date, end_date)
+    ]
+    if moved:
+        occurrences = sorted(occurrences + moved, key=lambda occurrence: as_utc(occurrence.timeSlot.start))
+    return occurrences
+
+
+def occurrence_slots(time_slot: TimeSlot, recurrence: Recurrence) -> List[Tuple[datetime, datetime]]:
+    """
+    UTC (start, end) of the occurrences a rule generates from `time_slot`, exceptions left out, at most
+    AGENDA_RECURRENCE_MAX_OCCURRENCES of them: the slots a new or replaced series is going to take.
+    """
+    excluded = {occurrence_stamp(start) for start in recurrence.exceptions}
+    duration = as_utc(time_slot.end) - as_utc(time_slot.start)
+    limit = settings.AGENDA_RECURRENCE_MAX_OCCURRENCES
+
+    slots = []
+    for start in _generated(time_slot, recurrence, None, None):
+        if len(slots) >= limit:
+            break
+        if occurrence_stamp(start) not in excluded:
+            slots.append((as_utc(start), as_utc(start) + duration))
+    return slots
+
+
+def find_occurrence(item: AgendaResponse, stamp: str) -> Optional[AgendaResponse]:
+    """The occurrence of recurring `item` with the given original start stamp, if the series has it."""
+    start = original_start(item.timeSlot, item.recurrence, stamp)
+    if start is None:
+        return None
+    override = _overrides(item.recurrence).get(stamp)
+    if override is not None:
+        return _occurrence(item, start, override.timeSlot, override)
+    duration = as_utc(item.timeSlot.end) - as_utc(item.timeSlot.start)
+    return _occurrence(item, start, TimeSlot.model_construct(start=start, end=start + duration))
+
+
+def original_start(time_slot: TimeSlot, recurrence: Recurrence, stamp: str) -> Optional[datetime]:
+    """The start the rule gives the occurrence with `stamp`; None when it generates none there or it is an exception."""
+    try:
+        instant = datetime.strptime(stamp, STAMP_FORMAT).replace(tzinfo=timezone.utc)
+    except ValueError:
+        return None
+    if any(occurrence_stamp(start) == stamp for start in recurrence.exceptions):
+        return None
+    # Stamps are whole seconds; the start itself may not be
+    for start in _generated(time_slot, recurrence, instant, instant + timedelta(seconds=1)):
+        if occurrence_stamp(start) == stamp:
+            return start
+    return None
+
+
+def with_override(recurrence: Recurrence, override: OccurrenceOverride) -> Recurrence:
+    stamp = occurrence_stamp(override.originalStart)
+    overrides = [existing for existing in recurrence.overrides if occurrence_stamp(existing.originalStart) != stamp]
+    return recurrence.model_copy(update={"overrides": overrides + [override]})
+
+
+def with_exception(recurrence: Recurrence, start: datetime) -> Recurrence:
+    stamp = occurrence_stamp(start)
+    return recurrence.model_copy(update={
+        "exceptions": recurrence.exceptions + [start],
+        "overrides": [override for override in recurrence.overrides if occurrence_stamp(override.originalStart) != stamp],
+    })
+
+
+def kept_overrides(previous: Recurrence, time_slot: TimeSlot, recurrence: Recurrence) -> Recurrence:
+    """`recurrence` (a rule replacing `previous`) with the overrides of `previous` it still has occurrences for."""
+    overrides = [
+        override for override in previous.overrides
+        if original_start(time_slot, recurrence, occurrence_stamp(override.originalStart)) is not None
+    ]
+    return recurrence.model_copy(update={"overrides": overrides})
+
+
+def _overrides(recurrence: Recurrence) -> Dict[str, OccurrenceOverride]:
+    return {occurrence_stamp(override.originalStart): override for override in recurrence.overrides}
+
+
+def _occurrence(
+        item: AgendaResponse,
+        start: datetime,
+        time_slot: TimeSlot,
+        override: Optional[OccurrenceOverride] = None
+) -> AgendaResponse:
+    source = override or item
+    return AgendaResponse.model_construct(
+        id=occurrence_id(item.id, start),
+        summary=source.summary,
+        description=source.description,
+        location=source.location,
+        itemType=source.itemType,
+        created=item.created,
+        updated=source.updated,
+        timeSlot=time_slot,
+        seriesId=item.id,
+        originalStart=start
+    )
+
+
+def _wall_clock(start: datetime, time_zone: Optional[str]) -> Tuple[datetime, Optional[tzinfo]]:
+    """`start` as naive local time of the series, and the tzinfo that turns local times back into instants."""
+    if time_zone:
+        zone = ZoneInfo(time_zone)
+        return as_utc(start).astimezone(zone).replace(tzinfo=None), zone
+    return start.replace(tzinfo=None), start.tzinfo
+
+
+def _generated(
+        time_slot: TimeSlot,
+        recurrence: Recurrence,
+        start_date: Optional[datetime],
+        end_date: Optional[datetime]
+) -> Iterator[datetime]:
+    """Starts of the occurrences the rule generates (COUNT and UNTIL applied, exceptions not) overlapping the window."""
+    first, zone = _wall_clock(time_slot.start, recurrence.timeZone)
+    duration = as_utc(time_slot.end) - as_utc(time_slot.start)
+    window_start = as_utc(start_date) if start_date else None
+    window_end = as_utc(end_date) if end_date else None
+    until = as_utc(recurrence.until) if recurrence.until else None
+
+    earliest = None
+    if window_start is not None:
+        try:
+            earliest = (window_start - duration).astimezone(zone or timezone.utc).replace(tzinfo=None)
+        except OverflowError:
+            pass
+
+    for number, local_start in _rule_starts(first, recurrence, earliest):
+        if recurrence.count is not None and number >= recurrence.count:
+            return
+        start = local_start.replace(tzinfo=zone)
+        utc_start = as_utc(start)
+        if (until is not None and utc_start > until) or (window_end is not None and utc_start > window_end):
+            return
+        if window_start is None or utc_start + duration >= window_start:
+            yield start
+
+
+def _rule_starts(first: datetime, recurrence: Recurrence, earliest: Optional[datetime]) -> Iterator[Tuple[int, datetime]]:
+    """
+    (number, naive local start) of the occurrences the rule generates from `first`, in order and without
+    end, skipping ahead to at most a period before `earliest`. Numbers are exact whenever COUNT is set.
+    """
+    interval = recurrence.interval
+    if recurrence.frequency == RecurrenceFrequency.MONTHLY:
+        months = 0
+        if earliest is not None and recurrence.count is None:
+            months = max(0, ((earliest.year - first.year) * 12 + earliest.month - first.month) // interval - 1) * interval
+        number = 0
+        while True:
+            year, month = divmod(first.month - 1 + months, 12)
+            if first.year + year > MAXYEAR:
+                return
+            try:
+                start = first.replace(year=first.year + year, month=month + 1)
+            except ValueError:
+                # Months without the day of the month are skipped, as in RFC 5545
+                start = None
+            if start is not None:
+                yield number, start
+                number += 1
+            months += interval
+
+    if recurrence.frequency == RecurrenceFrequency.DAILY:
+        period, anchor, offsets = timedelta(days=interval), first, [0]
+    else:
+        # Slots are days after the Monday of the first week; the first occurrence is always part of the series
+        period = timedelta(weeks=interval)
+        anchor = first - timedelta(days=first.weekday())
+        offsets = sorted({_WEEKDAY_NUMBERS[day] for day in recurrence.byDay or ()} | {first.weekday()})
+    skipped = offsets.index((first - anchor).days)
+
+    number = 0
+    if earliest is not None and earliest > first:
+        number = max(0, (earliest - first) // period - 1) * len(offsets)
+    while True:
+        slot = number + skipped
+        try:
+            start = anchor + period * (slot // len(offsets)) + timedelta(days=offsets[slot % len(offsets)])
+        except OverflowError:
+            return
+        yield number, start
+        number += 1
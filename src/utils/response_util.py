@@ -1,18 +1,78 @@
 # src/utils/response_utils.py
 from datetime import datetime
-from src.responses.agenda_response import AgendaResponse, TimeSlot
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+from pydantic import TypeAdapter
+from starlette.responses import Response
+
+from src.exceptions.exception_handler import logger
+from src.responses.agenda_response import AgendaResponse, ItemType, Recurrence, TimeSlot
+
+STREAM_CHUNK_SIZE = 16 * 1024
+
+# Serializes a whole list in one pass in pydantic-core
+AGENDA_ITEMS_ADAPTER = TypeAdapter(List[AgendaResponse])
+
 
 def map_entity_to_response(entity: dict) -> AgendaResponse:
-    return AgendaResponse(
+    # Stored entities were validated when written, so the models are constructed without validating again
+    return AgendaResponse.model_construct(
         id=entity['RowKey'],
         summary=entity['summary'],
         description=entity.get('description'),
         location=entity.get('location'),
-        itemType=entity['itemType'],
+        itemType=ItemType(entity['itemType']),
         created=datetime.fromisoformat(entity['created']),
         updated=datetime.fromisoformat(entity['updated']),
-        timeSlot=TimeSlot(
+        timeSlot=TimeSlot.model_construct(
             start=datetime.fromisoformat(entity['timeSlotStart']),
             end=datetime.fromisoformat(entity['timeSlotEnd'])
-        )
+        ),
+        recurrence=Recurrence.model_validate_json(entity['recurrence']) if entity.get('recurrence') else None
     )
+
+
+def agenda_item_response(item: AgendaResponse, headers: Optional[Dict[str, str]] = None) -> Response:
+    return Response(content=item.model_dump_json(), media_type="application/json", headers=headers)
+
+
+def agenda_items_response(items: List[AgendaResponse], headers: Optional[Dict[str, str]] = None) -> Response:
+    """
+    Renders a list of items straight to JSON bytes. Returning a `Response` skips FastAPI's
+    `jsonable_encoder` pass and the validation against the route's `response_model`.
+    """
+    return Response(content=AGENDA_ITEMS_ADAPTER.dump_json(items), media_type="application/json", headers=headers)
+
+
+async def stream_json_array(items: AsyncIterator[AgendaResponse]) -> AsyncIterator[bytes]:
+    """
+    Renders items as a JSON array while they are produced, buffering up to STREAM_CHUNK_SIZE bytes
+    per write so memory stays flat regardless of how many items the group holds.
+    """
+    buffer = bytearray(b"[")
+    first = True
+    try:
+        async for item in items:
+            if not first:
+                buffer += b","
+            buffer += item.model_dump_json().encode()
+            first = False
+            if len(buffer) >= STREAM_CHUNK_SIZE:
+                yield bytes(buffer)
+                buffer.clear()
+    except Exception as e:
+        # The status line is already sent; ending the body early makes the client see invalid JSON
+        logger.error("Error while streaming agenda items: %s", e)
+        raise
+    buffer += b"]"
+    yield bytes(buffer)
+
+
+async def stream_server_sent_events(events: AsyncIterator[Optional[Tuple[str, str]]]) -> AsyncIterator[bytes]:
+    """Renders (event type, JSON) pairs as server-sent events; None becomes a comment that keeps proxies from timing out."""
+    async for event in events:
+        if event is None:
+            yield b": keep-alive\n\n"
+        else:
+            event_type, data = event
+            yield f"event: {event_type}\ndata: {data}\n\n".encode()
@@ -0,0 +1,47 @@
+import asyncio
+from typing import Awaitable, Callable, Dict, Tuple, TypeVar
+
+from src.metrics import SINGLE_FLIGHT_CALLS, SINGLE_FLIGHT_COLLAPSED
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """
+    Collapses concurrent identical calls: while a call for a key is in flight, callers asking for the
+    same key await that call instead of starting their own, and all of them get its result (or its
+    exception). Nothing is kept once the call finishes, so results are never older than the call.
+
+    The call runs as its own task, so a caller that is cancelled (e.g. its client disconnected) does
+    not cancel it for the others.
+    """
+
+    def __init__(self):
+        self._calls: Dict[Tuple, asyncio.Task] = {}
+
+    async def do(self, operation: str, key: Tuple, function: Callable[[], Awaitable[T]]) -> T:
+        task = self._calls.get(key)
+        if task is None:
+            SINGLE_FLIGHT_CALLS.labels(operation=operation).inc()
+            task = asyncio.ensure_future(function())
+            self._calls[key] = task
+            task.add_done_callback(lambda done: self._finish(key, done))
+        else:
+            SINGLE_FLIGHT_COLLAPSED.labels(operation=operation).inc()
+        return await asyncio.shield(task)
+
+    def forget(self, *prefix):
+        """
+        Detaches the in-flight calls whose key starts with `prefix`: their current callers still get
+        their result, later callers start a new call. Used after a write, so no read that started
+        before the write answers a caller that arrived after it.
+        """
+        for key in [key for key in self._calls if key[:len(prefix)] == prefix]:
+            del self._calls[key]
+
+    def _finish(self, key: Tuple, task: asyncio.Task):
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        # Retrieved here, so an exception is not reported as unhandled when every caller was cancelled
+        if not task.cancelled():
+            task.exception()
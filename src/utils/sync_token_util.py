@@ -0,0 +1,26 @@
+import base64
+import json
+from datetime import datetime
+from typing import Optional
+
+from src.exceptions.api_exception import APIException
+from src.exceptions.error_codes import ErrorCode
+
+
+def encode_sync_token(watermark: datetime) -> str:
+    # The watermark is a naive UTC time, like the `updated` timestamps it is compared with
+    token = json.dumps({"since": watermark.isoformat()}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(token.encode()).decode().rstrip("=")
+
+
+def decode_sync_token(token: Optional[str]) -> Optional[datetime]:
+    if not token:
+        return None
+    try:
+        decoded = json.loads(base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)))
+        watermark = datetime.fromisoformat(decoded["since"])
+    except (ValueError, TypeError, KeyError):
+        raise APIException("Invalid sync token", ErrorCode.BAD_REQUEST)
+    if watermark.tzinfo is not None:
+        raise APIException("Invalid sync token", ErrorCode.BAD_REQUEST)
+    return watermark
@@ -0,0 +1,24 @@
+from datetime import datetime, timezone
+from typing import Optional
+
+from src.responses.agenda_response import AgendaResponse, TimeSlot
+
+
+def as_utc(value: datetime) -> datetime:
+    # Stored and requested datetimes may be naive (treated as UTC) or offset-aware
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+def overlaps_window(time_slot: TimeSlot, start_date: Optional[datetime], end_date: Optional[datetime]) -> bool:
+    if start_date and as_utc(time_slot.end) < as_utc(start_date):
+        return False
+    if end_date and as_utc(time_slot.start) > as_utc(end_date):
+        return False
+    return True
+
+
+def item_overlaps_window(item: AgendaResponse, start_date: Optional[datetime], end_date: Optional[datetime]) -> bool:
+    # Recurring items are kept; which of their occurrences overlap is decided when they are expanded
+    return item.recurrence is not None or overlaps_window(item.timeSlot, start_date, end_date)
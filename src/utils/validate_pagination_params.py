@@ -0,0 +1,11 @@
+from typing import Optional
+
+from fastapi import HTTPException
+
+
+def validate_pagination_params(limit: Optional[int], continuation_token: Optional[str], stream: bool):
+    if stream and (limit or continuation_token):
+        raise HTTPException(
+            status_code=400,
+            detail="Streaming cannot be combined with limit or continuationToken"
+        )
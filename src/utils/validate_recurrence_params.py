@@ -0,0 +1,25 @@
+from datetime import datetime
+from typing import Optional
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from fastapi import HTTPException
+
+from src.enums.recurrence import RecurrenceFrequency
+from src.requests.recurrence_request import RecurrenceRequest
+from src.utils.recurrence_util import series_weekday
+
+
+def validate_recurrence_params(start_time: datetime, recurrence: Optional[RecurrenceRequest]):
+    if recurrence is None:
+        return
+    if recurrence.count is not None and recurrence.until is not None:
+        raise HTTPException(status_code=400, detail="A recurrence ends either after a count or at until, not both")
+    if recurrence.byDay and recurrence.frequency != RecurrenceFrequency.WEEKLY:
+        raise HTTPException(status_code=400, detail="byDay only applies to weekly recurrences")
+    if recurrence.timeZone:
+        try:
+            ZoneInfo(recurrence.timeZone)
+        except (ZoneInfoNotFoundError, ValueError):
+            raise HTTPException(status_code=400, detail=f"Unknown time zone {recurrence.timeZone!r}")
+    if recurrence.byDay and series_weekday(start_time, recurrence.timeZone) not in recurrence.byDay:
+        raise HTTPException(status_code=400, detail="byDay must include the weekday the time slot starts on")
@@ -0,0 +1,40 @@
+import base64
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src.settings import settings
+
+GROUP_ID = "11111111-1111-1111-1111-111111111111"
+
+
+def access_token(group_id: str = GROUP_ID, role: str = "PATIENT") -> str:
+    """An unsigned token, accepted while JWT_VALIDATION_ENABLED is off."""
+    def encode(data: dict) -> str:
+        return base64.urlsafe_b64encode(json.dumps(data).encode()).decode().rstrip("=")
+    claims = {"user_id": "22222222-2222-2222-2222-222222222222", "group_id": group_id, "role": role}
+    return f"{encode({'alg': 'none'})}.{encode(claims)}.signature"
+
+
+@pytest.fixture
+def app_settings(monkeypatch):
+    """The application on in-memory storage without token validation; tests may change more settings before `client`."""
+    for name, value in {
+        "STORAGE_BACKEND": "memory",
+        "JWT_VALIDATION_ENABLED": False,
+        "STORAGE_RESILIENCE_ENABLED": False,
+    }.items():
+        monkeypatch.setattr(settings, name, value)
+    return settings
+
+
+@pytest.fixture
+def client(app_settings):
+    from src.main import app
+
+    # Middleware is built on first use; rebuild it with this test's settings
+    app.middleware_stack = None
+    with TestClient(app, cookies={settings.ACCESS_TOKEN_COOKIE_NAME: access_token()}) as client:
+        yield client
+    app.middleware_stack = None
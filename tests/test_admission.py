@@ -0,0 +1,168 @@
+"""Admission refusals: 503 from the process-wide limiter, 429 from the group limits."""
+import asyncio
+
+import httpx
+import pytest
+
+from src.admission.middleware import AdmissionControlMiddleware
+from src.auth.middleware import AuthenticationMiddleware
+from src.settings import settings
+from tests.conftest import GROUP_ID, access_token
+
+OTHER_GROUP_ID = "33333333-3333-3333-3333-333333333333"
+
+
+class Backend:
+    """Answers 200 at once, or on /slow and /agenda/events only once `done` is set."""
+
+    def __init__(self):
+        self.done = asyncio.Event()
+        self.started = 0
+
+    async def __call__(self, scope, receive, send):
+        self.started += 1
+        if scope["path"] in ("/slow", "/agenda/events"):
+            await self.done.wait()
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"ok"})
+
+
+@pytest.fixture
+def admission(app_settings, monkeypatch):
+    """Sets admission limits, then builds the middleware stack the way the application does."""
+    def build(**limits):
+        values = {
+            "ADMISSION_MAX_IN_FLIGHT": 0,
+            "ADMISSION_MAX_QUEUE": 0,
+            "ADMISSION_QUEUE_TIMEOUT_SECONDS": 1,
+            "ADMISSION_GROUP_MAX_IN_FLIGHT": 0,
+            "ADMISSION_GROUP_RATE": 0,
+            "ADMISSION_GROUP_BURST": 1,
+        }
+        values.update({f"ADMISSION_{name.upper()}": value for name, value in limits.items()})
+        for name, value in values.items():
+            monkeypatch.setattr(settings, name, value)
+        backend = Backend()
+        middleware = AdmissionControlMiddleware(backend)
+        return backend, middleware, AuthenticationMiddleware(middleware)
+    return build
+
+
+def http_client(app, group_id: str = GROUP_ID) -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app),
+        base_url="http://test",
+        cookies={settings.ACCESS_TOKEN_COOKIE_NAME: access_token(group_id)}
+    )
+
+
+async def started(backend: Backend, count: int):
+    while backend.started < count:
+        await asyncio.sleep(0)
+
+
+def assert_refused(response: httpx.Response, status: int, code: str):
+    assert response.status_code == status
+    assert int(response.headers["Retry-After"]) >= 1
+    assert response.json()["code"] == code
+
+
+def test_full_queue_is_refused_with_503(admission):
+    backend, middleware, app = admission(max_in_flight=1, max_queue=1)
+
+    async def scenario():
+        async with http_client(app) as client:
+            holding = asyncio.create_task(client.get("/slow"))
+            await started(backend, 1)
+            queued = asyncio.create_task(client.get("/"))
+            while not middleware.limiter._waiters:
+                await asyncio.sleep(0)
+
+            refused = await client.get("/")
+            backend.done.set()
+            return refused, await holding, await queued
+
+    refused, holding, queued = asyncio.run(scenario())
+    assert_refused(refused, 503, "SYS0005")
+    assert refused.headers["Retry-After"] == "1"
+    assert holding.status_code == 200
+    # The queued request got the slot once it was released
+    assert queued.status_code == 200
+    assert middleware.limiter.in_flight == 0
+
+
+def test_queue_timeout_is_refused_with_503(admission):
+    backend, middleware, app = admission(max_in_flight=1, max_queue=1, queue_timeout_seconds=0.05)
+
+    async def scenario():
+        async with http_client(app) as client:
+            holding = asyncio.create_task(client.get("/slow"))
+            await started(backend, 1)
+            refused = await client.get("/")
+            backend.done.set()
+            await holding
+            return refused
+
+    assert_refused(asyncio.run(scenario()), 503, "SYS0005")
+    assert backend.started == 1
+
+
+def test_group_over_its_rate_is_refused_with_429(admission):
+    backend, _, app = admission(group_rate=0.01, group_burst=2)
+
+    async def scenario():
+        async with http_client(app) as client, http_client(app, OTHER_GROUP_ID) as other:
+            responses = [await client.get("/") for _ in range(3)]
+            return responses, await other.get("/")
+
+    responses, other = asyncio.run(scenario())
+    assert [response.status_code for response in responses[:2]] == [200, 200]
+    assert_refused(responses[2], 429, "SYS0004")
+    # One token every 100 seconds
+    assert int(responses[2].headers["Retry-After"]) == 100
+    # Buckets are per group
+    assert other.status_code == 200
+
+
+def test_group_over_its_concurrency_is_refused_with_429(admission):
+    backend, middleware, app = admission(group_max_in_flight=1)
+
+    async def scenario():
+        async with http_client(app) as client, http_client(app, OTHER_GROUP_ID) as other:
+            holding = asyncio.create_task(client.get("/slow"))
+            await started(backend, 1)
+            refused = await client.get("/")
+            other_group = await other.get("/")
+            backend.done.set()
+            await holding
+            return refused, other_group, await client.get("/")
+
+    refused, other_group, after = asyncio.run(scenario())
+    assert_refused(refused, 429, "SYS0004")
+    assert other_group.status_code == 200
+    # The slot was released with the request
+    assert after.status_code == 200
+
+
+def test_event_stream_is_rate_limited_without_holding_a_slot(admission):
+    backend, middleware, app = admission(max_in_flight=1, group_max_in_flight=1, group_rate=0.01, group_burst=3)
+
+    async def scenario():
+        async with http_client(app) as client:
+            streams = [asyncio.create_task(client.get("/agenda/events")) for _ in range(2)]
+            await started(backend, 2)
+            in_flight = middleware.limiter.in_flight
+            # Neither the process-wide slot nor the group's single slot is taken by the streams
+            regular = await client.get("/")
+            refused = await client.get("/agenda/events")
+            backend.done.set()
+            return in_flight, regular, refused, await asyncio.gather(*streams)
+
+    in_flight, regular, refused, streams = asyncio.run(scenario())
+    assert in_flight == 0
+    assert regular.status_code == 200
+    assert [stream.status_code for stream in streams] == [200, 200]
+    # The streams and the regular request used up the burst
+    assert_refused(refused, 429, "SYS0004")
+    assert middleware.limiter.in_flight == 0
+    assert middleware.groups._groups[GROUP_ID].in_flight == 0
@@ -0,0 +1,76 @@
+"""Expiry and eviction accounting of the agenda cache."""
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import pytest
+from prometheus_client import REGISTRY
+
+from src.cache import agenda_cache
+from src.cache.agenda_cache import AgendaCache
+from src.responses.agenda_response import AgendaResponse, ItemType, TimeSlot
+
+GROUP_ID = "group"
+START = datetime(2024, 1, 1, 10, tzinfo=timezone.utc)
+END = datetime(2024, 1, 1, 11, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = SimpleNamespace(now=1000.0)
+    monkeypatch.setattr(agenda_cache, "time", SimpleNamespace(monotonic=lambda: clock.now))
+    return clock
+
+
+def item(item_id: str) -> AgendaResponse:
+    return AgendaResponse(
+        id=item_id, summary="Visit", itemType=ItemType.EVENT, created=START, updated=START, timeSlot=TimeSlot(start=START, end=END)
+    )
+
+
+def evictions(reason: str) -> float:
+    return REGISTRY.get_sample_value("agenda_cache_evictions_total", {"reason": reason}) or 0
+
+
+def test_every_expired_view_is_counted(clock):
+    cache = AgendaCache(ttl_seconds=10, max_groups=10, max_items=100)
+    ticket = cache.begin_load(GROUP_ID)
+    cache.put_window(ticket, START, END, [item("a")])
+    cache.put_window(ticket, None, END, [item("a")])
+    cache.end_load(ticket)
+    before = evictions("expired")
+
+    clock.now += 11
+    # One window expires while the other is still cached
+    assert cache.get_window(GROUP_ID, START, END) is None
+    assert evictions("expired") == before + 1
+    assert cache.get_window(GROUP_ID, None, END) is None
+    assert evictions("expired") == before + 2
+    # The group entry went with its last view, without being counted again
+    assert cache.get_window(GROUP_ID, None, END) is None
+    assert evictions("expired") == before + 2
+
+
+def test_expired_group_view_is_counted(clock):
+    cache = AgendaCache(ttl_seconds=10, max_groups=10, max_items=100)
+    ticket = cache.begin_load(GROUP_ID)
+    cache.put_group(ticket, [item("a")])
+    cache.end_load(ticket)
+    assert cache.get_group(GROUP_ID) is not None
+    before = evictions("expired")
+
+    clock.now += 11
+    assert cache.get_group(GROUP_ID) is None
+    assert evictions("expired") == before + 1
+
+
+def test_stale_views_are_served_only_when_asked(clock):
+    cache = AgendaCache(ttl_seconds=10, max_groups=10, max_items=100, stale_seconds=30)
+    ticket = cache.begin_load(GROUP_ID)
+    cache.put_group(ticket, [item("a")])
+    cache.end_load(ticket)
+
+    clock.now += 11
+    assert cache.get_group(GROUP_ID) is None
+    assert list(cache.get_group(GROUP_ID, stale=True)) == ["a"]
+    clock.now += 30
+    assert cache.get_group(GROUP_ID, stale=True) is None
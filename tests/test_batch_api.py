@@ -0,0 +1,132 @@
+"""Batch creates, updates and deletes: per-item results, partial failure and conflict checks."""
+import pytest
+
+from src.repositories.memory_repository import MemoryAgendaRepository
+from src.services.agenda_service import AgendaService
+
+
+def event(start: str, end: str, **fields) -> dict:
+    return {
+        "summary": "Visit",
+        "itemType": "Event",
+        "timeSlot": {"startTime": f"2024-05-01T{start}:00Z", "endTime": f"2024-05-01T{end}:00Z"},
+        **fields,
+    }
+
+
+def statuses(response) -> list:
+    assert response.status_code == 200
+    return [(result["index"], result["status"]) for result in response.json()["results"]]
+
+
+def summaries(client) -> list:
+    return sorted(item["summary"] for item in client.get("/agenda/items").json())
+
+
+def test_batch_create_reports_every_item(client):
+    response = client.post("/agenda/items:batch", json={"items": [event("09:00", "10:00", summary=f"Visit {n}") for n in range(3)]})
+    assert statuses(response) == [(0, 201), (1, 201), (2, 201)]
+    assert summaries(client) == ["Visit 0", "Visit 1", "Visit 2"]
+
+
+def test_batch_update_reports_missing_items_and_writes_the_rest(client):
+    created = client.post("/agenda/items:batch", json={"items": [event("09:00", "10:00"), event("11:00", "12:00")]}).json()
+    ids = [result["id"] for result in created["results"]]
+
+    response = client.post("/agenda/items:batchUpdate", json={"items": [
+        event("09:00", "10:00", id=ids[0], summary="First"),
+        event("09:00", "10:00", id="missing", summary="Missing"),
+        event("11:00", "12:00", id=ids[1], summary="Second"),
+    ]})
+    assert statuses(response) == [(0, 200), (1, 404), (2, 200)]
+    assert response.json()["results"][1]["error"]["code"] == "AGENDA0003"
+    assert summaries(client) == ["First", "Second"]
+
+
+@pytest.fixture
+def concurrent_write(client, monkeypatch):
+    """Makes `changed` ids get modified by another writer between a batch's reads and its write."""
+    changed = []
+    read_many = AgendaService._read_many
+
+    async def read_then_race(self, group_id, item_ids, results):
+        existing = await read_many(self, group_id, item_ids, results)
+        for entity in existing:
+            if entity is not None and entity["RowKey"] in changed:
+                await self.repository.update_entity(dict(entity, summary="Changed elsewhere"), previous=entity)
+                if self.cache:
+                    self.cache.invalidate(group_id)
+        return existing
+
+    monkeypatch.setattr(AgendaService, "_read_many", read_then_race)
+    return changed
+
+
+@pytest.fixture
+def small_transactions(app_settings, monkeypatch):
+    monkeypatch.setattr(MemoryAgendaRepository, "MAX_BATCH_ITEMS", 3)
+
+
+def test_item_changed_concurrently_fails_alone_in_its_transaction(small_transactions, client, concurrent_write):
+    created = client.post("/agenda/items:batch", json={"items": [event("09:00", "10:00") for _ in range(4)]})
+    assert statuses(created) == [(0, 201), (1, 201), (2, 201), (3, 201)]
+    ids = [result["id"] for result in created.json()["results"]]
+    concurrent_write.append(ids[2])
+
+    response = client.post("/agenda/items:batchUpdate", json={
+        "items": [event("09:00", "10:00", id=item_id, summary="Updated") for item_id in ids]
+    })
+    # Written as transactions [0, 1, 2] and [3]; the first is retried without the item that failed it
+    assert statuses(response) == [(0, 200), (1, 200), (2, 412), (3, 200)]
+    assert response.json()["results"][2]["error"]["code"] == "AGENDA0002"
+    assert summaries(client) == ["Changed elsewhere", "Updated", "Updated", "Updated"]
+
+    concurrent_write.append(ids[0])
+    response = client.post("/agenda/items:batchDelete", json={"ids": ids})
+    assert statuses(response) == [(0, 412), (1, 204), (2, 412), (3, 204)]
+    assert summaries(client) == ["Changed elsewhere", "Changed elsewhere"]
+
+
+def test_batch_create_checks_conflicts_per_item(client):
+    assert client.post("/agenda/items", json=event("10:00", "11:00", summary="Booked")).status_code == 200
+
+    response = client.post("/agenda/items:batch", params={"checkConflicts": "true"}, json={"items": [
+        event("10:30", "11:30", summary="Overlaps booked"),
+        event("12:00", "13:00", summary="Free"),
+        event("12:30", "13:30", summary="Overlaps free"),
+        event("11:00", "12:00", summary="Touches both"),
+        event("10:30", "11:30", summary="Log", itemType="Log"),
+    ]})
+    assert statuses(response) == [(0, 409), (1, 201), (2, 409), (3, 201), (4, 201)]
+    results = response.json()["results"]
+    assert results[0]["error"]["code"] == "AGENDA0005"
+    assert "batch item 1" in results[2]["error"]["message"]
+    assert summaries(client) == ["Booked", "Free", "Log", "Touches both"]
+
+
+def test_batch_create_without_check_writes_overlaps(client):
+    client.post("/agenda/items", json=event("10:00", "11:00"))
+    response = client.post("/agenda/items:batch", json={"items": [event("10:30", "11:30")]})
+    assert statuses(response) == [(0, 201)]
+
+
+def test_batch_update_checks_conflicts_leaving_out_replaced_items(client):
+    created = client.post("/agenda/items:batch", json={"items": [
+        event("09:00", "10:00", summary="A"), event("10:00", "11:00", summary="B"), event("12:00", "13:00", summary="C"),
+    ]}).json()
+    a, b, c = [result["id"] for result in created["results"]]
+
+    # A and B swap slots: each one's old slot is being vacated
+    response = client.post("/agenda/items:batchUpdate", params={"checkConflicts": "true"}, json={"items": [
+        event("10:00", "11:00", id=a, summary="A"),
+        event("09:00", "10:00", id=b, summary="B"),
+    ]})
+    assert statuses(response) == [(0, 200), (1, 200)]
+
+    response = client.post("/agenda/items:batchUpdate", params={"checkConflicts": "true"}, json={"items": [
+        event("12:30", "13:30", id=a, summary="A onto C"),
+        event("14:00", "15:00", id=b, summary="B moved"),
+    ]})
+    assert statuses(response) == [(0, 409), (1, 200)]
+    assert c in response.json()["results"][0]["error"]["message"]
+    assert summaries(client) == ["A", "B moved", "C"]
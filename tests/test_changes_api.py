@@ -0,0 +1,54 @@
+"""Delta sync: GET /agenda/items/changes."""
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+from src.utils.sync_token_util import decode_sync_token, encode_sync_token
+
+
+def event(summary: str) -> dict:
+    return {
+        "summary": summary,
+        "itemType": "Event",
+        "timeSlot": {"startTime": "2024-05-01T10:00:00Z", "endTime": "2024-05-01T10:30:00Z"},
+    }
+
+
+@pytest.fixture
+def no_clock_skew(app_settings, monkeypatch):
+    monkeypatch.setattr(app_settings, "AGENDA_SYNC_CLOCK_SKEW_SECONDS", 0)
+
+
+def test_full_sync_then_changes_with_tombstones(no_clock_skew, client):
+    kept = client.post("/agenda/items", json=event("Kept")).json()
+    removed = client.post("/agenda/items", json=event("Removed")).json()
+
+    full = client.get("/agenda/items/changes").json()
+    assert sorted(item["summary"] for item in full["items"]) == ["Kept", "Removed"]
+    assert full["deleted"] == []
+
+    time.sleep(0.01)
+    assert client.delete(f"/agenda/items/{removed['id']}").status_code == 204
+    added = client.post("/agenda/items", json=event("Added")).json()
+
+    delta = client.get("/agenda/items/changes", params={"since": full["nextSince"]}).json()
+    assert [item["id"] for item in delta["items"]] == [added["id"]]
+    assert [deleted["id"] for deleted in delta["deleted"]] == [removed["id"]]
+    assert kept["id"] not in [item["id"] for item in delta["items"]]
+    assert decode_sync_token(delta["nextSince"]) > decode_sync_token(full["nextSince"])
+
+    time.sleep(0.01)
+    quiet = client.get("/agenda/items/changes", params={"since": delta["nextSince"]}).json()
+    assert quiet["items"] == [] and quiet["deleted"] == []
+    assert decode_sync_token(quiet["nextSince"]) >= decode_sync_token(delta["nextSince"])
+
+
+def test_expired_sync_token_asks_for_a_full_sync(client, app_settings):
+    old = datetime.utcnow() - timedelta(days=app_settings.AGENDA_TOMBSTONE_RETENTION_DAYS + 1)
+    response = client.get("/agenda/items/changes", params={"since": encode_sync_token(old)})
+    assert response.status_code == 410
+
+
+def test_malformed_sync_token_is_refused(client):
+    assert client.get("/agenda/items/changes", params={"since": "not-a-token"}).status_code == 400
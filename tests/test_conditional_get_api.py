@@ -0,0 +1,61 @@
+"""ETags and 304 responses on agenda reads."""
+
+
+def event(summary: str = "Visit", hour: int = 10) -> dict:
+    return {
+        "summary": summary,
+        "itemType": "Event",
+        "timeSlot": {"startTime": f"2024-05-01T{hour:02}:00:00Z", "endTime": f"2024-05-01T{hour:02}:30:00Z"},
+    }
+
+
+def test_unchanged_list_is_not_modified(client):
+    client.post("/agenda/items", json=event())
+    first = client.get("/agenda/items")
+    etag = first.headers["ETag"]
+    assert first.headers["Cache-Control"] == "private, no-cache"
+
+    again = client.get("/agenda/items", headers={"If-None-Match": etag})
+    assert again.status_code == 304
+    assert again.content == b""
+    assert again.headers["ETag"] == etag
+    # Weak comparison, and any of several tags
+    assert client.get("/agenda/items", headers={"If-None-Match": f'"other", {etag.removeprefix("W/")}'}).status_code == 304
+
+
+def test_every_write_changes_the_list_etag(client):
+    item_id = client.post("/agenda/items", json=event()).json()["id"]
+    seen = set()
+    for write in (
+        lambda: client.post("/agenda/items", json=event("Second", 12)),
+        lambda: client.put(f"/agenda/items/{item_id}", json=event("Renamed")),
+        lambda: client.delete(f"/agenda/items/{item_id}"),
+    ):
+        etag = client.get("/agenda/items").headers["ETag"]
+        seen.add(etag)
+        write()
+        response = client.get("/agenda/items", headers={"If-None-Match": etag})
+        assert response.status_code == 200
+        assert response.headers["ETag"] not in seen
+
+
+def test_window_lists_have_their_own_etag(client):
+    client.post("/agenda/items", json=event())
+    whole = client.get("/agenda/items").headers["ETag"]
+    window = client.get("/agenda/items", params={"startDate": "2024-05-01T00:00:00Z", "endDate": "2024-05-02T00:00:00Z"})
+    assert window.headers["ETag"] != whole
+    assert client.get("/agenda/items", params={"startDate": "2024-05-01T00:00:00Z", "endDate": "2024-05-02T00:00:00Z"},
+                      headers={"If-None-Match": whole}).status_code == 200
+
+
+def test_single_item_etag(client):
+    item = client.post("/agenda/items", json=event()).json()
+    first = client.get(f"/agenda/items/{item['id']}")
+    etag = first.headers["ETag"]
+    assert client.get(f"/agenda/items/{item['id']}", headers={"If-None-Match": etag}).status_code == 304
+
+    client.put(f"/agenda/items/{item['id']}", json=event("Renamed"))
+    changed = client.get(f"/agenda/items/{item['id']}", headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.json()["summary"] == "Renamed"
+    assert changed.headers["ETag"] != etag
@@ -0,0 +1,60 @@
+"""Startup and shutdown of the application's resources."""
+import asyncio
+
+import pytest
+from fastapi import FastAPI
+
+from src import main
+from src.repositories.memory_repository import MemoryAgendaRepository
+
+
+class Tracked:
+    def __init__(self, name: str, log: list, fail_open: bool = False):
+        self.name = name
+        self.log = log
+        self.fail_open = fail_open
+
+    async def open(self):
+        if self.fail_open:
+            raise ConnectionError(f"{self.name} unreachable")
+        self.log.append(f"open {self.name}")
+
+    async def close(self):
+        self.log.append(f"close {self.name}")
+
+
+class TrackedRepository(MemoryAgendaRepository):
+    def __init__(self, log: list):
+        super().__init__()
+        self.log = log
+
+    async def open(self):
+        await super().open()
+        self.log.append("open repository")
+
+    async def close(self):
+        self.log.append("close repository")
+        await super().close()
+
+
+def start_and_stop(monkeypatch, log: list, fail_events: bool = False):
+    monkeypatch.setattr(main, "create_repository", lambda: TrackedRepository(log))
+    monkeypatch.setattr(main, "create_event_broker", lambda: Tracked("events", log, fail_open=fail_events))
+
+    async def run():
+        async with main.lifespan(FastAPI()):
+            log.append("serving")
+    asyncio.run(run())
+
+
+def test_resources_close_in_reverse_order(monkeypatch):
+    log = []
+    start_and_stop(monkeypatch, log)
+    assert log == ["open repository", "open events", "serving", "close events", "close repository"]
+
+
+def test_opened_resources_close_when_a_later_one_fails_to_open(monkeypatch):
+    log = []
+    with pytest.raises(ConnectionError):
+        start_and_stop(monkeypatch, log, fail_events=True)
+    assert log == ["open repository", "close repository"]
@@ -0,0 +1,51 @@
+"""Recurring items must fit the single storage property they are kept in (MAX_RECURRENCE_LENGTH)."""
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from pydantic import ValidationError
+
+from src.constants.validation_contraints import (
+    MAX_LENGTH_DESCRIPTION,
+    MAX_LENGTH_LOCATION,
+    MAX_LENGTH_SUMMARY,
+    MAX_RECURRENCE_EXCEPTIONS,
+    MAX_RECURRENCE_LENGTH,
+    MAX_RECURRENCE_OVERRIDES,
+)
+from src.enums.recurrence import RecurrenceFrequency
+from src.exceptions.api_exception import APIException
+from src.requests.recurrence_request import RecurrenceRequest
+from src.responses.agenda_response import ItemType, Recurrence, TimeSlot
+from src.services.agenda_service import _override_occurrence, _skip_occurrence
+from src.utils.recurrence_util import stored_length
+
+START = datetime(2024, 1, 1, 8, tzinfo=timezone.utc)
+
+
+def test_request_at_the_limit_is_accepted():
+    padding = MAX_RECURRENCE_LENGTH - stored_length(Recurrence(frequency=RecurrenceFrequency.DAILY, timeZone=""))
+    RecurrenceRequest(frequency=RecurrenceFrequency.DAILY, timeZone="x" * padding)
+    with pytest.raises(ValidationError):
+        RecurrenceRequest(frequency=RecurrenceFrequency.DAILY, timeZone="x" * (padding + 1))
+
+
+def test_full_series_is_refused_before_it_reaches_storage():
+    recurrence = Recurrence(frequency=RecurrenceFrequency.DAILY)
+    for day in range(MAX_RECURRENCE_EXCEPTIONS):
+        recurrence = _skip_occurrence(recurrence, START + timedelta(days=day))
+
+    # Largest fields, with characters JSON escapes
+    fields = dict(
+        summary='"' * MAX_LENGTH_SUMMARY,
+        description='"' * MAX_LENGTH_DESCRIPTION,
+        location='"' * MAX_LENGTH_LOCATION,
+        item_type=ItemType.EVENT,
+        time_slot=TimeSlot(start=START, end=START + timedelta(hours=1)),
+        recurrence=None,
+    )
+    with pytest.raises(APIException) as raised:
+        for day in range(MAX_RECURRENCE_EXCEPTIONS, MAX_RECURRENCE_EXCEPTIONS + MAX_RECURRENCE_OVERRIDES):
+            recurrence = _override_occurrence(recurrence, START + timedelta(days=day), fields, START)
+            assert stored_length(recurrence) <= MAX_RECURRENCE_LENGTH
+    assert raised.value.status_code == 400
+    assert len(recurrence.overrides) < MAX_RECURRENCE_OVERRIDES
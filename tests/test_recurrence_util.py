@@ -0,0 +1,198 @@
+"""Expansion of recurring items into occurrences (src/utils/recurrence_util.py)."""
+from datetime import datetime, timedelta, timezone
+
+from src.enums.recurrence import RecurrenceFrequency, Weekday
+from src.responses.agenda_response import AgendaResponse, ItemType, OccurrenceOverride, Recurrence, TimeSlot
+from src.settings import settings
+from src.utils.recurrence_util import (
+    OPEN_END,
+    expand_series,
+    find_occurrence,
+    kept_overrides,
+    occurrence_id,
+    occurrence_slots,
+    original_start,
+    parse_occurrence_id,
+    series_span,
+    stored_length,
+    with_exception,
+    with_override,
+)
+
+UTC = timezone.utc
+CREATED = datetime(2024, 1, 1, tzinfo=UTC)
+
+
+def utc(*args) -> datetime:
+    return datetime(*args, tzinfo=UTC)
+
+
+def series(start: datetime, minutes: int = 30, **rule) -> AgendaResponse:
+    return AgendaResponse(
+        id="series",
+        summary="Medication",
+        itemType=ItemType.EVENT,
+        created=CREATED,
+        updated=CREATED,
+        timeSlot=TimeSlot(start=start, end=start + timedelta(minutes=minutes)),
+        recurrence=Recurrence(**rule),
+    )
+
+
+def starts(item: AgendaResponse, start_date=None, end_date=None) -> list:
+    return [occurrence.timeSlot.start.astimezone(UTC) for occurrence in expand_series(item, start_date, end_date)]
+
+
+def test_daily_series_within_a_window():
+    item = series(utc(2024, 3, 1, 8), frequency=RecurrenceFrequency.DAILY, interval=2)
+    assert starts(item, utc(2024, 3, 10), utc(2024, 3, 16)) == [utc(2024, 3, 11, 8), utc(2024, 3, 13, 8), utc(2024, 3, 15, 8)]
+
+
+def test_occurrence_overlapping_the_window_start_is_included():
+    item = series(utc(2024, 3, 1, 23, 30), minutes=60, frequency=RecurrenceFrequency.DAILY)
+    assert starts(item, utc(2024, 3, 5), utc(2024, 3, 5, 12)) == [utc(2024, 3, 4, 23, 30)]
+
+
+def test_weekly_series_on_several_days():
+    # 2024-03-04 is a Monday
+    item = series(
+        utc(2024, 3, 4, 9),
+        frequency=RecurrenceFrequency.WEEKLY,
+        interval=2,
+        byDay=[Weekday.MONDAY, Weekday.THURSDAY],
+    )
+    assert starts(item, utc(2024, 3, 1), utc(2024, 3, 31)) == [
+        utc(2024, 3, 4, 9), utc(2024, 3, 7, 9), utc(2024, 3, 18, 9), utc(2024, 3, 21, 9),
+    ]
+
+
+def test_weekly_series_counts_from_its_first_day():
+    # 2024-03-07 is a Thursday
+    item = series(utc(2024, 3, 7, 9), frequency=RecurrenceFrequency.WEEKLY, byDay=[Weekday.MONDAY, Weekday.THURSDAY], count=3)
+    assert starts(item, utc(2024, 3, 1), utc(2024, 4, 30)) == [utc(2024, 3, 7, 9), utc(2024, 3, 11, 9), utc(2024, 3, 14, 9)]
+
+
+def test_monthly_series():
+    item = series(utc(2024, 1, 15, 10), frequency=RecurrenceFrequency.MONTHLY, interval=3)
+    assert starts(item, utc(2024, 1, 1), utc(2024, 12, 31)) == [
+        utc(2024, 1, 15, 10), utc(2024, 4, 15, 10), utc(2024, 7, 15, 10), utc(2024, 10, 15, 10),
+    ]
+
+
+def test_monthly_series_skips_months_without_the_day():
+    item = series(utc(2024, 1, 31, 10), frequency=RecurrenceFrequency.MONTHLY, count=4)
+    assert starts(item, utc(2024, 1, 1), utc(2025, 1, 1)) == [
+        utc(2024, 1, 31, 10), utc(2024, 3, 31, 10), utc(2024, 5, 31, 10), utc(2024, 7, 31, 10),
+    ]
+
+
+def test_monthly_series_skips_ahead_to_a_late_window():
+    item = series(utc(2024, 1, 31, 10), frequency=RecurrenceFrequency.MONTHLY)
+    assert starts(item, utc(2030, 2, 1), utc(2030, 6, 1)) == [utc(2030, 3, 31, 10), utc(2030, 5, 31, 10)]
+
+
+def test_count_ends_the_series():
+    item = series(utc(2024, 3, 1, 8), frequency=RecurrenceFrequency.DAILY, count=3)
+    assert starts(item, utc(2024, 1, 1), utc(2024, 12, 31)) == [utc(2024, 3, 1, 8), utc(2024, 3, 2, 8), utc(2024, 3, 3, 8)]
+    assert starts(item, utc(2024, 3, 4), utc(2024, 12, 31)) == []
+
+
+def test_until_is_inclusive():
+    item = series(utc(2024, 3, 1, 8), frequency=RecurrenceFrequency.DAILY, until=utc(2024, 3, 3, 8))
+    assert starts(item, utc(2024, 1, 1), utc(2024, 12, 31)) == [utc(2024, 3, 1, 8), utc(2024, 3, 2, 8), utc(2024, 3, 3, 8)]
+
+
+def test_exceptions_are_left_out():
+    item = series(utc(2024, 3, 1, 8), frequency=RecurrenceFrequency.DAILY, count=4, exceptions=[utc(2024, 3, 2, 8)])
+    assert starts(item) == [utc(2024, 3, 1, 8), utc(2024, 3, 3, 8), utc(2024, 3, 4, 8)]
+    assert original_start(item.timeSlot, item.recurrence, "20240302T080000Z") is None
+
+
+def test_override_moves_its_occurrence():
+    item = series(utc(2024, 3, 1, 8), frequency=RecurrenceFrequency.DAILY, count=3)
+    moved = TimeSlot(start=utc(2024, 3, 5, 18), end=utc(2024, 3, 5, 19))
+    override = OccurrenceOverride(
+        originalStart=utc(2024, 3, 2, 8), summary="Moved", itemType=ItemType.EVENT, updated=CREATED, timeSlot=moved
+    )
+    item.recurrence = with_override(item.recurrence, override)
+
+    occurrences = expand_series(item, utc(2024, 3, 1), utc(2024, 3, 10))
+    assert [(occurrence.timeSlot.start, occurrence.summary) for occurrence in occurrences] == [
+        (utc(2024, 3, 1, 8), "Medication"), (utc(2024, 3, 3, 8), "Medication"), (utc(2024, 3, 5, 18), "Moved"),
+    ]
+    # Still identified by the start the rule gave it
+    assert occurrences[2].id == "series_20240302T080000Z"
+    assert occurrences[2].seriesId == "series"
+    assert find_occurrence(item, "20240302T080000Z").summary == "Moved"
+    # An override outside the window leaves it, even though its original start is inside
+    assert starts(item, utc(2024, 3, 2), utc(2024, 3, 2, 23)) == []
+    assert series_span(item.timeSlot, item.recurrence)[1] >= utc(2024, 3, 5, 19)
+
+    # Deleting the occurrence drops its override
+    item.recurrence = with_exception(item.recurrence, utc(2024, 3, 2, 8))
+    assert item.recurrence.overrides == []
+    assert starts(item) == [utc(2024, 3, 1, 8), utc(2024, 3, 3, 8)]
+
+
+def test_new_rule_keeps_the_overrides_it_still_has():
+    item = series(utc(2024, 3, 1, 8), frequency=RecurrenceFrequency.DAILY)
+    for day in (2, 3):
+        override = OccurrenceOverride(
+            originalStart=utc(2024, 3, day, 8), summary="Moved", itemType=ItemType.EVENT, updated=CREATED, timeSlot=item.timeSlot
+        )
+        item.recurrence = with_override(item.recurrence, override)
+
+    every_other_day = Recurrence(frequency=RecurrenceFrequency.DAILY, interval=2)
+    kept = kept_overrides(item.recurrence, item.timeSlot, every_other_day)
+    assert [override.originalStart for override in kept.overrides] == [utc(2024, 3, 3, 8)]
+
+
+def test_time_zone_keeps_the_local_time_across_dst():
+    # Europe/Amsterdam moves from UTC+1 to UTC+2 on 2024-03-31
+    start = datetime(2024, 3, 29, 8, tzinfo=timezone(timedelta(hours=1)))
+    item = series(start, frequency=RecurrenceFrequency.DAILY, timeZone="Europe/Amsterdam")
+    assert starts(item, utc(2024, 3, 29), utc(2024, 4, 2)) == [
+        utc(2024, 3, 29, 7), utc(2024, 3, 30, 7), utc(2024, 3, 31, 6), utc(2024, 4, 1, 6),
+    ]
+    assert original_start(item.timeSlot, item.recurrence, "20240401T060000Z") is not None
+    assert original_start(item.timeSlot, item.recurrence, "20240401T070000Z") is None
+
+
+def test_without_time_zone_the_utc_offset_is_kept():
+    start = datetime(2024, 3, 29, 8, tzinfo=timezone(timedelta(hours=1)))
+    item = series(start, frequency=RecurrenceFrequency.DAILY)
+    assert starts(item, utc(2024, 3, 29), utc(2024, 4, 2)) == [
+        utc(2024, 3, 29, 7), utc(2024, 3, 30, 7), utc(2024, 3, 31, 7), utc(2024, 4, 1, 7),
+    ]
+
+
+def test_weekly_series_keeps_the_local_weekday():
+    # 00:30 on Monday in Amsterdam is still Sunday in UTC
+    start = datetime(2024, 3, 4, 0, 30, tzinfo=timezone(timedelta(hours=1)))
+    item = series(start, frequency=RecurrenceFrequency.WEEKLY, timeZone="Europe/Amsterdam", count=2)
+    assert starts(item) == [utc(2024, 3, 3, 23, 30), utc(2024, 3, 10, 23, 30)]
+
+
+def test_expansion_is_capped(monkeypatch):
+    monkeypatch.setattr(settings, "AGENDA_RECURRENCE_MAX_OCCURRENCES", 5)
+    item = series(utc(2024, 3, 1, 8), frequency=RecurrenceFrequency.DAILY)
+    assert len(starts(item, utc(2024, 1, 1), utc(2025, 1, 1))) == 5
+    assert len(occurrence_slots(item.timeSlot, item.recurrence)) == 5
+
+
+def test_open_ended_series_span():
+    item = series(utc(2024, 3, 1, 8), frequency=RecurrenceFrequency.DAILY)
+    assert series_span(item.timeSlot, item.recurrence) == (utc(2024, 3, 1, 8), OPEN_END)
+
+
+def test_occurrence_ids():
+    item_id = occurrence_id("series", datetime(2024, 1, 17, 9, tzinfo=timezone(timedelta(hours=1))))
+    assert item_id == "series_20240117T080000Z"
+    assert parse_occurrence_id(item_id) == ("series", "20240117T080000Z")
+    assert parse_occurrence_id("3f0c1a52-8f4e-4c7b-9d65-2f9a1b7c4e10") is None
+
+
+def test_stored_length_counts_utf16_code_units():
+    plain = Recurrence(frequency=RecurrenceFrequency.DAILY, timeZone="")
+    # Outside the BMP: two code units
+    assert stored_length(plain.model_copy(update={"timeZone": "\U0001F600"})) == stored_length(plain) + 2
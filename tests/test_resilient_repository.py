@@ -0,0 +1,290 @@
+"""The storage resilience layer against injected faults (`FaultyRepository` over in-memory storage)."""
+import asyncio
+import time
+
+import aiohttp
+import pytest
+from azure.core.exceptions import HttpResponseError, ServiceRequestError
+
+from benchmarks.fake_storage import FaultyRepository, StorageFault
+from src.repositories.base import EntityNotFoundError, StorageUnavailableError
+from src.repositories.memory_repository import MemoryAgendaRepository
+from src.repositories.resilient_repository import CircuitBreaker, ResilientAgendaRepository, is_storage_failure
+from src.settings import settings
+
+GROUP_ID = "group"
+ITEM = {
+    "PartitionKey": GROUP_ID,
+    "RowKey": "item",
+    "summary": "Visit",
+    "itemType": "Event",
+    "created": "2024-01-01T00:00:00",
+    "updated": "2024-01-01T00:00:00",
+    "timeSlotStart": "2024-01-01T10:00:00",
+    "timeSlotEnd": "2024-01-01T11:00:00",
+}
+
+
+@pytest.fixture(autouse=True)
+def resilience_settings(monkeypatch):
+    for name, value in {
+        "STORAGE_READ_TIMEOUT_SECONDS": 0.2,
+        "STORAGE_WRITE_TIMEOUT_SECONDS": 0.2,
+        "STORAGE_READ_RETRIES": 0,
+        "STORAGE_RETRY_BACKOFF_SECONDS": 0,
+        "STORAGE_RETRY_BUDGET_RATIO": 0.1,
+        "STORAGE_CIRCUIT_FAILURES": 3,
+        "STORAGE_CIRCUIT_OPEN_SECONDS": 0.05,
+        "STORAGE_HEDGED_READS_ENABLED": False,
+        "STORAGE_HEDGE_MIN_DELAY_SECONDS": 0,
+    }.items():
+        monkeypatch.setattr(settings, name, value)
+
+
+async def faulty_storage(**faults) -> FaultyRepository:
+    storage = MemoryAgendaRepository()
+    await storage.create_entity(ITEM)
+    return FaultyRepository(storage, **faults)
+
+
+async def failed_read(repository: ResilientAgendaRepository):
+    with pytest.raises(StorageUnavailableError):
+        await repository.get_entity(GROUP_ID, "item")
+
+
+def test_circuit_opens_goes_half_open_and_closes():
+    async def scenario():
+        faulty = await faulty_storage()
+        repository = ResilientAgendaRepository(faulty)
+
+        faulty.outage = "error"
+        for _ in range(3):
+            await failed_read(repository)
+        assert repository.breaker.state == CircuitBreaker.OPEN
+        # Refused without reaching the storage
+        await failed_read(repository)
+        assert faulty.calls == 3
+
+        # After the open period one trial call goes through; others are still refused meanwhile
+        await asyncio.sleep(settings.STORAGE_CIRCUIT_OPEN_SECONDS)
+        faulty.outage = "hang"
+        trial = asyncio.ensure_future(repository.get_entity(GROUP_ID, "item"))
+        await asyncio.sleep(0.01)
+        assert repository.breaker.state == CircuitBreaker.HALF_OPEN
+        await failed_read(repository)
+        assert faulty.calls == 4
+        with pytest.raises(StorageUnavailableError):
+            await trial
+        assert repository.breaker.state == CircuitBreaker.OPEN
+
+        # A successful trial closes it again
+        faulty.outage = None
+        await asyncio.sleep(settings.STORAGE_CIRCUIT_OPEN_SECONDS)
+        assert (await repository.get_entity(GROUP_ID, "item"))["summary"] == "Visit"
+        assert repository.breaker.state == CircuitBreaker.CLOSED
+
+    asyncio.run(scenario())
+
+
+def test_read_retries_stop_at_the_budget(monkeypatch):
+    monkeypatch.setattr(settings, "STORAGE_READ_RETRIES", 5)
+    monkeypatch.setattr(settings, "STORAGE_RETRY_BUDGET_RATIO", 0)
+    monkeypatch.setattr(settings, "STORAGE_CIRCUIT_FAILURES", 1000)
+
+    async def scenario():
+        faulty = await faulty_storage()
+        repository = ResilientAgendaRepository(faulty)
+        faulty.outage = "error"
+
+        await failed_read(repository)
+        assert faulty.calls == 1 + 5
+        # The budget starts with 10 retries and earns none back at ratio 0
+        for _ in range(9):
+            await failed_read(repository)
+        assert faulty.calls == 10 + repository.retry_budget.max_tokens
+
+    asyncio.run(scenario())
+
+
+def test_failed_reads_are_retried_within_the_budget(monkeypatch):
+    monkeypatch.setattr(settings, "STORAGE_READ_RETRIES", 3)
+    monkeypatch.setattr(settings, "STORAGE_CIRCUIT_FAILURES", 1000)
+
+    async def scenario():
+        faulty = await faulty_storage(error_rate=0.2, seed=3)
+        repository = ResilientAgendaRepository(faulty)
+        for _ in range(20):
+            assert (await repository.get_entity(GROUP_ID, "item"))["summary"] == "Visit"
+        assert faulty.calls > 20
+
+    asyncio.run(scenario())
+
+
+def test_writes_are_never_retried(monkeypatch):
+    monkeypatch.setattr(settings, "STORAGE_READ_RETRIES", 5)
+
+    async def scenario():
+        faulty = await faulty_storage()
+        repository = ResilientAgendaRepository(faulty)
+
+        faulty.outage = "error"
+        with pytest.raises(StorageUnavailableError):
+            await repository.create_entity(dict(ITEM, RowKey="other"))
+        assert faulty.calls == 1
+
+        faulty.outage = "hang"
+        with pytest.raises(StorageUnavailableError):
+            await repository.delete_entity(GROUP_ID, "item")
+        assert faulty.calls == 2
+
+    asyncio.run(scenario())
+
+
+def test_hedged_read_is_sent_after_the_p95_delay(monkeypatch):
+    monkeypatch.setattr(settings, "STORAGE_HEDGED_READS_ENABLED", True)
+    monkeypatch.setattr(settings, "STORAGE_READ_TIMEOUT_SECONDS", 5)
+
+    async def scenario():
+        faulty = await faulty_storage(slow_rate=1, slow_ms=2000)
+        repository = ResilientAgendaRepository(faulty)
+        repository.point_reads.p95 = 0.1
+
+        started = time.perf_counter()
+        read = asyncio.ensure_future(repository.get_entity(GROUP_ID, "item"))
+        await asyncio.sleep(0.05)
+        assert faulty.calls == 1
+        # Only the first read is slow; the hedge sent at p95 answers
+        faulty.slow_rate = 0
+        entity = await read
+        elapsed = time.perf_counter() - started
+
+        assert entity["summary"] == "Visit"
+        assert faulty.calls == 2
+        assert 0.1 <= elapsed < 1
+
+    asyncio.run(scenario())
+
+
+def test_errors_that_are_not_the_storages_pass_through():
+    class BrokenStorage(MemoryAgendaRepository):
+        async def get_entity(self, partition_key, row_key):
+            raise KeyError("timeSlotStart")
+
+    async def scenario():
+        faulty = FaultyRepository(BrokenStorage())
+        repository = ResilientAgendaRepository(faulty)
+        for _ in range(10):
+            with pytest.raises(KeyError):
+                await repository.get_entity(GROUP_ID, "item")
+        assert faulty.calls == 10
+        assert repository.breaker.state == CircuitBreaker.CLOSED
+
+    asyncio.run(scenario())
+
+
+class UnreadableStorage(MemoryAgendaRepository):
+    """Raises a KeyError, as mapping bad entity data would, while `broken` is set."""
+
+    broken = False
+
+    async def get_entity(self, partition_key, row_key):
+        if self.broken:
+            raise KeyError("timeSlotStart")
+        return await super().get_entity(partition_key, row_key)
+
+
+def test_errors_that_are_not_the_storages_leave_the_breaker_alone():
+    async def scenario():
+        storage = UnreadableStorage()
+        await storage.create_entity(ITEM)
+        faulty = FaultyRepository(storage)
+        repository = ResilientAgendaRepository(faulty)
+
+        # They do not end a streak of failures
+        faulty.outage = "error"
+        await failed_read(repository)
+        await failed_read(repository)
+        faulty.outage, storage.broken = None, True
+        with pytest.raises(KeyError):
+            await repository.get_entity(GROUP_ID, "item")
+        faulty.outage = "error"
+        await failed_read(repository)
+        assert repository.breaker.state == CircuitBreaker.OPEN
+
+        # Nor close the circuit as a trial call
+        await asyncio.sleep(settings.STORAGE_CIRCUIT_OPEN_SECONDS)
+        faulty.outage = None
+        with pytest.raises(KeyError):
+            await repository.get_entity(GROUP_ID, "item")
+        assert repository.breaker.state != CircuitBreaker.CLOSED
+
+        # The next call is the trial
+        storage.broken = False
+        assert (await repository.get_entity(GROUP_ID, "item"))["summary"] == "Visit"
+        assert repository.breaker.state == CircuitBreaker.CLOSED
+
+    asyncio.run(scenario())
+
+
+class FirstPageFails(MemoryAgendaRepository):
+    """`query_items` hands out a pager whose first page fetch fails the first `failures` times, as on Azure."""
+
+    failures = 0
+
+    async def query_items(self, partition_key):
+        entities = await super().query_items(partition_key)
+
+        async def pages():
+            if self.failures:
+                self.failures -= 1
+                raise StorageFault("Injected storage error")
+            async for entity in entities:
+                yield entity
+        return pages()
+
+
+def test_first_page_of_a_group_read_is_retried(monkeypatch):
+    monkeypatch.setattr(settings, "STORAGE_READ_RETRIES", 2)
+    monkeypatch.setattr(settings, "STORAGE_CIRCUIT_FAILURES", 1000)
+
+    async def scenario():
+        storage = FirstPageFails()
+        await storage.create_entity(ITEM)
+        await storage.create_entity(dict(ITEM, RowKey="other"))
+        repository = ResilientAgendaRepository(storage)
+
+        storage.failures = 2
+        entities = await repository.query_items(GROUP_ID)
+        assert sorted([entity["RowKey"] async for entity in entities]) == ["item", "other"]
+        assert storage.failures == 0
+
+        storage.failures = 3
+        with pytest.raises(StorageUnavailableError):
+            await repository.query_items(GROUP_ID)
+
+        assert [entity async for entity in await repository.query_items("empty")] == []
+
+    asyncio.run(scenario())
+
+
+def _response_error(status: int) -> HttpResponseError:
+    error = HttpResponseError(message=str(status))
+    error.status_code = status
+    return error
+
+
+@pytest.mark.parametrize("error, failure", [
+    (TimeoutError(), True),
+    (StorageFault("down"), True),
+    (ServiceRequestError("connection refused"), True),
+    (aiohttp.ClientConnectionError(), True),
+    (_response_error(503), True),
+    (_response_error(429), True),
+    (_response_error(408), True),
+    (_response_error(404), False),
+    (EntityNotFoundError("gone"), False),
+    (KeyError("timeSlotStart"), False),
+    (ValueError("bad date"), False),
+])
+def test_is_storage_failure(error, failure):
+    assert is_storage_failure(error) is failure
@@ -0,0 +1,82 @@
+"""Conditional writes of the local storage engines, which must behave like Table Storage's."""
+import asyncio
+
+import pytest
+
+from src.repositories.base import BatchOperationError, EntityModifiedError
+from src.repositories.memory_repository import MemoryAgendaRepository
+from src.repositories.sqlite_repository import SqliteAgendaRepository
+
+GROUP_ID = "group"
+
+
+def entity(row_key: str, summary: str = "Visit") -> dict:
+    return {
+        "PartitionKey": GROUP_ID,
+        "RowKey": row_key,
+        "summary": summary,
+        "itemType": "Event",
+        "created": "2024-01-01T00:00:00",
+        "updated": "2024-01-01T00:00:00",
+        "timeSlotStart": "2024-01-01T10:00:00",
+        "timeSlotEnd": "2024-01-01T11:00:00",
+    }
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def engine(request, tmp_path):
+    if request.param == "memory":
+        return MemoryAgendaRepository
+    return lambda: SqliteAgendaRepository(str(tmp_path / "agenda.db"))
+
+
+def run_with(engine, scenario):
+    async def main():
+        repository = engine()
+        await repository.open()
+        try:
+            await repository.ensure_table_exists()
+            await scenario(repository)
+        finally:
+            await repository.close()
+    asyncio.run(main())
+
+
+def test_batch_delete_refuses_an_entity_changed_since_it_was_read(engine):
+    async def scenario(repository):
+        for row_key in ("a", "b"):
+            await repository.create_entity(entity(row_key))
+        read = [await repository.get_entity(GROUP_ID, row_key) for row_key in ("a", "b")]
+        await repository.update_entity(entity("b", "Moved"), previous=read[1])
+
+        with pytest.raises(BatchOperationError) as raised:
+            await repository.delete_entities(read)
+        assert raised.value.item_index == 1
+        assert isinstance(raised.value.error, EntityModifiedError)
+        # All or none
+        assert await repository.get_entity(GROUP_ID, "a") is not None
+
+        await repository.delete_entities([read[0], await repository.get_entity(GROUP_ID, "b")])
+        assert [item async for item in await repository.query_items(GROUP_ID)] == []
+
+    run_with(engine, scenario)
+
+
+def test_update_refuses_an_entity_changed_since_it_was_read(engine):
+    async def scenario(repository):
+        await repository.create_entity(entity("a"))
+        read = await repository.get_entity(GROUP_ID, "a")
+        await repository.update_entity(entity("a", "First"), previous=read)
+        with pytest.raises(EntityModifiedError):
+            await repository.update_entity(entity("a", "Second"), previous=read)
+
+    run_with(engine, scenario)
+
+
+def test_delete_reports_whether_there_was_an_item(engine):
+    async def scenario(repository):
+        await repository.create_entity(entity("a"))
+        assert await repository.delete_entity(GROUP_ID, "a") is True
+        assert await repository.delete_entity(GROUP_ID, "a") is False
+
+    run_with(engine, scenario)